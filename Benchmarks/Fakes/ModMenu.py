@@ -0,0 +1,166 @@
+"""
+A stand-in for the SDK's ModMenu, just the parts both mods actually use.
+Settings get saved as `Mods/<Mod Folder>/settings.json` relative to the working directory, like they would in game.
+"""
+
+import enum
+import json
+import os
+from typing import Any, Callable, Dict, Generic, List, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+
+
+class Game(enum.Flag):
+    BL2 = enum.auto()
+    TPS = enum.auto()
+    AoDK = enum.auto()
+
+    @staticmethod
+    def GetCurrent() -> "Game":
+        return Game.BL2
+
+
+class ModTypes(enum.Flag):
+    NONE = 0
+    Utility = enum.auto()
+    Content = enum.auto()
+    Gameplay = enum.auto()
+    Library = enum.auto()
+
+
+class EnabledSaveType(enum.Enum):
+    NotSaved = enum.auto()
+    LoadWithSettings = enum.auto()
+    LoadOnMainMenu = enum.auto()
+
+
+class Keybind:
+    def __init__(
+        self, Name: str, Key: str = "None", IsRebindable: bool = True, OnPress: Optional[Callable[[], None]] = None
+    ) -> None:
+        self.Name = Name
+        self.Key = Key
+        self.IsRebindable = IsRebindable
+        self.OnPress = OnPress
+
+
+class Options:
+    class Base:
+        def __init__(self, Caption: str, Description: str = "", IsHidden: bool = False) -> None:
+            self.Caption = Caption
+            self.Description = Description
+            self.IsHidden = IsHidden
+
+    class Value(Base, Generic[T]):
+        def __init__(self, Caption: str, Description: str, CurrentValue: T, IsHidden: bool = False) -> None:
+            super().__init__(Caption, Description, IsHidden)
+            self.CurrentValue: T = CurrentValue
+
+    class Hidden(Value[T]):
+        def __init__(self, Caption: str, Description: str = "", StartingValue: Any = None) -> None:
+            super().__init__(Caption, Description, StartingValue, True)
+
+    class Slider(Value[int]):
+        def __init__(
+            self, Caption: str, Description: str, CurrentValue: int, MinValue: int, MaxValue: int, Increment: int
+        ) -> None:
+            super().__init__(Caption, Description, CurrentValue)
+            self.MinValue = MinValue
+            self.MaxValue = MaxValue
+            self.Increment = Increment
+
+    class Boolean(Value[bool]):
+        def __init__(
+            self, Caption: str, Description: str, CurrentValue: bool, Choices: Sequence[str] = ("Off", "On")
+        ) -> None:
+            super().__init__(Caption, Description, CurrentValue)
+            self.Choices = Choices
+
+    class Nested(Base):
+        def __init__(self, Caption: str, Description: str, Children: Sequence["Options.Base"]) -> None:
+            super().__init__(Caption, Description)
+            self.Children = Children
+
+
+class SDKMod:
+    Name: str = ""
+    Author: str = ""
+    Description: str = ""
+    Version: str = ""
+    SupportedGames: Game = Game.BL2
+    Types: ModTypes = ModTypes.NONE
+    SaveEnabledState: EnabledSaveType = EnabledSaveType.NotSaved
+    Options: Sequence[Any] = []
+    Keybinds: Sequence[Keybind] = []
+    SettingsInputs: Dict[str, str] = {"Enter": "Enable"}
+    IsEnabled: bool = False
+
+    def Enable(self) -> None:
+        self.IsEnabled = True
+
+    def Disable(self) -> None:
+        self.IsEnabled = False
+
+    def SettingsInputPressed(self, action: str) -> None:
+        if action in ("Enable", "Disable"):
+            self.Enable() if action == "Enable" else self.Disable()
+
+    def ModOptionChanged(self, option: "Options.Base", new_value: Any) -> None:
+        pass
+
+
+def Hook(target: str, name: str = "{0}.{1}") -> Callable[[T], T]:
+    """Hooks are never called by the engine here, benchmarks call the hooked methods themselves"""
+    return lambda function: function
+
+
+Mods: List[SDKMod] = []
+
+
+def RegisterMod(mod: SDKMod) -> None:
+    # Same as the real one, this is when a mod's saved settings get loaded
+    SettingsManager.LoadModSettings(mod)
+    Mods.append(mod)
+
+
+class SettingsManager:
+    @staticmethod
+    def _GetOptionValue(option: Options.Base) -> Any:
+        if isinstance(option, Options.Nested):
+            return {x.Caption: SettingsManager._GetOptionValue(x) for x in option.Children}
+        if isinstance(option, Options.Boolean):
+            # The mods sometimes store the choice's text rather than a bool
+            return option.CurrentValue in (True, option.Choices[1])
+        return option.CurrentValue  # type: ignore[attr-defined]
+
+    @staticmethod
+    def _SetOptionValue(option: Options.Base, value: Any) -> None:
+        if isinstance(option, Options.Nested):
+            for child in option.Children:
+                if child.Caption in value:
+                    SettingsManager._SetOptionValue(child, value[child.Caption])
+            return
+        option.CurrentValue = value  # type: ignore[attr-defined]
+
+    @staticmethod
+    def LoadModSettings(mod: SDKMod) -> None:
+        folder = mod.__class__.__module__.split(".")[-1]
+        try:
+            with open(os.path.join("Mods", folder, "settings.json")) as file:
+                settings = json.load(file)
+        except (OSError, ValueError):
+            return
+        for option in mod.Options:
+            if option.Caption in settings.get("Options", {}):
+                SettingsManager._SetOptionValue(option, settings["Options"][option.Caption])
+
+    @staticmethod
+    def SaveModSettings(mod: SDKMod) -> None:
+        folder = mod.__class__.__module__.split(".")[-1]
+        settings = {
+            "Options": {x.Caption: SettingsManager._GetOptionValue(x) for x in mod.Options},
+            "Keybinds": {x.Name: x.Key for x in mod.Keybinds},
+        }
+        with open(os.path.join("Mods", folder, "settings.json"), "w") as file:
+            json.dump(settings, file, indent=2)
@@ -0,0 +1,63 @@
+"""
+A stand-in for UserFeedback, with no UI: every box answers itself as soon as it's shown.
+Queue up the answers in `Responses` beforehand, the text to submit or the name of the button to press.
+A box shown with nothing queued is treated as if the player cancelled it.
+"""
+
+from typing import Callable, List, Optional, Sequence
+
+VersionMajor: int = 1
+VersionMinor: int = 5
+
+Responses: List[str] = []
+
+
+class OptionBoxButton:
+    def __init__(self, Name: str, Tip: str = "") -> None:
+        self.Name = Name
+        self.Tip = Tip
+
+
+class TextInputBox:
+    def __init__(self, Title: str, DefaultMessage: str = "", PausesGame: bool = False, Priority: int = 0) -> None:
+        self.Title = Title
+        self.DefaultMessage = DefaultMessage
+        self.PausesGame = PausesGame
+        self.OnSubmit: Callable[[str], None] = lambda msg: None
+
+    def Show(self) -> None:
+        if Responses:
+            self.OnSubmit(Responses.pop(0))
+
+
+class OptionBox:
+    def __init__(
+        self,
+        Title: str,
+        Caption: str = "",
+        Buttons: Sequence[OptionBoxButton] = (),
+        Tooltip: str = "",
+        PreventCanceling: bool = False,
+        Priority: int = 0,
+    ) -> None:
+        self.Title = Title
+        self.Caption = Caption
+        self.Buttons = Buttons
+        self.Tooltip = Tooltip
+        self.PreventCanceling = PreventCanceling
+        self.OnPress: Callable[[OptionBoxButton], None] = lambda button: None
+        self.OnCancel: Callable[[], None] = lambda: None
+
+    def Update(self) -> None:
+        pass
+
+    def Show(self, Button: Optional[OptionBoxButton] = None) -> None:
+        if not Responses:
+            self.OnCancel()
+            return
+        name = Responses.pop(0)
+        for button in self.Buttons:
+            if button.Name == name:
+                self.OnPress(button)
+                return
+        raise ValueError(f"No button named '{name}' in '{self.Title}'")
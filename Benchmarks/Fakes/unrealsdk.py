@@ -0,0 +1,281 @@
+"""
+A stand-in for the SDK's `unrealsdk` module, just enough of the engine for both mods to run headless.
+
+Every engine call the mods make is counted in `Calls`, and any call with an entry in `Latency` sleeps for that many
+seconds first, so you can see how the mods behave against a slow engine or a laggy co-op host.
+"""
+
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+
+# {"Function Name": Seconds}, how long each fake engine call takes
+Latency: Dict[str, float] = {
+    "LoadPackage": 0.0,
+    "FindObject": 0.0,
+    "ConsoleCommand": 0.0,
+    "ServerUpgradeSkill": 0.0,
+    "ResetSkillTree": 0.0,
+}
+
+# {"Function Name": Count}, how many times each fake engine call has been made
+Calls: Dict[str, int] = {}
+
+# Set to print everything the mods log, it's swallowed otherwise
+Verbose: bool = False
+
+
+def _Call(name: str) -> None:
+    Calls[name] = Calls.get(name, 0) + 1
+    delay = Latency.get(name, 0.0)
+    if delay > 0:
+        time.sleep(delay)
+
+
+class FStruct:
+    """A plain struct, fields are just attributes"""
+
+    def __init__(self, **fields: Any) -> None:
+        self.__dict__.update(fields)
+
+    def __repr__(self) -> str:
+        return "(" + ",".join(f"{x}={y!r}" for x, y in self.__dict__.items()) + ")"
+
+
+class UFunction:
+    pass
+
+
+class UObject:
+    def __init__(self, ClassName: str, Name: str) -> None:
+        self.Name: str = Name
+        self.Class: UObject = _Classes.setdefault(ClassName, _ClassObject(ClassName)) if ClassName != "Class" else self
+
+    def GetName(self) -> str:
+        return self.Name.split(".")[-1]
+
+    def PathName(self, obj: "UObject") -> str:
+        return obj.Name
+
+    def __repr__(self) -> str:
+        return f"{self.Class.Name}'{self.Name}'"
+
+
+class _ClassObject(UObject):
+    def __init__(self, Name: str) -> None:
+        self.Name = Name
+        self.Class = self
+
+
+_Classes: Dict[str, UObject] = {}
+
+# The struct fields of each parameter array's values, in declaration order
+_ParameterFields: Dict[str, List[str]] = {
+    "VectorParameterValues": ["R", "G", "B", "A"],
+    "TextureParameterValues": [],
+    "ScalarParameterValues": [],
+}
+
+
+def _ToParameterStruct(propName: str, value: Any) -> Any:
+    if not isinstance(value, tuple):
+        return value
+    name, paramValue, guid = value
+    if isinstance(paramValue, tuple):
+        paramValue = FStruct(**dict(zip(_ParameterFields[propName], paramValue)))
+    guidStruct = FStruct(A=guid[0], B=guid[1], C=guid[2], D=guid[3])
+    return FStruct(ParameterName=name, ParameterValue=paramValue, ExpressionGUID=guidStruct)
+
+
+class MaterialInstanceConstant(UObject):
+    """Converts assigned parameter arrays into structs the same way the engine does"""
+
+    def __init__(self, Name: str) -> None:
+        super().__init__("MaterialInstanceConstant", Name)
+        self.VectorParameterValues: List[Any] = []
+        self.TextureParameterValues: List[Any] = []
+        self.ScalarParameterValues: List[Any] = []
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name in _ParameterFields and isinstance(value, list):
+            value = [_ToParameterStruct(name, x) for x in value]
+        super().__setattr__(name, value)
+
+    def ClearParameterValues(self) -> None:
+        self.VectorParameterValues = []
+        self.TextureParameterValues = []
+        self.ScalarParameterValues = []
+
+    def _SetParameterValue(self, propName: str, ParameterName: str, Value: Any) -> None:
+        """Updates the named parameter if there is one, otherwise adds it with an empty GUID, like the engine does"""
+        new = _ToParameterStruct(propName, (ParameterName, Value, (0, 0, 0, 0)))
+        for entry in getattr(self, propName):
+            if entry.ParameterName == ParameterName:
+                entry.ParameterValue = new.ParameterValue
+                return
+        getattr(self, propName).append(new)
+
+    def SetVectorParameterValue(self, ParameterName: str, Value: Any) -> None:
+        self._SetParameterValue("VectorParameterValues", ParameterName, Value)
+
+    def SetTextureParameterValue(self, ParameterName: str, Value: Any) -> None:
+        self._SetParameterValue("TextureParameterValues", ParameterName, Value)
+
+    def SetScalarParameterValue(self, ParameterName: str, Value: Any) -> None:
+        self._SetParameterValue("ScalarParameterValues", ParameterName, Value)
+
+
+# The state of the fake engine, see `Reset`
+# {"Package Name": ["Object Name"]}, which objects become findable once a package is loaded
+Packages: Dict[str, List[str]] = {}
+# Packages which are loaded as soon as the game starts
+StartupPackages: Set[str] = set()
+LoadedPackages: Set[str] = set()
+# {"Object Name": Factory}, objects which exist (once their package is loaded) but haven't been created yet
+_Factories: Dict[str, Callable[[], UObject]] = {}
+_PackageOf: Dict[str, str] = {}
+Objects: Dict[str, UObject] = {}
+KeptAlive: Set[str] = set()
+Engine: Optional[Any] = None
+
+
+def RegisterObject(name: str, factory: Callable[[], UObject], package: Optional[str] = None) -> None:
+    """Adds an object to the fake engine, which can only be found once its package is loaded (if it has one)"""
+    new = name not in _Factories
+    _Factories[name] = factory
+    if package is not None and new:
+        _PackageOf[name] = package
+        Packages.setdefault(package, []).append(name)
+
+
+def Reset(engine: Any = None) -> None:
+    """Throws away every created object and loaded package, as if the game had just been restarted"""
+    global Engine
+    Objects.clear()
+    KeptAlive.clear()
+    Calls.clear()
+    LoadedPackages.clear()
+    LoadedPackages.update(StartupPackages)
+    Engine = engine
+
+
+def Log(*args: Any) -> None:
+    Calls["Log"] = Calls.get("Log", 0) + 1
+    if Verbose:
+        print(*args)
+
+
+def GetEngine() -> Any:
+    return Engine
+
+
+def KeepAlive(obj: UObject) -> None:
+    KeptAlive.add(obj.Name)
+
+
+def LoadPackage(name: str) -> None:
+    _Call("LoadPackage")
+    LoadedPackages.add(name)
+
+
+def FindObject(className: str, name: str) -> Optional[UObject]:
+    _Call("FindObject")
+    # Packages only exist while they're loaded
+    if className == "Package":
+        return UObject("Package", name) if name in LoadedPackages else None
+    obj = Objects.get(name)
+    if obj is not None:
+        return obj
+    factory = _Factories.get(name)
+    package = _PackageOf.get(name)
+    if factory is None:
+        # Textures and gameplay objects always exist, there's no point registering every single one
+        if name.startswith(("GD_", "Char_", "Common_", "FX_")):
+            factory = lambda: UObject(className if className != "Object" else "Texture2D", name)  # noqa: E731
+        else:
+            return None
+    elif package is not None and package not in LoadedPackages:
+        return None
+    obj = Objects[name] = factory()
+    return obj
+
+
+class SkillState(FStruct):
+    """An entry of `PlayerSkillTree.Skills`"""
+
+
+class PlayerSkillTree(UObject):
+    def __init__(self, Skills: List[SkillState], Branches: Optional[List[FStruct]] = None) -> None:
+        super().__init__("PlayerSkillTree", "Transient.PlayerSkillTree_0")
+        self.Skills: List[SkillState] = Skills
+        # Each is `(Definition=SkillTreeBranchDefinition)`, the first being the action skill's root branch
+        self.Branches: List[FStruct] = Branches or []
+
+
+class PlayerReplicationInfo(UObject):
+    def __init__(self, GeneralSkillPoints: int, Currency: int) -> None:
+        super().__init__("WillowPlayerReplicationInfo", "Transient.WillowPlayerReplicationInfo_0")
+        self.GeneralSkillPoints: int = GeneralSkillPoints
+        self.Currency: int = Currency
+
+    def GetCurrencyOnHand(self, currencyType: int) -> int:
+        return self.Currency
+
+    def AddCurrencyOnHand(self, currencyType: int, amount: int) -> None:
+        self.Currency += amount
+
+
+class PlayerController(UObject):
+    """A player, with a skill tree the mods can read and respec"""
+
+    def __init__(self, CharacterClass: str, SkillTree: Optional[PlayerSkillTree], SkillPoints: int = 0) -> None:
+        super().__init__("WillowPlayerController", "TheWorld.PersistentLevel.WillowPlayerController_0")
+        self.CharacterClass: Optional[UObject] = UObject("WillowCharacterClassDefinition", CharacterClass)
+        self.PlayerSkillTree: Optional[PlayerSkillTree] = SkillTree
+        self.PlayerReplicationInfo: PlayerReplicationInfo = PlayerReplicationInfo(SkillPoints, 1000000)
+
+    def ConsoleCommand(self, command: str, bWriteToLog: bool) -> None:
+        _Call("ConsoleCommand")
+
+    def GetCachedSaveGame(self) -> Any:
+        return None
+
+    def GetSkillTreeResetCost(self) -> int:
+        return 1000
+
+    def ResetSkillTree(self, bResetActionSkill: bool, bDeferUpdate: bool) -> int:
+        """Sets every skill back to grade zero, returning how many points that freed up"""
+        _Call("ResetSkillTree")
+        refunded = 0
+        for skill in self.PlayerSkillTree.Skills:  # type: ignore[union-attr]
+            refunded += skill.Grade
+            skill.Grade = 0
+        return refunded
+
+    def ServerUpgradeSkill(self, definition: UObject) -> None:
+        _Call("ServerUpgradeSkill")
+        if self.PlayerReplicationInfo.GeneralSkillPoints <= 0:
+            return
+        for skill in self.PlayerSkillTree.Skills:  # type: ignore[union-attr]
+            if skill.Definition is definition and skill.Grade < skill.Definition.MaxGrade:
+                skill.Grade += 1
+                self.PlayerReplicationInfo.GeneralSkillPoints -= 1
+                return
+
+
+class WorldInfo(UObject):
+    def __init__(self, MapName: str) -> None:
+        super().__init__("WorldInfo", "TheWorld.PersistentLevel.WorldInfo_0")
+        self.MapName: str = MapName
+
+    def GetMapName(self, bIncludePrefix: bool) -> str:
+        return self.MapName
+
+
+class GameEngine(UObject):
+    def __init__(self, Player: PlayerController, MapName: str = "menumap") -> None:
+        super().__init__("WillowGameEngine", "Transient.WillowGameEngine_0")
+        self.GamePlayers: List[FStruct] = [FStruct(Actor=Player)]
+        self.WorldInfo: WorldInfo = WorldInfo(MapName)
+
+    def GetCurrentWorldInfo(self) -> WorldInfo:
+        return self.WorldInfo
@@ -0,0 +1,469 @@
+"""
+Headless benchmarks for CustomSkins and SkillSaver, run against the fake engine in `Fakes`.
+
+    python Benchmarks/Run.py [--sizes 10,1000,10000] [--repeat 3] [--only Restore]
+                             [--latency ServerUpgradeSkill=0.02 ...] [--json out.json] [--compare old.json]
+
+For CustomSkins the size is the number of skin files in the library, for SkillSaver it's how many builds are saved
+for the class being played. Each benchmark reports the best and median of its timed runs, the engine calls it made,
+then does one extra run under tracemalloc for the net allocated blocks and peak traced memory.
+"""
+
+import argparse
+import gc
+import importlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+BenchDir: str = os.path.dirname(os.path.abspath(__file__))
+RepoDir: str = os.path.dirname(BenchDir)
+FakesDir: str = os.path.join(BenchDir, "Fakes")
+
+# Put the fakes where the mods expect to find the real things, `Mods` is the repo itself plus the fake libraries
+sys.path.insert(0, FakesDir)
+sys.path.insert(0, BenchDir)
+_Mods = types.ModuleType("Mods")
+_Mods.__path__ = [RepoDir, FakesDir]  # type: ignore[attr-defined]
+sys.modules["Mods"] = _Mods
+
+import unrealsdk  # noqa: E402
+import Synthetic  # noqa: E402
+from Mods import ModMenu, UserFeedback  # noqa: E402
+
+# How many skins per character are enabled in the saved settings
+EnabledPerCharacter: int = 4
+# How many skill points the player has to spend
+SkillPoints: int = 65
+
+
+class Context:
+    """The fake game folder for a single size"""
+
+    def __init__(self, Root: str, Size: int) -> None:
+        self.Size: int = Size
+        self.GameDir: str = os.path.join(Root, f"Game{Size}")
+        self.Win32Dir: str = os.path.join(self.GameDir, "Binaries", "Win32")
+        self.SkinsModDir: str = os.path.join(self.Win32Dir, "Mods", "CustomSkins")
+        self.SkinFiles: List[str] = []
+        os.makedirs(os.path.join(self.Win32Dir, "Mods", "SkillSaver"))
+        self.SkinFiles = Synthetic.WriteSkinLibrary(os.path.join(self.SkinsModDir, "Skins"), Size)
+        Synthetic.RegisterMaterials(self.GameDir)
+        # The mods use paths relative to Win32, same as in game
+        os.chdir(self.Win32Dir)
+
+
+class Result(NamedTuple):
+    Name: str
+    Size: int
+    Times: List[float]
+    Blocks: int
+    PeakKiB: float
+    Calls: Dict[str, int]
+    Extra: Dict[str, float]
+
+    @property
+    def Best(self) -> float:
+        return min(self.Times)
+
+    @property
+    def Median(self) -> float:
+        return statistics.median(self.Times)
+
+
+# A benchmark does all of its setup, then returns the function to time, which may return any extra measurements
+Benchmark = Callable[[Context], Callable[[], Optional[Dict[str, float]]]]
+Benchmarks: Dict[str, Benchmark] = {}
+
+
+def Register(name: str) -> Callable[[Benchmark], Benchmark]:
+    def _Register(function: Benchmark) -> Benchmark:
+        Benchmarks[name] = function
+        return function
+
+    return _Register
+
+
+_Instances: Dict[str, Any] = {}
+
+
+def ImportMod(name: str) -> Any:
+    """Imports a fresh copy of a mod, as if the game had just started"""
+    old = _Instances.pop(name, None)
+    if old is not None and getattr(old, "Tasks", None) is not None and old.Tasks.Pool is not None:
+        old.Tasks.Pool.shutdown()
+    for module in [x for x in sys.modules if x == f"Mods.{name}" or x.startswith(f"Mods.{name}.")]:
+        del sys.modules[module]
+    ModMenu.Mods.clear()
+    instance = importlib.import_module(f"Mods.{name}").instance  # type: ignore[attr-defined]
+    _Instances[name] = instance
+    return instance
+
+
+def ResetEngine(player: Optional[unrealsdk.PlayerController] = None) -> None:
+    if player is None:
+        player = unrealsdk.PlayerController("CharClass_Siren", None)
+    unrealsdk.Reset(unrealsdk.GameEngine(player))
+
+
+"""CustomSkins"""
+
+
+def _RemoveCaches(ctx: Context, *names: str) -> None:
+    for name in names:
+        path = os.path.join(ctx.SkinsModDir, name)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _WriteSkinSettings(ctx: Context) -> None:
+    settings: Dict[str, Any] = {"Load Budget": 4}
+    for skinFile in ctx.SkinFiles:
+        character = os.path.basename(os.path.dirname(skinFile))
+        characterSettings = settings.setdefault(character, {})
+        # Skip the files which are generated empty
+        if len(characterSettings) < EnabledPerCharacter and os.path.getsize(skinFile) > 1:
+            characterSettings[os.path.splitext(os.path.basename(skinFile))[0]] = True
+    with open(os.path.join(ctx.SkinsModDir, "settings.json"), "w") as file:
+        json.dump({"Options": settings}, file)
+
+
+def _IsEnabled(option: Any) -> bool:
+    # Restored options hold the choice's text rather than a bool
+    return option.CurrentValue in (True, "On")
+
+
+def _Drain(mod: Any) -> Dict[str, float]:
+    """Ticks the game until the mod has finished loading and polling the skin folder, returning the longest tick"""
+    worst = 0.0
+    while mod.Tasks.Busy or mod.Polling is not None:
+        start = time.perf_counter()
+        mod.OnTick(None, None, None)
+        worst = max(worst, time.perf_counter() - start)
+        # Give the worker threads a chance to run, as frames would in game
+        time.sleep(0.0001)
+    return {"WorstTickMs": worst * 1000}
+
+
+def _NewCustomSkins(ctx: Context) -> Any:
+    _WriteSkinSettings(ctx)
+    ResetEngine()
+    return ImportMod("CustomSkins")
+
+
+def _EnabledCustomSkins(ctx: Context) -> Any:
+    """Returns a fully loaded instance, using whatever caches are on disk"""
+    mod = _NewCustomSkins(ctx)
+    mod.Enable()
+    mod.Tasks.RunAll()
+    return mod
+
+
+@Register("CustomSkins.Enable.Cold")
+def EnableCold(ctx: Context) -> Callable[[], Dict[str, float]]:
+    _RemoveCaches(ctx, "SkinIndex.json", "PackageIndex.json", "SkinPack.bin")
+    mod = _NewCustomSkins(ctx)
+    return lambda: (mod.Enable(), _Drain(mod))[1]
+
+
+@Register("CustomSkins.Enable.Warm")
+def EnableWarm(ctx: Context) -> Callable[[], Dict[str, float]]:
+    _RemoveCaches(ctx, "SkinPack.bin")
+    _EnabledCustomSkins(ctx)
+    mod = _NewCustomSkins(ctx)
+    return lambda: (mod.Enable(), _Drain(mod))[1]
+
+
+@Register("CustomSkins.Enable.Pack")
+def EnablePack(ctx: Context) -> Callable[[], Dict[str, float]]:
+    _EnabledCustomSkins(ctx).CompileSkinPack()
+    mod = _NewCustomSkins(ctx)
+    return lambda: (mod.Enable(), _Drain(mod))[1]
+
+
+@Register("CustomSkins.Refresh")
+def Refresh(ctx: Context) -> Callable[[], None]:
+    mod = _EnabledCustomSkins(ctx)
+    return lambda: (mod.SettingsInputPressed("Refresh Skins"), _Drain(mod))[1]
+
+
+@Register("CustomSkins.Toggle")
+def Toggle(ctx: Context) -> Callable[[], None]:
+    mod = _EnabledCustomSkins(ctx)
+    # Prefer a disabled skin, for a character that already has some enabled, so it has to be layered on top
+    options = list(mod.SkinOptions.values())
+    option = next((x for x in reversed(options) if not _IsEnabled(x)), options[-1])
+    enabled = _IsEnabled(option)
+
+    def _Toggle() -> None:
+        mod.ModOptionChanged(option, not enabled)
+        mod.ModOptionChanged(option, enabled)
+
+    return _Toggle
+
+
+@Register("CustomSkins.Disable")
+def Disable(ctx: Context) -> Callable[[], None]:
+    mod = _EnabledCustomSkins(ctx)
+    return mod.Disable  # type: ignore[no-any-return]
+
+
+_ModifySeed: List[int] = [0]
+
+
+@Register("CustomSkins.Refresh.Modified")
+def RefreshModified(ctx: Context) -> Callable[[], None]:
+    mod = _EnabledCustomSkins(ctx)
+    # Edit 1% of the library, including an enabled skin, so it has to be re-applied live
+    enabled = [x.SkinFile for x in mod.SkinOptions.values() if _IsEnabled(x)]
+    modified = enabled[:1] + [x for x in ctx.SkinFiles if os.path.getsize(x) > 1][: max(ctx.Size // 100, 1)]
+    for skinFile in modified:
+        _ModifySeed[0] += 1
+        Synthetic.ModifySkinFile(skinFile, _ModifySeed[0])
+    return lambda: (mod.SettingsInputPressed("Refresh Skins"), _Drain(mod))[1]
+
+
+@Register("CustomSkins.Toggle.Repeat")
+def ToggleRepeat(ctx: Context) -> Callable[[], Dict[str, float]]:
+    # A skin which sets a material that doesn't exist, which is the worst case for finding them
+    # This adds a file to the library, so has to run after everything else which uses it
+    Synthetic.WriteBrokenSkinFile(os.path.join(ctx.SkinsModDir, "Skins", "Maya", "Broken Skin.txt"))
+    mod = _EnabledCustomSkins(ctx)
+    option = mod.SkinOptions[os.path.normpath("Mods/CustomSkins/Skins/Maya/Broken Skin.txt")]
+    # Toggle it once first, so only toggling a skin we've seen before gets timed
+    mod.ModOptionChanged(option, True)
+    mod.ModOptionChanged(option, False)
+
+    def _Toggle() -> Dict[str, float]:
+        mod.ModOptionChanged(option, True)
+        mod.ModOptionChanged(option, False)
+        return {"Searches": mod.Resolver.Searches, "MissHits": mod.Resolver.MissHits}
+
+    return _Toggle
+
+
+"""SkillSaver"""
+
+
+def _NewSkillSaver(ctx: Context, currentPoints: int) -> Any:
+    layout = Synthetic.SkillLayout("Siren")
+    grades = layout.RandomGrades(currentPoints, seed=1)
+    player = unrealsdk.PlayerController("CharClass_Siren", layout.MakeSkillTree(grades), SkillPoints - sum(grades))
+    ResetEngine(player)
+    # Start from just the settings file each time, rather than replaying everything the last run saved
+    for name in ("SkillMap.journal", "SkillMap.json", "History.json", "RecentBuilds.json"):
+        if os.path.exists(os.path.join("Mods", "SkillSaver", name)):
+            os.remove(os.path.join("Mods", "SkillSaver", name))
+    mod = ImportMod("SkillSaver")
+    mod.EnsureLoaded()
+
+    builds = mod.SkillMap.CurrentValue["Siren"]
+    for index in range(ctx.Size):
+        builds[f"Build {index}"] = layout.ToBuild(layout.RandomGrades(SkillPoints, seed=100 + index))
+    # Shares every point with the current build, plus a few more
+    builds["Similar"] = layout.ToBuild(layout.RandomGrades(SkillPoints, seed=1))
+    builds["Different"] = layout.ToBuild(layout.RandomGrades(SkillPoints, seed=2))
+    return mod
+
+
+@Register("SkillSaver.Startup")
+def Startup(ctx: Context) -> Callable[[], Dict[str, float]]:
+    mod = _NewSkillSaver(ctx, SkillPoints)
+    # Leave the settings, a journal and a history on disk, like after a normal session
+    mod.SaveSettings()
+    mod.Builds.Set("Siren", "Journaled Build", mod.SkillMap.CurrentValue["Siren"]["Similar"])
+    mod.History.Push("Siren", [0] * len(Synthetic.SkillLayout("Siren").Definitions))
+
+    def _Run() -> Dict[str, float]:
+        # First use is reported separately, as the game only pays for it if the mod actually gets used
+        start = time.perf_counter()
+        fresh = ImportMod("SkillSaver")
+        loaded = time.perf_counter()
+        fresh.EnsureLoaded()
+        return {"ImportMs": (loaded - start) * 1000, "FirstUseMs": (time.perf_counter() - loaded) * 1000}
+
+    return _Run
+
+
+@Register("SkillSaver.Save")
+def Save(ctx: Context) -> Callable[[], None]:
+    mod = _NewSkillSaver(ctx, SkillPoints)
+    UserFeedback.Responses[:] = ["Saved Build"]
+    return sys.modules["Mods.SkillSaver"].SaveSkillTree  # type: ignore[no-any-return]
+
+
+@Register("SkillSaver.Compact")
+def Compact(ctx: Context) -> Callable[[], None]:
+    mod = _NewSkillSaver(ctx, SkillPoints)
+    build = mod.SkillMap.CurrentValue["Siren"]["Similar"]
+
+    # What a save used to cost every time, now only done once changes stop coming in
+    def _Run() -> None:
+        mod.Builds.Set("Siren", "Saved Build", build)
+        mod.Builds.Flush()
+
+    return _Run
+
+
+@Register("SkillSaver.Pick")
+def Pick(ctx: Context) -> Callable[[], None]:
+    _NewSkillSaver(ctx, SkillPoints)
+    # Flick through a couple of pages, then search for a build, which is first alphabetically at every size
+    UserFeedback.Responses[:] = ["Next Page >", "Next Page >", "Search...", "Build 9", "Build 9"]
+    return sys.modules["Mods.SkillSaver"].ShareSkillTree  # type: ignore[no-any-return]
+
+
+@Register("SkillSaver.Export")
+def Export(ctx: Context) -> Callable[[], None]:
+    _NewSkillSaver(ctx, SkillPoints)
+    UserFeedback.Responses[:] = ["All Characters", "Mods/SkillSaver/Export.jsonl"]
+    return sys.modules["Mods.SkillSaver"].ExportSkillTrees  # type: ignore[no-any-return]
+
+
+@Register("SkillSaver.Import")
+def Import(ctx: Context) -> Callable[[], Dict[str, float]]:
+    mod = _NewSkillSaver(ctx, SkillPoints)
+    # Every other build is a copy of one already saved, and every name is already taken
+    layout = Synthetic.SkillLayout("Siren")
+    buildCode = sys.modules["Mods.SkillSaver"].BuildCode
+    with open("Mods/SkillSaver/Import.jsonl", "w") as importFile:
+        for index in range(ctx.Size):
+            grades = layout.RandomGrades(SkillPoints, seed=(100 if index % 2 == 0 else 10000) + index)
+            code = buildCode.Encode(buildCode.Build("Siren", grades))
+            importFile.write(json.dumps({"Class": "Siren", "Name": f"Build {index}", "Build": code}) + "\n")
+
+    def _Run() -> Dict[str, float]:
+        UserFeedback.Responses[:] = ["Mods/SkillSaver/Import.jsonl"]
+        sys.modules["Mods.SkillSaver"].ImportSkillTreeFile()
+        worst = 0.0
+        while mod.Import is not None:
+            start = time.perf_counter()
+            mod.OnTick(None, None, None)
+            worst = max(worst, time.perf_counter() - start)
+        return {"WorstTickMs": worst * 1000}
+
+    return _Run
+
+
+@Register("SkillSaver.Restore.Similar")
+def RestoreSimilar(ctx: Context) -> Callable[[], None]:
+    _NewSkillSaver(ctx, SkillPoints - 5)
+    UserFeedback.Responses[:] = ["Search...", "Similar", "Similar"]
+    return sys.modules["Mods.SkillSaver"].RestoreSkillTree  # type: ignore[no-any-return]
+
+
+@Register("SkillSaver.Restore.Different")
+def RestoreDifferent(ctx: Context) -> Callable[[], None]:
+    _NewSkillSaver(ctx, SkillPoints)
+    UserFeedback.Responses[:] = ["Search...", "Different", "Different"]
+    return sys.modules["Mods.SkillSaver"].RestoreSkillTree  # type: ignore[no-any-return]
+
+
+def Measure(name: str, ctx: Context, repeat: int) -> Result:
+    bench = Benchmarks[name]
+    times: List[float] = []
+    calls: Dict[str, int] = {}
+    extra: Dict[str, float] = {}
+    for _ in range(repeat):
+        run = bench(ctx)
+        gc.collect()
+        unrealsdk.Calls.clear()
+        start = time.perf_counter()
+        extra = run() or {}
+        times += [time.perf_counter() - start]
+        calls = dict(unrealsdk.Calls)
+
+    # One last run just for the allocation numbers, tracemalloc slows everything down too much to time it
+    run = bench(ctx)
+    gc.collect()
+    tracemalloc.start()
+    blocks = sys.getallocatedblocks()
+    run()
+    blocks = sys.getallocatedblocks() - blocks
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return Result(name, ctx.Size, times, blocks, peak / 1024, calls, extra)
+
+
+def FormatResult(result: Result, baseline: Optional[Dict[str, Any]]) -> str:
+    calls = ", ".join(f"{x}={y}" for x, y in sorted(result.Calls.items()) if x != "Log")
+    extra = ", ".join(f"{x}={y:.2f}" for x, y in result.Extra.items())
+    line = (
+        f"{result.Name:<30}{result.Size:>7}{result.Best * 1000:>12.2f}{result.Median * 1000:>12.2f}"
+        f"{result.Blocks:>10}{result.PeakKiB:>12.1f}"
+    )
+    if baseline is not None:
+        line += f"{result.Best / baseline['Best']:>8.2f}x"
+    return line + f"  {calls}" + (f"  {extra}" if extra else "")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Runs the CustomSkins and SkillSaver benchmarks headless")
+    parser.add_argument("--sizes", default="10,1000,10000", help="Comma separated sizes to run each benchmark at")
+    parser.add_argument("--repeat", type=int, default=3, help="How many timed runs to do of each benchmark")
+    parser.add_argument("--only", default="", help="Only run benchmarks with this in their name")
+    parser.add_argument(
+        "--latency", nargs="*", default=[], metavar="CALL=SECONDS", help="How long a fake engine call takes"
+    )
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--compare", help="A previous --json file to compare the results against")
+    parser.add_argument("--verbose", action="store_true", help="Print everything the mods log")
+    args = parser.parse_args()
+
+    for latency in args.latency:
+        callName, seconds = latency.split("=")
+        unrealsdk.Latency[callName] = float(seconds)
+    unrealsdk.Verbose = args.verbose
+
+    baselines: Dict[str, Dict[str, Any]] = {}
+    if args.compare:
+        with open(args.compare) as file:
+            baselines = {f"{x['Name']}@{x['Size']}": x for x in json.load(file)["Results"]}
+
+    print(f"Python {platform.python_version()} on {platform.platform()}")
+    print(f"{'Benchmark':<30}{'Size':>7}{'Best ms':>12}{'Median ms':>12}{'Blocks':>10}{'Peak KiB':>12}")
+
+    results: List[Result] = []
+    root = tempfile.mkdtemp(prefix="SDKModBench")
+    try:
+        for size in (int(x) for x in args.sizes.split(",")):
+            ctx = Context(root, size)
+            for name in Benchmarks:
+                if args.only not in name:
+                    continue
+                result = Measure(name, ctx, args.repeat)
+                results += [result]
+                print(FormatResult(result, baselines.get(f"{name}@{size}")), flush=True)
+    finally:
+        os.chdir(RepoDir)
+        for instance in _Instances.values():
+            if getattr(instance, "Tasks", None) is not None and instance.Tasks.Pool is not None:
+                instance.Tasks.Pool.shutdown()
+        shutil.rmtree(root, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(
+                {
+                    "Python": platform.python_version(),
+                    "Platform": platform.platform(),
+                    "Latency": unrealsdk.Latency,
+                    "Results": [
+                        dict(result._asdict(), Best=result.Best, Median=result.Median) for result in results
+                    ],
+                },
+                file,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+Generates synthetic skin libraries and skill trees for the benchmarks.
+Everything is seeded, so the same arguments always produce exactly the same files and builds.
+"""
+
+import os
+import random
+from xml.sax.saxutils import escape
+from typing import Dict, List, Tuple
+
+import unrealsdk
+
+# The character folders CustomSkins supports, along with the class names their packages use
+SkinCharacters: Dict[str, str] = {
+    "Zer0": "Assassin",
+    "Maya": "Siren",
+    "Salvador": "Mercenary",
+    "Krieg": "Psycho",
+    "Gaige": "Mechro",
+    "Axton": "Soldier",
+}
+
+# How many customization packages each class has, and how many materials are in each
+PackagesPerClass: int = 8
+MaterialsPerPackage: int = 6
+
+_Textures: List[str] = [
+    "Char_Siren.Texture.SirenBody_Dif",
+    "Char_Siren.Texture.SirenBody_Nrm",
+    "Common_GunMaterials.Env.GlossyC",
+    "FX_Shared_Tech.Textures.Tex_Shield_Hex_Pattern_Diff",
+]
+
+
+def _Guid(rng: random.Random) -> Tuple[int, int, int, int]:
+    return tuple(rng.randint(-(2**31), 2**31 - 1) for _ in range(4))  # type: ignore[return-value]
+
+
+def _GuidText(guid: Tuple[int, int, int, int]) -> str:
+    return f"(A={guid[0]},B={guid[1]},C={guid[2]},D={guid[3]})"
+
+
+def GetPackageName(className: str, index: int) -> str:
+    # The first package of every class stands in for the always loaded main game one
+    return f"CD_{className}_MainGame" if index == 0 else f"CD_{className}_Skin_Pack{index}"
+
+
+def GetMaterials(className: str) -> List[Tuple[str, str]]:
+    """Returns every (material name, package name) for a class"""
+    materials = []
+    for packageIndex in range(PackagesPerClass):
+        package = GetPackageName(className, packageIndex)
+        for index in range(MaterialsPerPackage):
+            materials += [(f"{package}.Mati_Skin{packageIndex}_{index}", package)]
+    return materials
+
+
+def _MaterialGuids(material: str) -> Dict[str, Tuple[int, int, int, int]]:
+    # The same parameter on the same material always has the same guid, as they would in game
+    rng = random.Random(material)
+    return {name: _Guid(rng) for name in ("p_Color", "p_Glow", "p_Diffuse", "p_Pattern", "p_Reflect")}
+
+
+def RegisterMaterials(gameDir: str) -> None:
+    """
+    Adds every material to the fake engine, and creates the (empty) package files CustomSkins looks for.
+    `gameDir` is the root of the fake game folder, the one containing `Binaries` and `WillowGame`.
+    """
+    packageDir = os.path.join(gameDir, "WillowGame", "CookedPCConsole")
+    os.makedirs(packageDir, exist_ok=True)
+    for className in SkinCharacters.values():
+        unrealsdk.StartupPackages.add(GetPackageName(className, 0))
+        for packageIndex in range(PackagesPerClass):
+            open(os.path.join(packageDir, GetPackageName(className, packageIndex) + ".upk"), "w").close()
+
+        for material, package in GetMaterials(className):
+            unrealsdk.RegisterObject(material, lambda x=material: _MakeMaterial(x), package)  # type: ignore[misc]
+
+
+def _MakeMaterial(material: str) -> unrealsdk.MaterialInstanceConstant:
+    guids = _MaterialGuids(material)
+    obj = unrealsdk.MaterialInstanceConstant(material)
+    texture = unrealsdk.UObject("Texture2D", _Textures[0])
+    obj.VectorParameterValues = [
+        ("p_Color", (1.0, 1.0, 1.0, 1.0), guids["p_Color"]),
+        ("p_Glow", (0.0, 0.0, 0.0, 1.0), guids["p_Glow"]),
+    ]
+    obj.TextureParameterValues = [
+        ("p_Diffuse", texture, guids["p_Diffuse"]),
+        ("p_Pattern", texture, guids["p_Pattern"]),
+    ]
+    obj.ScalarParameterValues = [("p_Reflect", 0.5, guids["p_Reflect"])]
+    return obj
+
+
+def _SkinStatements(rng: random.Random, className: str) -> List[str]:
+    materials = GetMaterials(className)
+    statements = []
+    for material, _ in rng.sample(materials, 2):
+        guids = _MaterialGuids(material)
+        color = ",".join(f"{x}={rng.random():.4f}" for x in "RGBA")
+        glow = ",".join(f"{x}={rng.random() * 4:.4f}" for x in "RGBA")
+        statements += [
+            f"set {material} VectorParameterValues ("
+            f'(ParameterName="p_Color",ParameterValue=({color}),ExpressionGUID={_GuidText(guids["p_Color"])}),'
+            f'(ParameterName="p_Glow",ParameterValue=({glow}),ExpressionGUID={_GuidText(guids["p_Glow"])}))',
+            f"set {material} TextureParameterValues ("
+            f"(ParameterName=\"p_Pattern\",ParameterValue=Texture2D'{rng.choice(_Textures)}',"
+            f'ExpressionGUID={_GuidText(guids["p_Pattern"])}))',
+            f"set {material} ScalarParameterValues ("
+            f'(ParameterName="p_Reflect",ParameterValue={rng.random():.4f},'
+            f'ExpressionGUID={_GuidText(guids["p_Reflect"])}))',
+        ]
+    return statements
+
+
+def _FormatBLCMM(statements: List[str]) -> str:
+    lines = [
+        '<BLCMM v="1">',
+        "#<!!!You opened a file saved with BLCMM in FilterTool. Please update to BLCMM to properly open this file!!!>",
+        "\t<head>",
+        '\t\t<type name="BL2" offline="false"/>',
+        "\t\t<profiles>",
+        '\t\t\t<profile name="default" current="true"/>',
+        "\t\t</profiles>",
+        "\t</head>",
+        "\t<body>",
+        '\t\t<category name="root">',
+    ]
+    lines += [f'\t\t\t<code profiles="default">{escape(x)}</code>' for x in statements]
+    lines += ["\t\t</category>", "\t</body>", "</BLCMM>", "", "#Commands:"]
+    lines += statements
+    return "\n".join(lines) + "\n"
+
+
+def WriteSkinLibrary(skinsDir: str, count: int, seed: int = 0) -> List[str]:
+    """
+    Writes `count` skin files spread evenly over every character, half BLCMM and half plain text.
+    Every 50th file has no statements in it, so gets rejected as an invalid skin.
+    Returns the paths of all of the written files.
+    """
+    rng = random.Random(seed)
+    characters = list(SkinCharacters)
+    skinFiles = []
+    for index in range(count):
+        character = characters[index % len(characters)]
+        os.makedirs(os.path.join(skinsDir, character), exist_ok=True)
+
+        statements = [] if index % 50 == 49 else _SkinStatements(rng, SkinCharacters[character])
+        if index % 2 == 0:
+            path, text = os.path.join(skinsDir, character, f"Skin {index}.blcm"), _FormatBLCMM(statements)
+        else:
+            path, text = os.path.join(skinsDir, character, f"Skin {index}.txt"), "\n".join(statements) + "\n"
+        with open(path, "w", encoding="utf-8") as skinFile:
+            skinFile.write(text)
+        skinFiles += [path]
+    return skinFiles
+
+
+def ModifySkinFile(skinFile: str, seed: int) -> None:
+    """Rewrites a skin file with different values, keeping its format and character"""
+    rng = random.Random(seed)
+    className = SkinCharacters[os.path.basename(os.path.dirname(skinFile))]
+    statements = _SkinStatements(rng, className)
+    text = _FormatBLCMM(statements) if skinFile.endswith(".blcm") else "\n".join(statements) + "\n"
+    with open(skinFile, "w", encoding="utf-8") as openF:
+        openF.write(text)
+
+
+def WriteBrokenSkinFile(skinFile: str, seed: int = 0) -> None:
+    """Writes a plain text skin file which also sets a material that doesn't exist in any package"""
+    rng = random.Random(seed)
+    className = SkinCharacters[os.path.basename(os.path.dirname(skinFile))]
+    statements = _SkinStatements(rng, className)
+    statements += [
+        f"set CD_{className}_Skin_Pack1.Mati_Typo ScalarParameterValues "
+        '((ParameterName="p_Reflect",ParameterValue=0.25,ExpressionGUID=(A=0,B=0,C=0,D=0)))'
+    ]
+    with open(skinFile, "w", encoding="utf-8") as openF:
+        openF.write("\n".join(statements) + "\n")
+
+
+# The BL2 classes SkillSaver knows about, with the indexes of the hidden skills in their skill trees
+SkillClasses: Dict[str, List[int]] = {
+    "Mercenary": [],
+    "Soldier": [],
+    "Assassin": [],
+    "Siren": [],
+    "Mechromancer": [24],
+    "Psycho": [13, 37, 38],
+}
+
+# How many skills are in each tier of a branch, and the max grade of skills in that tier
+Tiers: List[Tuple[int, int]] = [(2, 5), (3, 5), (2, 5), (3, 5), (2, 5), (1, 1)]
+Branches: int = 3
+# How many points must be spent in a branch to unlock each tier after the first
+PointsPerTier: int = 5
+
+
+class SkillLayout:
+    """The skills of a class, in the same order as `PlayerSkillTree.Skills`"""
+
+    def __init__(self, CharacterClass: str) -> None:
+        self.CharacterClass: str = CharacterClass
+        self.Definitions: List[unrealsdk.UObject] = []
+        # (Branch, Tier) of each skill, hidden skills and the action skill are (-1, -1)
+        self.Positions: List[Tuple[int, int]] = []
+
+        def _Add(name: str, maxGrade: int, position: Tuple[int, int]) -> None:
+            while len(self.Definitions) in SkillClasses[CharacterClass]:
+                hiddenName = f"GD_{CharacterClass}_Skills.Hidden.Skill{len(self.Definitions)}"
+                hidden = unrealsdk.UObject("SkillDefinition", hiddenName)
+                hidden.MaxGrade = 5  # type: ignore[attr-defined]
+                self.Definitions += [hidden]
+                self.Positions += [(-1, -1)]
+            definition = unrealsdk.UObject("SkillDefinition", f"GD_{CharacterClass}_Skills.{name}")
+            definition.MaxGrade = maxGrade  # type: ignore[attr-defined]
+            self.Definitions += [definition]
+            self.Positions += [position]
+
+        _Add("ActionSkill", 1, (-1, -1))
+        for branch in range(Branches):
+            for tier, (skillCount, maxGrade) in enumerate(Tiers):
+                for skill in range(skillCount):
+                    _Add(f"Branch{branch}.Tier{tier}_{skill}", maxGrade, (branch, tier))
+        while len(self.Definitions) in SkillClasses[CharacterClass]:
+            _Add(f"Hidden{len(self.Definitions)}", 5, (-1, -1))
+
+    def MakeSkillTree(self, grades: List[int]) -> unrealsdk.PlayerSkillTree:
+        skills = [
+            unrealsdk.SkillState(Definition=definition, Grade=grade, Index=index)
+            for index, (definition, grade) in enumerate(zip(self.Definitions, grades))
+        ]
+        return unrealsdk.PlayerSkillTree(skills, self.MakeBranches())
+
+    def MakeBranches(self) -> List[unrealsdk.FStruct]:
+        """Builds the branch definitions of the tree, hidden skills aren't in any of them, like they are in game"""
+        # The root branch only holds the action skill
+        root = unrealsdk.UObject("SkillTreeBranchDefinition", f"GD_{self.CharacterClass}_Skills.Root")
+        root.Tiers = [unrealsdk.FStruct(Skills=[self.Definitions[0]], PointsToUnlockNextTier=0)]  # type: ignore
+        branches = [unrealsdk.FStruct(Definition=root)]
+        for branch in range(Branches):
+            branchName = f"GD_{self.CharacterClass}_Skills.Branch{branch}"
+            definition = unrealsdk.UObject("SkillTreeBranchDefinition", branchName)
+            definition.Tiers = [  # type: ignore[attr-defined]
+                unrealsdk.FStruct(
+                    Skills=[x for x, position in zip(self.Definitions, self.Positions) if position == (branch, tier)],
+                    PointsToUnlockNextTier=PointsPerTier,
+                )
+                for tier in range(len(Tiers))
+            ]
+            branches += [unrealsdk.FStruct(Definition=definition)]
+        return branches
+
+    def RandomGrades(self, points: int, seed: int) -> List[int]:
+        """Returns the grades of a random, valid build with the given number of points spent (at most)"""
+        rng = random.Random(seed)
+        grades = [0] * len(self.Definitions)
+        # The action skill comes first
+        grades[self.Positions.index((-1, -1))] = 1
+        points -= 1
+        branchPoints = [0] * Branches
+        while points > 0:
+            choices = [
+                index
+                for index, (branch, tier) in enumerate(self.Positions)
+                if branch >= 0
+                and branchPoints[branch] >= tier * PointsPerTier
+                and grades[index] < self.Definitions[index].MaxGrade  # type: ignore[attr-defined]
+            ]
+            if not choices:
+                break
+            index = rng.choice(choices)
+            grades[index] += 1
+            branchPoints[self.Positions[index][0]] += 1
+            points -= 1
+        return grades
+
+    def ToBuild(self, grades: List[int]) -> str:
+        """Converts grades into a SkillSaver build string, which skips the hidden skills"""
+        return "".join(str(x) for index, x in enumerate(grades) if index not in SkillClasses[self.CharacterClass])
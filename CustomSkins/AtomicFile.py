@@ -0,0 +1,26 @@
+import os
+from contextlib import contextmanager
+from typing import IO, Any, Iterator
+
+
+@contextmanager
+def WriteAtomic(path: str, binary: bool = False) -> Iterator[IO[Any]]:
+    """
+    Opens a temporary file next to `path` for writing, which replaces `path` once the block finishes.
+    A crash or error part way through never leaves a half written file behind, the temporary file gets removed and
+    `path` keeps its old contents. Errors are still raised, it's up to the caller what to do about them.
+    """
+    tempPath = path + ".tmp"
+    try:
+        with open(tempPath, "wb") if binary else open(tempPath, "w", encoding="utf-8") as tempFile:
+            yield tempFile
+            # Make sure it's actually on disk before we swap it in, otherwise a power cut could still leave it empty
+            tempFile.flush()
+            os.fsync(tempFile.fileno())
+        os.replace(tempPath, path)
+    except BaseException:
+        try:
+            os.remove(tempPath)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,111 @@
+import unrealsdk
+from typing import Dict, List, Optional, Set, Tuple
+
+from Mods.CustomSkins import Profiler
+from Mods.CustomSkins.PackageManager import PackageManager
+
+
+class MaterialResolver:
+    """
+    Caches every object lookup skins make, so toggling a skin we've already seen doesn't search the object table.
+    Found objects are kept alive, so they're always safe to reuse.
+    Objects we couldn't find are remembered too, until the next time a package gets loaded, as that might add them.
+    """
+
+    def __init__(self, Packages: PackageManager) -> None:
+        self.Packages: PackageManager = Packages
+        # {"Material Object": UObject}
+        self.Materials: Dict[str, unrealsdk.UObject] = {}
+        # {("Class", "Object"): UObject}, everything else skins reference, such as textures
+        self.Objects: Dict[Tuple[str, str], unrealsdk.UObject] = {}
+        # {("Character", "Material Object")}, as materials only get looked for in their character's packages
+        self.MissingMaterials: Set[Tuple[str, str]] = set()
+        # {("Class", "Object")}
+        self.MissingObjects: Set[Tuple[str, str]] = set()
+        # The package manager's generation when we last checked, if it's changed the misses are out of date
+        self.Generation: int = Packages.Generation
+
+        # Lookups answered from the cache, lookups answered by a cached miss, and lookups which went to the engine
+        self.Hits: int = 0
+        self.MissHits: int = 0
+        self.Searches: int = 0
+        # How many times we've thrown away the misses
+        self.Invalidations: int = 0
+
+    def _CheckGeneration(self) -> None:
+        """Forgets every miss if any packages have been loaded since they were recorded"""
+        if self.Packages.Generation == self.Generation:
+            return
+        self.Generation = self.Packages.Generation
+        self.ClearMisses()
+
+    def ClearMisses(self) -> None:
+        """Forgets every miss, so they all get looked for again"""
+        if self.MissingMaterials or self.MissingObjects:
+            self.Invalidations += 1
+        self.MissingMaterials.clear()
+        self.MissingObjects.clear()
+
+    def ResolveMaterials(self, character: str, materials: List[str]) -> Dict[str, unrealsdk.UObject]:
+        """
+        Finds the given materials, only asking the package manager for the ones we don't already know about, all in a
+        single batch. Returns all of the materials we could find, any which are missing just aren't included.
+        """
+        self._CheckGeneration()
+        found: Dict[str, unrealsdk.UObject] = {}
+        unknown: List[str] = []
+        for matObj in materials:
+            obj = self.Materials.get(matObj)
+            if obj is not None:
+                self.Hits += 1
+                found[matObj] = obj
+            elif (character, matObj) in self.MissingMaterials:
+                self.MissHits += 1
+            else:
+                unknown += [matObj]
+        if not unknown:
+            return found
+
+        self.Searches += len(unknown)
+        newlyFound = self.Packages.FindMaterials(character, unknown)
+        for matObj, obj in newlyFound.items():
+            unrealsdk.KeepAlive(obj)
+            self.Materials[matObj] = obj
+        found.update(newlyFound)
+
+        # Finding them may have loaded packages, which makes any older misses out of date, but not these ones, as
+        # they were still missing after those packages were loaded
+        self._CheckGeneration()
+        self.MissingMaterials.update((character, x) for x in unknown if x not in newlyFound)
+        return found
+
+    def FindObject(self, className: str, name: str) -> Optional[unrealsdk.UObject]:
+        """A cached `unrealsdk.FindObject`, for anything other than the materials themselves"""
+        key = (className, name)
+        obj = self.Objects.get(key)
+        if obj is not None:
+            self.Hits += 1
+            return obj
+        self._CheckGeneration()
+        if key in self.MissingObjects:
+            self.MissHits += 1
+            return None
+
+        self.Searches += 1
+        obj = Profiler.Call("FindObject", unrealsdk.FindObject, className, name)
+        if obj is None:
+            self.MissingObjects.add(key)
+            return None
+        unrealsdk.KeepAlive(obj)
+        self.Objects[key] = obj
+        return obj
+
+    def Summary(self) -> Dict[str, int]:
+        return {
+            "Hits": self.Hits,
+            "MissHits": self.MissHits,
+            "Searches": self.Searches,
+            "Invalidations": self.Invalidations,
+            "CachedObjects": len(self.Materials) + len(self.Objects),
+            "CachedMisses": len(self.MissingMaterials) + len(self.MissingObjects),
+        }
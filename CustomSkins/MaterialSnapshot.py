@@ -0,0 +1,88 @@
+import unrealsdk
+from typing import Any, Dict, Iterable, List, NamedTuple, Tuple
+
+from Mods.CustomSkins import Profiler
+
+# The parameter arrays on a MaterialInstanceConstant which skins modify
+ParameterProperties: Tuple[str, ...] = ("VectorParameterValues", "TextureParameterValues", "ScalarParameterValues")
+
+# The material function which sets a single parameter in each array, adding it if the material doesn't have it yet
+_ParameterSetters: Dict[str, str] = {
+    "VectorParameterValues": "SetVectorParameterValue",
+    "TextureParameterValues": "SetTextureParameterValue",
+    "ScalarParameterValues": "SetScalarParameterValue",
+}
+
+# A single parameter, stored as (ParameterName, ParameterValue, ExpressionGUID)
+# These are plain python values, so they're safe to keep around after the engine's array has been replaced
+Parameter = Tuple[str, Any, Tuple[int, int, int, int]]
+
+
+class MaterialSnapshot(NamedTuple):
+    """A copy of every parameter array on a material, taken before we apply any skins to it"""
+
+    Material: str
+    Object: unrealsdk.UObject
+    # {"VectorParameterValues": [("p_DColor", (R, G, B, A), (A, B, C, D))]}
+    Parameters: Dict[str, List[Parameter]]
+
+
+def _ReadParameter(propName: str, entry: Any) -> Parameter:
+    guid = entry.ExpressionGUID
+    value = entry.ParameterValue
+    if propName == "VectorParameterValues":
+        value = (value.R, value.G, value.B, value.A)
+    return (str(entry.ParameterName), value, (guid.A, guid.B, guid.C, guid.D))
+
+
+def TakeSnapshot(matObj: str, obj: unrealsdk.UObject) -> MaterialSnapshot:
+    """Copies all of the parameter arrays off of the given material"""
+    parameters: Dict[str, List[Parameter]] = {}
+    with Profiler.Time("TakeSnapshot"):
+        for propName in ParameterProperties:
+            parameters[propName] = [_ReadParameter(propName, x) for x in getattr(obj, propName)]
+    return MaterialSnapshot(matObj, obj, parameters)
+
+
+def FormatParameter(propName: str, parameter: Parameter) -> str:
+    """Formats a parameter as a UE3 struct string, for use in a `set` command"""
+    name, value, guid = parameter
+    if propName == "VectorParameterValues":
+        valueText = f"(R={value[0]},G={value[1]},B={value[2]},A={value[3]})"
+    elif propName == "TextureParameterValues":
+        # Quote the full path name, so names with odd characters in them can't break the command
+        valueText = "None" if value is None else f"{value.Class.Name}'{value.PathName(value)}'"
+    else:
+        valueText = str(value)
+    guidText = f"(A={guid[0]},B={guid[1]},C={guid[2]},D={guid[3]})"
+    return f'(ParameterName="{name}",ParameterValue={valueText},ExpressionGUID={guidText})'
+
+
+def SetParameters(matObj: str, obj: unrealsdk.UObject, parameters: Dict[str, List[Parameter]]) -> None:
+    """
+    Replaces every parameter array on a material, through the material's own functions if we can, otherwise through a
+    `set` command per array.
+    """
+    # Assigning the arrays directly would only change the property, the material's render resources would never hear
+    # about it so nothing would change on screen. The material's own functions update them as they go, the same as
+    # `set` does through PostEditChange, just without the console having to parse the whole array.
+    try:
+        with Profiler.Time("SetParameterValues"):
+            obj.ClearParameterValues()
+            for propName in ParameterProperties:
+                setter = getattr(obj, _ParameterSetters[propName])
+                for name, value, _ in parameters[propName]:
+                    setter(name, value)
+        return
+    except Exception:
+        pass
+    for propName in ParameterProperties:
+        val = "(" + ",".join(FormatParameter(propName, x) for x in parameters[propName]) + ")"
+        with Profiler.Time("ConsoleCommand"):
+            unrealsdk.GetEngine().GamePlayers[0].Actor.ConsoleCommand(f"set {matObj} {propName} {val}", False)
+
+
+def RestoreSnapshots(snapshots: Iterable[MaterialSnapshot]) -> None:
+    """Restores every given snapshot back onto its material in one pass"""
+    for snapshot in snapshots:
+        SetParameters(snapshot.Material, snapshot.Object, snapshot.Parameters)
@@ -0,0 +1,163 @@
+import unrealsdk
+import os
+import re
+import json
+from glob import glob
+from typing import Dict, List, Optional, Set
+
+from Mods.CustomSkins import Profiler
+from Mods.CustomSkins.AtomicFile import WriteAtomic
+
+# Maps the character folder names onto the class names used in their customization packages
+CharactersToClassName: Dict[str, str] = {
+    "Zer0": "Assassin",
+    "Maya": "Siren",
+    "Salvador": "Mercenary",
+    "Krieg": "Psycho",
+    "Gaige": "Mechro",
+    "Axton": "Soldier",
+    "Runner": "Runner",
+    "Technical": "BanditTech",
+}
+
+# Name fragments which show up in pretty much every material, so they don't help pick out a package
+_CommonTokens: Set[str] = {"cd", "skins", "skin", "heads", "head", "materials", "mati", "body"}
+
+
+class PackageManager:
+    """
+    Keeps track of which customization packages have been loaded, and which package provides each material.
+    Packages are only loaded when an enabled skin actually needs a material from them.
+    """
+
+    def __init__(self, IndexPath: str) -> None:
+        self.IndexPath: str = IndexPath
+        # All of the packages we've called `LoadPackage` on, which may have since been garbage collected
+        self.Loaded: Set[str] = set()
+        # {"Material Object": "Package Name"}, saved to disk as it's learned
+        self.MaterialPackages: Dict[str, str] = {}
+        # {"Class Name": ["Package Name"]}, so we only glob the game's folders once per class
+        self.Candidates: Dict[str, List[str]] = {}
+        self.Dirty: bool = False
+        # Goes up every time we load a package, so anything caching what it couldn't find knows when to look again
+        self.Generation: int = 0
+        self.Load()
+
+    def Load(self) -> None:
+        """Loads the material to package index from disk"""
+        if not os.path.exists(self.IndexPath):
+            return
+        try:
+            with open(self.IndexPath, "r", encoding="utf-8") as indexFile:
+                data = json.load(indexFile)
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict):
+            self.MaterialPackages = data
+
+    def Save(self) -> None:
+        """Saves the material to package index if we've learned anything new"""
+        if not self.Dirty:
+            return
+        try:
+            with WriteAtomic(self.IndexPath) as indexFile:
+                json.dump(self.MaterialPackages, indexFile)
+        except OSError:
+            return
+        self.Dirty = False
+
+    def GetCandidates(self, character: str) -> List[str]:
+        """Returns the names of all of the customization packages which could contain the character's skins"""
+        className = CharactersToClassName.get(character)
+        if className is None:
+            return []
+        if className not in self.Candidates:
+            packages = glob(f"../../WillowGame/CookedPCConsole/CD_{className}_*.upk")
+            packages += glob(f"../../DLC/*/Compat/Content/CD_{className}_*.upk")
+            self.Candidates[className] = [os.path.splitext(os.path.basename(x))[0] for x in packages]
+        return self.Candidates[className]
+
+    def IsLoaded(self, packageName: str) -> bool:
+        """
+        Checks if we've loaded a package and it's still around.
+        Once nothing keeps its objects alive the engine can garbage collect it, in which case it has to be loaded again.
+        """
+        if packageName not in self.Loaded:
+            return False
+        if Profiler.Call("FindObject", unrealsdk.FindObject, "Package", packageName) is not None:
+            return True
+        self.Loaded.discard(packageName)
+        return False
+
+    def LoadPackage(self, packageName: str, force: bool = False) -> bool:
+        """Loads a package unless it's already loaded, returns if we actually loaded anything"""
+        if not force and self.IsLoaded(packageName):
+            return False
+        # unrealsdk.Log(f"    [CustomSkins] -- Loading Package: {packageName}")
+        with Profiler.Time("LoadPackage"):
+            unrealsdk.LoadPackage(packageName)
+        self.Loaded.add(packageName)
+        self.Generation += 1
+        return True
+
+    @staticmethod
+    def _Tokens(name: str) -> Set[str]:
+        return {x for x in re.split(r"[._]", name.lower()) if x and x not in _CommonTokens}
+
+    def _RankCandidates(self, character: str, materials: List[str], collected: bool = False) -> List[str]:
+        """
+        Orders the unloaded candidate packages by how many name fragments they share with the materials.
+        If `collected` is set, only packages we loaded which have since been garbage collected are included.
+        """
+        tokens: Set[str] = set()
+        for matObj in materials:
+            tokens |= self._Tokens(matObj)
+        if collected:
+            candidates = [x for x in self.GetCandidates(character) if x in self.Loaded and not self.IsLoaded(x)]
+        else:
+            candidates = [x for x in self.GetCandidates(character) if x not in self.Loaded]
+        return sorted(candidates, key=lambda x: len(self._Tokens(x) & tokens), reverse=True)
+
+    def FindMaterials(self, character: str, materials: List[str]) -> Dict[str, unrealsdk.UObject]:
+        """
+        Finds the given materials, loading only as many packages as we need to in order to find them.
+        Returns all of the materials we could find, any which are missing just aren't included.
+        """
+        found: Dict[str, unrealsdk.UObject] = {}
+        missing: List[str] = []
+
+        def _Find(matObj: str) -> Optional[unrealsdk.UObject]:
+            obj = Profiler.Call("FindObject", unrealsdk.FindObject, "MaterialInstanceConstant", matObj)
+            if obj is not None:
+                found[matObj] = obj
+            return obj
+
+        for matObj in materials:
+            if _Find(matObj) is not None:
+                continue
+            # If we know where it lives then just (re)load that package, it may have been garbage collected
+            knownPackage = self.MaterialPackages.get(matObj)
+            if knownPackage is not None:
+                self.LoadPackage(knownPackage, force=True)
+                if _Find(matObj) is not None:
+                    continue
+            missing += [matObj]
+
+        # Fall back to loading candidate packages one at a time, best guess first, until we've found everything
+        # Only if that doesn't find them all do we check if any we've already loaded have been garbage collected since
+        for collected in (False, True):
+            candidates = self._RankCandidates(character, missing, collected) if missing else []
+            for packageName in candidates:
+                unrealsdk.Log(f"    [CustomSkins] Unable to find object, trying package {packageName}...")
+                self.LoadPackage(packageName)
+                for matObj in list(missing):
+                    if _Find(matObj) is None:
+                        continue
+                    missing.remove(matObj)
+                    self.MaterialPackages[matObj] = packageName
+                    self.Dirty = True
+                if not missing:
+                    break
+
+        self.Save()
+        return found
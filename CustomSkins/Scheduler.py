@@ -0,0 +1,90 @@
+import unrealsdk
+import time
+import traceback
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Generator, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class Scheduler:
+    """
+    Runs generator based tasks a few steps at a time, spread over as many engine ticks as it takes.
+    Each call to `Run` stops as soon as it's used up its time budget, so the game never hitches on a big task.
+    Tasks run one after the other in the order they were added, so later tasks can rely on earlier ones finishing.
+
+    Anything which doesn't touch UObjects (file reading, parsing) can be handed off to a worker thread with
+    `RunInWorker`, the task then just waits on it without eating into the frame's budget.
+    """
+
+    def __init__(self, Budget: float = 0.004, Workers: int = 2) -> None:
+        # How many seconds of work we're allowed to do each time we're run
+        self.Budget: float = Budget
+        self.Workers: int = Workers
+        self.Tasks: Deque[Iterator[Any]] = deque()
+        self.Pool: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def Busy(self) -> bool:
+        return len(self.Tasks) > 0
+
+    def Add(self, task: Iterator[Any]) -> None:
+        self.Tasks.append(task)
+
+    def Clear(self) -> None:
+        """Drops every queued task, any work already handed off to a worker thread is just left to finish"""
+        for task in self.Tasks:
+            close = getattr(task, "close", None)
+            if close is not None:
+                close()
+        self.Tasks.clear()
+
+    def Step(self) -> Any:
+        """Runs the current task by a single step, returning whatever it yielded"""
+        try:
+            return next(self.Tasks[0])
+        except StopIteration:
+            self.Tasks.popleft()
+        except Exception:
+            # Don't let one broken task take the rest of the queue down with it
+            unrealsdk.Log(traceback.format_exc())
+            self.Tasks.popleft()
+        return None
+
+    def Run(self) -> None:
+        """Runs queued tasks until we've either run out of tasks, or out of time for this frame"""
+        start = time.perf_counter()
+        while self.Tasks:
+            result = self.Step()
+            # Nothing more we can do this frame if we're just waiting on a worker
+            if isinstance(result, Future) and not result.done():
+                break
+            if time.perf_counter() - start >= self.Budget:
+                break
+
+    def RunAll(self) -> None:
+        """Runs every queued task to completion right now, blocking on worker threads if need be"""
+        while self.Tasks:
+            result = self.Step()
+            if isinstance(result, Future):
+                result.exception()
+
+    def Submit(self, function: Callable[..., T], *args: Any) -> "Future[T]":
+        """
+        Starts running a function on a worker thread, outside of any task.
+        The function must not touch any UObjects, it's only safe to do that on the game thread.
+        """
+        if self.Pool is None:
+            self.Pool = ThreadPoolExecutor(max_workers=self.Workers)
+        return self.Pool.submit(function, *args)
+
+    def RunInWorker(self, function: Callable[..., T], *args: Any) -> Generator[Any, None, T]:
+        """
+        Runs a function on a worker thread, for use with `yield from` inside a task.
+        The function must not touch any UObjects, it's only safe to do that on the game thread.
+        """
+        future = self.Submit(function, *args)
+        while not future.done():
+            yield future
+        return future.result()
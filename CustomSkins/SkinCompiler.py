@@ -0,0 +1,270 @@
+import unrealsdk
+import os
+import re
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from Mods.CustomSkins import Profiler
+from Mods.CustomSkins.MaterialSnapshot import ParameterProperties
+from Mods.CustomSkins.SkinParser import ParsedStatement, ParseSkinFile
+
+if TYPE_CHECKING:
+    from Mods.CustomSkins.SkinPack import SkinPack
+
+
+class ObjectReference(NamedTuple):
+    """A parsed `Class'Package.Object'` reference, resolved to a UObject only when the plan is applied"""
+
+    Class: str
+    Name: str
+
+
+class SkinStatement(NamedTuple):
+    """A single compiled `set` statement"""
+
+    Object: str
+    Property: str
+    # The parsed value, structs are dicts, arrays are lists and object references are `ObjectReference`s
+    Value: Any
+    # The original text of the value, used as a fallback if we can't apply the parsed value directly
+    # This may be empty if the plan was loaded from a skin pack, in which case it's rebuilt from the value
+    Raw: str
+
+
+class SkinPlan(NamedTuple):
+    """Every statement in a skin file, along with the size and mtime of the file it was compiled from"""
+
+    Size: int
+    MTime: int
+    Statements: List[SkinStatement]
+    Materials: List[str]
+
+
+_KeyPattern = re.compile(r"\s*([A-Za-z_][A-Za-z0-9_]*(?:\[\d+\])?)\s*=")
+_ObjectPattern = re.compile(r"^([A-Za-z_][A-Za-z0-9_]*)'(.*)'$")
+_IntPattern = re.compile(r"^[-+]?\d+$")
+_FloatPattern = re.compile(r"^[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?$")
+
+
+def ParseScalar(token: str) -> Any:
+    """Parses a single non-struct UE3 value"""
+    token = token.strip()
+    if len(token) >= 2 and token[0] == '"' and token[-1] == '"':
+        return token[1:-1]
+    match = _ObjectPattern.match(token)
+    if match is not None:
+        return ObjectReference(match.group(1), match.group(2))
+    if _IntPattern.match(token):
+        return int(token)
+    if _FloatPattern.match(token):
+        return float(token)
+    return token
+
+
+def _SkipWhitespace(text: str, pos: int) -> int:
+    while pos < len(text) and text[pos].isspace():
+        pos += 1
+    return pos
+
+
+def _ParseAtom(text: str, pos: int) -> Tuple[Any, int]:
+    """Parses a value up until the next `,` or `)`, while skipping over anything quoted"""
+    start = pos
+    quote = ""
+    while pos < len(text):
+        char = text[pos]
+        if quote:
+            if char == quote:
+                quote = ""
+        elif char in "\"'":
+            quote = char
+        elif char in ",)":
+            break
+        pos += 1
+    return ParseScalar(text[start:pos]), pos
+
+
+def _ParseGroup(text: str, pos: int) -> Tuple[Any, int]:
+    """Parses a `(...)` group starting at `pos`, which is either a struct (dict) or an array (list)"""
+    pos += 1
+    fields: Dict[str, Any] = {}
+    items: List[Any] = []
+    while True:
+        pos = _SkipWhitespace(text, pos)
+        if pos >= len(text):
+            raise ValueError("Unterminated group")
+        if text[pos] == ")":
+            return (fields if fields else items), pos + 1
+
+        key = None
+        match = _KeyPattern.match(text, pos)
+        if match is not None:
+            key = match.group(1)
+            pos = _SkipWhitespace(text, match.end())
+
+        if pos < len(text) and text[pos] == "(":
+            value, pos = _ParseGroup(text, pos)
+        else:
+            value, pos = _ParseAtom(text, pos)
+
+        if key is None:
+            if fields:
+                raise ValueError("Mixed struct and array values")
+            items += [value]
+        else:
+            if items:
+                raise ValueError("Mixed struct and array values")
+            fields[key] = value
+
+        pos = _SkipWhitespace(text, pos)
+        if pos < len(text) and text[pos] == ",":
+            pos += 1
+
+
+def ParseValue(text: str) -> Any:
+    """Parses the value of a `set` statement into python objects"""
+    text = text.strip()
+    if not text.startswith("("):
+        return ParseScalar(text)
+    value, pos = _ParseGroup(text, 0)
+    if _SkipWhitespace(text, pos) != len(text):
+        raise ValueError("Trailing text after value")
+    return value
+
+
+def CompileStatements(parsed: Iterable[ParsedStatement]) -> Tuple[List[SkinStatement], List[str]]:
+    """Compiles parsed `set` statements, returning the compiled statements and the `CD_` materials they touch"""
+    statements: List[SkinStatement] = []
+    materials: List[str] = []
+    for parsedStatement in parsed:
+        # Hotfixes only ever get applied on level load, which the menu never does
+        if parsedStatement.Hotfix:
+            continue
+        try:
+            value = ParseValue(parsedStatement.Raw)
+        except ValueError:
+            # Leave it as the raw text, it'll just go through the console instead
+            value = None
+        statements += [SkinStatement(parsedStatement.Object, parsedStatement.Property, value, parsedStatement.Raw)]
+        if parsedStatement.Object.startswith("CD_") and parsedStatement.Object not in materials:
+            materials += [parsedStatement.Object]
+    return statements, materials
+
+
+class SkinCompiler:
+    """
+    Compiles skin files into `SkinPlan`s, and caches them for as long as the file doesn't change.
+    Plans are taken from the precompiled skin pack instead whenever it has an up to date one.
+    """
+
+    def __init__(self) -> None:
+        self.Plans: Dict[str, SkinPlan] = {}
+        self.Pack: Optional["SkinPack"] = None
+
+    def GetPlan(self, skinFile: str, entry: Optional[Dict[str, Any]] = None) -> Optional[SkinPlan]:
+        """
+        Returns the compiled plan for the given skin file.
+        If the file's index entry is passed we trust its size and mtime instead of touching the disk at all.
+        """
+        if entry is None:
+            try:
+                stat = os.stat(skinFile)
+            except OSError:
+                return None
+            size, mtime = stat.st_size, stat.st_mtime_ns
+        else:
+            size, mtime = entry["Size"], entry["MTime"]
+
+        plan = self.Plans.get(skinFile)
+        if plan is not None and plan.Size == size and plan.MTime == mtime:
+            return plan
+
+        plan = None if self.Pack is None else self.Pack.GetPlan(skinFile, size, mtime)
+        if plan is not None:
+            self.Plans[skinFile] = plan
+            return plan
+
+        try:
+            with Profiler.Time("CompileSkinFile"):
+                statements, materials = CompileStatements(ParseSkinFile(skinFile))
+        except (OSError, UnicodeDecodeError):
+            return None
+
+        plan = SkinPlan(size, mtime, statements, materials)
+        self.Plans[skinFile] = plan
+        return plan
+
+    def Forget(self, skinFile: str) -> None:
+        """Drops the cached plan for the given skin file"""
+        self.Plans.pop(skinFile, None)
+
+
+def _FindObject(className: str, name: str) -> Optional[unrealsdk.UObject]:
+    return Profiler.Call("FindObject", unrealsdk.FindObject, className, name)
+
+
+def ToEngineValue(value: Any, findObject: Callable[[str, str], Optional[unrealsdk.UObject]] = _FindObject) -> Any:
+    """
+    Converts a parsed value into something that can be directly assigned to a UObject's property.
+    Object references get looked up through `findObject`, which can be swapped out for a cached version.
+    """
+    if isinstance(value, ObjectReference):
+        return findObject(value.Class, value.Name)
+    if isinstance(value, dict):
+        # Structs are set via tuples of their fields, which are always written in declaration order
+        return tuple(ToEngineValue(x, findObject) for x in value.values())
+    if isinstance(value, list):
+        return [ToEngineValue(x, findObject) for x in value]
+    return value
+
+
+def FormatValue(value: Any, nested: bool = False) -> str:
+    """Turns a parsed value back into UE3 text, the opposite of `ParseValue`"""
+    if isinstance(value, ObjectReference):
+        return f"{value.Class}'{value.Name}'"
+    if isinstance(value, dict):
+        return "(" + ",".join(f"{key}={FormatValue(x, True)}" for key, x in value.items()) + ")"
+    if isinstance(value, list):
+        return "(" + ",".join(FormatValue(x, True) for x in value) + ")"
+    if isinstance(value, str) and nested:
+        return f'"{value}"'
+    return str(value)
+
+
+def ApplyStatement(
+    statement: SkinStatement,
+    obj: Optional[unrealsdk.UObject] = None,
+    findObject: Callable[[str, str], Optional[unrealsdk.UObject]] = _FindObject,
+) -> None:
+    """
+    Applies a single statement, directly if we can, otherwise by sending just that statement to the console.
+    Any objects that need finding are looked up through `findObject`.
+    """
+    # Setting a material's parameter arrays directly wouldn't update its render resources, but `set` does
+    direct = statement.Property not in ParameterProperties and statement.Value is not None
+    if direct and obj is None:
+        obj = findObject("Object", statement.Object)
+    if direct and obj is not None:
+        try:
+            value = ToEngineValue(statement.Value, findObject)
+            with Profiler.Time("SetProperty"):
+                setattr(obj, statement.Property, value)
+            return
+        except Exception:
+            pass
+    # Statements loaded from a skin pack may not keep their raw text around, so rebuild it if we need to
+    raw = statement.Raw if statement.Raw or statement.Value is None else FormatValue(statement.Value)
+    setCmd = f"set {statement.Object} {statement.Property} {raw}"
+    with Profiler.Time("ConsoleCommand"):
+        unrealsdk.GetEngine().GamePlayers[0].Actor.ConsoleCommand(setCmd, False)
+
+
+def ApplyPlan(
+    plan: SkinPlan,
+    objects: Optional[Dict[str, unrealsdk.UObject]] = None,
+    findObject: Callable[[str, str], Optional[unrealsdk.UObject]] = _FindObject,
+) -> None:
+    """Applies every statement in a plan, reusing any already found objects passed in"""
+    if objects is None:
+        objects = {}
+    for statement in plan.Statements:
+        ApplyStatement(statement, objects.get(statement.Object), findObject)
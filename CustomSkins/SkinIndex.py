@@ -0,0 +1,122 @@
+import os
+import json
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from Mods.CustomSkins import Profiler
+from Mods.CustomSkins.AtomicFile import WriteAtomic
+from Mods.CustomSkins.SkinParser import ParseSkinFile
+
+
+class SkinIndex:
+    """
+    A persistent index of every skin file, keyed by path and validated against the file's size and mtime.
+    Each entry records the file's character, whether it's a valid skin and the material objects it touches.
+    This way a refresh only has to re-read the files that actually changed, the rest is just a `stat` call.
+    """
+
+    # Bump this whenever the entry layout changes, old indexes will just be thrown away
+    Version: int = 2
+
+    def __init__(self, IndexPath: str) -> None:
+        self.IndexPath: str = IndexPath
+        # {"File Path": {"Size": 0, "MTime": 0, "Character": "", "Valid": True, "Materials": []}}
+        self.Entries: Dict[str, Dict[str, Any]] = {}
+        self.Dirty: bool = False
+        # Refreshes run on worker threads, one left over from before a re-enable or a watcher poll could otherwise
+        # overlap with another, both editing the entries and writing the same temporary file
+        self.Lock: threading.RLock = threading.RLock()
+        self.Load()
+
+    def Load(self) -> None:
+        """Loads the index from disk, a missing or corrupt index is treated as empty"""
+        self.Entries = {}
+        if not os.path.exists(self.IndexPath):
+            return
+        try:
+            with open(self.IndexPath, "r", encoding="utf-8") as indexFile:
+                data = json.load(indexFile)
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get("Version") != self.Version:
+            return
+        self.Entries = data.get("Entries", {})
+
+    def Save(self) -> None:
+        """Writes the index back to disk if anything has changed since the last save"""
+        with self.Lock:
+            if not self.Dirty:
+                return
+            try:
+                with WriteAtomic(self.IndexPath) as indexFile:
+                    json.dump({"Version": self.Version, "Entries": self.Entries}, indexFile)
+            except OSError:
+                return
+            self.Dirty = False
+
+    @staticmethod
+    def GetCharacter(skinFile: str) -> str:
+        """Returns the character for a skin file, which is just the name of the folder it's stored in"""
+        return os.path.basename(os.path.dirname(skinFile))
+
+    @staticmethod
+    def ScanFile(skinFile: str) -> Dict[str, Any]:
+        """Streams through a skin file and returns whether it's valid, and the material objects it touches"""
+        valid = False
+        materialObjects: List[str] = []
+        for statement in ParseSkinFile(skinFile):
+            # Hotfixes never get applied from the menu, so they don't count towards a file being valid
+            if statement.Hotfix:
+                continue
+            valid = True
+            if statement.Object.startswith("CD_") and statement.Object not in materialObjects:
+                materialObjects += [statement.Object]
+
+        return {"Valid": valid, "Materials": materialObjects}
+
+    def GetEntry(self, skinFile: str, stat: Optional[Tuple[int, int]] = None) -> Dict[str, Any]:
+        """
+        Returns the up to date entry for the given skin file, only reading it if its size or mtime changed.
+        If the file's (size, mtime) is passed we trust it instead of calling `stat` again.
+        """
+        if stat is None:
+            fileStat = os.stat(skinFile)
+            stat = (fileStat.st_size, fileStat.st_mtime_ns)
+        size, mtime = stat
+        entry = self.Entries.get(skinFile)
+        if entry is not None and entry["Size"] == size and entry["MTime"] == mtime:
+            return entry
+
+        entry = {"Size": size, "MTime": mtime, "Character": self.GetCharacter(skinFile)}
+        with Profiler.Time("ScanSkinFile"):
+            entry.update(self.ScanFile(skinFile))
+        self.Entries[skinFile] = entry
+        self.Dirty = True
+        return entry
+
+    def Refresh(
+        self, skinFiles: List[str], snapshot: Optional[Dict[str, Tuple[int, int]]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Brings the index up to date with the given list of skin files and returns their entries.
+        If a snapshot of each file's (size, mtime) is passed, it's used instead of calling `stat` on every file.
+        Safe to call from several threads at once, refreshes just take turns.
+        """
+        with self.Lock:
+            entries: Dict[str, Dict[str, Any]] = {}
+            with Profiler.Time("RefreshIndex"):
+                for skinFile in skinFiles:
+                    try:
+                        entries[skinFile] = self.GetEntry(
+                            skinFile, None if snapshot is None else snapshot.get(skinFile)
+                        )
+                    except (OSError, UnicodeDecodeError):
+                        continue
+
+            # Forget about files which have been removed
+            if len(entries) != len(self.Entries):
+                self.Dirty = True
+            self.Entries = entries
+
+            self.Save()
+            return entries
@@ -0,0 +1,149 @@
+import unrealsdk
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from Mods.CustomSkins import Profiler
+
+from Mods.CustomSkins.SkinCompiler import ObjectReference, SkinPlan, SkinStatement, ApplyStatement
+from Mods.CustomSkins.MaterialSnapshot import MaterialSnapshot, Parameter, ParameterProperties, SetParameters
+
+
+def _ToFloat(value: Any) -> float:
+    return float(value) if isinstance(value, (int, float)) else 0.0
+
+
+def ToParameter(propName: str, entry: Dict[str, Any]) -> Parameter:
+    """Converts a parsed parameter struct from a skin file into the same layout snapshots use"""
+    value = entry.get("ParameterValue")
+    if propName == "VectorParameterValues":
+        color = value if isinstance(value, dict) else {}
+        value = (_ToFloat(color.get("R")), _ToFloat(color.get("G")), _ToFloat(color.get("B")), _ToFloat(color.get("A")))
+    elif propName == "ScalarParameterValues":
+        value = _ToFloat(value)
+    guid = entry.get("ExpressionGUID")
+    guid = guid if isinstance(guid, dict) else {}
+    guidValues = (guid.get("A", 0), guid.get("B", 0), guid.get("C", 0), guid.get("D", 0))
+    return (str(entry.get("ParameterName")), value, guidValues)
+
+
+def _IsLayerable(statement: SkinStatement) -> bool:
+    """Checks if a statement sets a material parameter array we know how to merge"""
+    return (
+        statement.Property in ParameterProperties
+        and isinstance(statement.Value, list)
+        and all(isinstance(x, dict) and "ParameterName" in x for x in statement.Value)
+    )
+
+
+def _FindObject(className: str, name: str) -> Optional[unrealsdk.UObject]:
+    return Profiler.Call("FindObject", unrealsdk.FindObject, className, name)
+
+
+def _Resolve(
+    parameters: List[Parameter], findObject: Callable[[str, str], Optional[unrealsdk.UObject]]
+) -> List[Parameter]:
+    """Swaps any texture references for their actual objects, right before we set them"""
+    return [
+        (name, findObject(value.Class, value.Name) if isinstance(value, ObjectReference) else value, guid)
+        for name, value, guid in parameters
+    ]
+
+
+class SkinLayers:
+    """
+    Works out the effective state of every material from the ordered list of enabled skins.
+    Each parameter array is taken whole from the most recently enabled skin which sets it, or the default snapshot.
+    Only materials whose effective parameters actually changed get set.
+    Texture and other object references get looked up through `FindObject`, which can be swapped out for a cached
+    version.
+    """
+
+    def __init__(self, FindObject: Callable[[str, str], Optional[unrealsdk.UObject]] = _FindObject) -> None:
+        self.FindObject: Callable[[str, str], Optional[unrealsdk.UObject]] = FindObject
+        # The enabled skin files, in the order they were enabled
+        self.Enabled: List[str] = []
+        self.Plans: Dict[str, SkinPlan] = {}
+        # {"Material Object": {"VectorParameterValues": [Parameter]}}, what we last set on each material
+        self.Applied: Dict[str, Dict[str, List[Parameter]]] = {}
+        # {("Object", "Property"): SkinStatement}, the last non-material statements we applied
+        self.AppliedStatements: Dict[Tuple[str, str], SkinStatement] = {}
+
+    def Reset(self) -> None:
+        self.Enabled = []
+        self.Plans = {}
+        self.Applied = {}
+        self.AppliedStatements = {}
+
+    def SetEnabled(self, skinFile: str, plan: SkinPlan, enabled: bool) -> None:
+        """Adds or removes a skin from the enabled layers, re-enabling a skin moves it to the top"""
+        if skinFile in self.Enabled:
+            self.Enabled.remove(skinFile)
+        self.Plans.pop(skinFile, None)
+        if enabled:
+            self.Enabled += [skinFile]
+            self.Plans[skinFile] = plan
+
+    def ComputeMaterial(self, snapshot: MaterialSnapshot) -> Tuple[Dict[str, List[Parameter]], List[str]]:
+        """Returns the effective parameters of a material, along with descriptions of any conflicts"""
+        # Each skin sets whole arrays, exactly like the old `set` did, so any parameters it leaves out are dropped
+        layers: Dict[str, List[Parameter]] = {x: snapshot.Parameters[x] for x in ParameterProperties}
+
+        owners: Dict[str, str] = {}
+        # {("Overridden Skin", "Winning Skin"): Overridden Array Count}
+        overrides: Dict[Tuple[str, str], int] = {}
+        for skinFile in self.Enabled:
+            for statement in self.Plans[skinFile].Statements:
+                if statement.Object != snapshot.Material or not _IsLayerable(statement):
+                    continue
+                owner = owners.get(statement.Property)
+                if owner is not None and owner != skinFile:
+                    overrides[(owner, skinFile)] = overrides.get((owner, skinFile), 0) + 1
+                owners[statement.Property] = skinFile
+                layers[statement.Property] = [ToParameter(statement.Property, x) for x in statement.Value]
+
+        conflicts = [
+            f"{snapshot.Material}: {os.path.basename(winner)} overrides {count} parameter arrays from "
+            f"{os.path.basename(loser)}"
+            for (loser, winner), count in overrides.items()
+        ]
+        return layers, conflicts
+
+    def ApplyMaterials(self, materials: List[str], snapshots: Dict[str, MaterialSnapshot]) -> List[str]:
+        """Applies the diff between the current and effective state of the given materials, returns any conflicts"""
+        allConflicts: List[str] = []
+        for matObj in materials:
+            snapshot = snapshots.get(matObj)
+            if snapshot is None:
+                continue
+            effective, conflicts = self.ComputeMaterial(snapshot)
+            allConflicts += conflicts
+            # An untouched material is exactly the same as its snapshot
+            current = self.Applied.get(matObj, snapshot.Parameters)
+            if effective != current:
+                resolved = {x: _Resolve(effective[x], self.FindObject) for x in ParameterProperties}
+                SetParameters(matObj, snapshot.Object, resolved)
+            self.Applied[matObj] = effective
+        return allConflicts
+
+    def ApplyStatements(self, plan: SkinPlan, objects: Dict[str, unrealsdk.UObject]) -> None:
+        """
+        Applies any statements in the plan that aren't mergeable material parameters.
+        Each one uses the value from whichever enabled skin set it last.
+        We don't have a snapshot of these, so if no enabled skin sets one anymore it's left as is.
+        """
+        # Only the plan's materials get snapshotted and merged, parameters set on anything else are applied as is
+        materials = set(plan.Materials)
+        for statement in plan.Statements:
+            # Material parameters are handled by `ApplyMaterials`
+            if statement.Object in materials and _IsLayerable(statement):
+                continue
+            key = (statement.Object, statement.Property)
+            effective: Optional[SkinStatement] = None
+            for skinFile in self.Enabled:
+                for other in self.Plans[skinFile].Statements:
+                    if (other.Object, other.Property) == key:
+                        effective = other
+            if effective is None or self.AppliedStatements.get(key) == effective:
+                continue
+            ApplyStatement(effective, objects.get(statement.Object), self.FindObject)
+            self.AppliedStatements[key] = effective
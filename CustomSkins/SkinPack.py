@@ -0,0 +1,264 @@
+"""
+A precompiled binary copy of the whole skin library, so enabling doesn't have to re-parse the text files.
+
+Layout (little endian):
+    Header:     b"CSPK", u16 version
+    Strings:    u32 count, then for each: u32 length, utf-8 bytes
+    Files:      u32 count, then for each: u32 path, u64 size, i64 mtime, u32 offset of the file's statements
+    Plans:      for each file: u32 statement count, statements
+    Statement:  u32 object, u32 property, u8 kind, then the kind's payload
+
+Every name is stored once in the string table and referenced by index.
+Parameter arrays are stored fully typed, anything else keeps its raw text and is re-parsed on load.
+Loading a pack only reads the string and file tables, each file's plan only gets decoded once it's actually needed,
+so a big library with only a few skins enabled doesn't pay for the rest.
+"""
+
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+
+from Mods.CustomSkins import Profiler
+from Mods.CustomSkins.AtomicFile import WriteAtomic
+from Mods.CustomSkins.SkinCompiler import ObjectReference, SkinPlan, SkinStatement, ParseValue
+
+Magic: bytes = b"CSPK"
+Version: int = 2
+
+_KindRaw = 0
+_KindVector = 1
+_KindTexture = 2
+_KindScalar = 3
+_KindsByProperty: Dict[str, int] = {
+    "VectorParameterValues": _KindVector,
+    "TextureParameterValues": _KindTexture,
+    "ScalarParameterValues": _KindScalar,
+}
+_PropertiesByKind: Dict[int, str] = {x: y for y, x in _KindsByProperty.items()}
+_NoString = 0xFFFFFFFF
+
+_Header = struct.Struct("<4sH")
+_U16 = struct.Struct("<H")
+_U32 = struct.Struct("<I")
+_FileEntry = struct.Struct("<IQqI")
+_StatementHeader = struct.Struct("<IIB")
+_Vector = struct.Struct("<I4f4i")
+_Texture = struct.Struct("<III4i")
+_Scalar = struct.Struct("<If4i")
+
+
+class _StringTable:
+    def __init__(self) -> None:
+        self.Strings: List[str] = []
+        self.Indexes: Dict[str, int] = {}
+
+    def Intern(self, string: str) -> int:
+        index = self.Indexes.get(string)
+        if index is None:
+            index = len(self.Strings)
+            self.Strings += [string]
+            self.Indexes[string] = index
+        return index
+
+
+def _GetGUID(entry: Dict[str, Any]) -> Optional[Tuple[int, int, int, int]]:
+    guid = entry.get("ExpressionGUID")
+    if not isinstance(guid, dict) or list(guid) != ["A", "B", "C", "D"]:
+        return None
+    if not all(isinstance(x, int) for x in guid.values()):
+        return None
+    return (guid["A"], guid["B"], guid["C"], guid["D"])
+
+
+def _EncodeParameters(kind: int, value: Any, strings: _StringTable) -> Optional[bytes]:
+    """Encodes a parameter array in its typed form, or returns None if it doesn't fit the layout we expect"""
+    if not isinstance(value, list) or len(value) > 0xFFFF:
+        return None
+    chunks = [_U16.pack(len(value))]
+    for entry in value:
+        if not isinstance(entry, dict) or list(entry) != ["ParameterName", "ParameterValue", "ExpressionGUID"]:
+            return None
+        name, paramValue, guid = entry["ParameterName"], entry["ParameterValue"], _GetGUID(entry)
+        if not isinstance(name, str) or guid is None:
+            return None
+
+        if kind == _KindVector:
+            if not isinstance(paramValue, dict) or list(paramValue) != ["R", "G", "B", "A"]:
+                return None
+            if not all(isinstance(x, (int, float)) for x in paramValue.values()):
+                return None
+            chunks += [_Vector.pack(strings.Intern(name), *paramValue.values(), *guid)]
+        elif kind == _KindTexture:
+            if isinstance(paramValue, ObjectReference):
+                classIndex, objectIndex = strings.Intern(paramValue.Class), strings.Intern(paramValue.Name)
+            elif paramValue == "None":
+                classIndex, objectIndex = _NoString, _NoString
+            else:
+                return None
+            chunks += [_Texture.pack(strings.Intern(name), classIndex, objectIndex, *guid)]
+        else:
+            if not isinstance(paramValue, (int, float)):
+                return None
+            chunks += [_Scalar.pack(strings.Intern(name), paramValue, *guid)]
+    return b"".join(chunks)
+
+
+def _EncodePlan(plan: SkinPlan, strings: _StringTable) -> bytes:
+    chunks: List[bytes] = [_U32.pack(len(plan.Statements))]
+    for statement in plan.Statements:
+        header = (strings.Intern(statement.Object), strings.Intern(statement.Property))
+        kind = _KindsByProperty.get(statement.Property, _KindRaw)
+        try:
+            payload = _EncodeParameters(kind, statement.Value, strings) if kind != _KindRaw else None
+        except struct.error:
+            # Something's out of range for the typed layout, it'll just have to keep its raw text
+            payload = None
+        if payload is None:
+            kind, payload = _KindRaw, _U32.pack(strings.Intern(statement.Raw))
+        chunks += [_StatementHeader.pack(*header, kind), payload]
+    return b"".join(chunks)
+
+
+def WritePack(packPath: str, plans: Dict[str, SkinPlan]) -> None:
+    """Writes all of the given plans into a single pack file, raises OSError if it can't be written"""
+    strings = _StringTable()
+    encoded = [(strings.Intern(skinFile), plan, _EncodePlan(plan, strings)) for skinFile, plan in plans.items()]
+
+    table: List[bytes] = [_U32.pack(len(strings.Strings))]
+    for string in strings.Strings:
+        encodedString = string.encode("utf-8")
+        table += [_U32.pack(len(encodedString)), encodedString]
+    tableBytes = b"".join(table)
+
+    # The plans start right after the file table, which is a fixed size per file
+    offset = _Header.size + len(tableBytes) + _U32.size + len(encoded) * _FileEntry.size
+    files: List[bytes] = [_U32.pack(len(encoded))]
+    for pathIndex, plan, planBytes in encoded:
+        files += [_FileEntry.pack(pathIndex, plan.Size, plan.MTime, offset)]
+        offset += len(planBytes)
+
+    with WriteAtomic(packPath, binary=True) as packFile:
+        packFile.write(_Header.pack(Magic, Version) + tableBytes + b"".join(files) + b"".join(x[2] for x in encoded))
+
+
+def _DecodeParameters(kind: int, data: bytes, offset: int, strings: List[str]) -> Tuple[List[Dict[str, Any]], int]:
+    (count,) = _U16.unpack_from(data, offset)
+    offset += _U16.size
+    entries: List[Dict[str, Any]] = []
+    for _ in range(count):
+        if kind == _KindVector:
+            name, r, g, b, a, *guid = _Vector.unpack_from(data, offset)
+            offset += _Vector.size
+            value: Any = {"R": r, "G": g, "B": b, "A": a}
+        elif kind == _KindTexture:
+            name, classIndex, objectIndex, *guid = _Texture.unpack_from(data, offset)
+            offset += _Texture.size
+            value = "None" if classIndex == _NoString else ObjectReference(strings[classIndex], strings[objectIndex])
+        else:
+            name, value, *guid = _Scalar.unpack_from(data, offset)
+            offset += _Scalar.size
+        entries += [
+            {
+                "ParameterName": strings[name],
+                "ParameterValue": value,
+                "ExpressionGUID": {"A": guid[0], "B": guid[1], "C": guid[2], "D": guid[3]},
+            }
+        ]
+    return entries, offset
+
+
+def _DecodePlan(size: int, mtime: int, data: bytes, offset: int, strings: List[str]) -> SkinPlan:
+    (statementCount,) = _U32.unpack_from(data, offset)
+    offset += _U32.size
+    statements: List[SkinStatement] = []
+    materials: List[str] = []
+    for _ in range(statementCount):
+        objectIndex, propertyIndex, kind = _StatementHeader.unpack_from(data, offset)
+        offset += _StatementHeader.size
+        obj, prop = strings[objectIndex], strings[propertyIndex]
+        if kind == _KindRaw:
+            (rawIndex,) = _U32.unpack_from(data, offset)
+            offset += _U32.size
+            raw = strings[rawIndex]
+            try:
+                value = ParseValue(raw)
+            except ValueError:
+                value = None
+            statements += [SkinStatement(obj, prop, value, raw)]
+        else:
+            if _PropertiesByKind.get(kind) != prop:
+                raise IndexError("Statement kind doesn't match its property")
+            value, offset = _DecodeParameters(kind, data, offset, strings)
+            statements += [SkinStatement(obj, prop, value, "")]
+        if obj.startswith("CD_") and obj not in materials:
+            materials += [obj]
+    return SkinPlan(size, mtime, statements, materials)
+
+
+class SkinPack:
+    """A loaded pack file, which decodes each skin's plan the first time it's asked for"""
+
+    def __init__(
+        self,
+        Data: bytes = b"",
+        Strings: Optional[List[str]] = None,
+        Files: Optional[Dict[str, Tuple[int, int, int]]] = None,
+    ) -> None:
+        self.Data: bytes = Data
+        self.Strings: List[str] = [] if Strings is None else Strings
+        # {"File Path": (Size, MTime, Offset)}
+        self.Files: Dict[str, Tuple[int, int, int]] = {} if Files is None else Files
+
+    def __len__(self) -> int:
+        return len(self.Files)
+
+    def GetPlan(self, skinFile: str, size: int, mtime: int) -> Optional[SkinPlan]:
+        """
+        Decodes the plan for the given skin file.
+        Returns None if it isn't in the pack, the file's changed since the pack was written, or its plan is corrupt.
+        """
+        entry = self.Files.get(skinFile)
+        if entry is None or entry[0] != size or entry[1] != mtime:
+            return None
+        try:
+            with Profiler.Time("DecodePackedPlan"):
+                return _DecodePlan(size, mtime, self.Data, entry[2], self.Strings)
+        except (struct.error, IndexError):
+            return None
+
+
+def ReadPack(packPath: str) -> SkinPack:
+    """
+    Reads a pack file with a single read, decoding just enough to know which skin files it has plans for.
+    Returns an empty pack if the pack is missing, corrupt or from a different version.
+    """
+    try:
+        with Profiler.Time("ReadSkinPack"), open(packPath, "rb") as packFile:
+            data = packFile.read()
+    except OSError:
+        return SkinPack()
+    Profiler.AddBytes("ReadSkinPack", len(data))
+
+    try:
+        magic, version = _Header.unpack_from(data, 0)
+        if magic != Magic or version != Version:
+            return SkinPack()
+        offset = _Header.size
+
+        (stringCount,) = _U32.unpack_from(data, offset)
+        offset += _U32.size
+        strings: List[str] = []
+        for _ in range(stringCount):
+            (length,) = _U32.unpack_from(data, offset)
+            offset += _U32.size
+            strings += [data[offset : offset + length].decode("utf-8")]
+            offset += length
+
+        (fileCount,) = _U32.unpack_from(data, offset)
+        offset += _U32.size
+        fileTable = data[offset : offset + fileCount * _FileEntry.size]
+        files: Dict[str, Tuple[int, int, int]] = {}
+        for pathIndex, size, mtime, planOffset in _FileEntry.iter_unpack(fileTable):
+            files[strings[pathIndex]] = (size, mtime, planOffset)
+    except (struct.error, IndexError, UnicodeDecodeError):
+        return SkinPack()
+    return SkinPack(data, strings, files)
@@ -0,0 +1,149 @@
+import os
+import re
+from xml.sax.saxutils import unescape
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from Mods.CustomSkins import Profiler
+
+
+class ParsedStatement(NamedTuple):
+    """A single `set` statement read out of a skin file"""
+
+    Object: str
+    Property: str
+    Raw: str
+    # The names of the BLCMM categories this statement is nested under, empty for plain text files
+    Category: Tuple[str, ...]
+    # The BLCMM profiles this statement is enabled in, empty for plain text files
+    Profiles: Tuple[str, ...]
+    # If this statement is a BLCMM hotfix, which only ever gets applied on level load
+    Hotfix: bool
+
+
+_CategoryPattern = re.compile(r'<category\s+name="([^"]*)"[^>]*?(/?)>')
+_ProfilePattern = re.compile(r'<profile\s+name="([^"]*)"([^>]*)/?>')
+_CodePattern = re.compile(r'<code(?:\s+profiles="([^"]*)")?[^>]*>(.*)</code>', re.DOTALL)
+_XMLEntities = {"&quot;": '"', "&apos;": "'"}
+
+
+def SplitStatement(text: str) -> Optional[Tuple[str, str, str]]:
+    """Splits a `set Object Property Value` line into its parts, or returns None if it isn't one"""
+    parts = text.strip().split(None, 3)
+    if len(parts) < 3 or parts[0].lower() != "set":
+        return None
+    return parts[1], parts[2], parts[3] if len(parts) > 3 else ""
+
+
+def _ParseBLCMM(lines: Iterator[str]) -> Iterator[ParsedStatement]:
+    categories: List[str] = []
+    currentProfile: Optional[str] = None
+    hotfixDepth = 0
+    pending = ""
+
+    for line in lines:
+        # Code blocks can technically span multiple lines, so keep collecting until we see the end tag
+        if pending:
+            pending += line
+            if "</code>" not in line:
+                continue
+            line, pending = pending, ""
+
+        stripped = line.strip()
+        # Everything after the closing tag is just the FilterTool copy of the same commands
+        if stripped.startswith("</BLCMM>"):
+            return
+
+        if stripped.startswith("<profile "):
+            match = _ProfilePattern.search(stripped)
+            if match is not None and (currentProfile is None or 'current="true"' in match.group(2)):
+                currentProfile = match.group(1)
+        elif stripped.startswith("<category"):
+            match = _CategoryPattern.search(stripped)
+            if match is not None and not match.group(2):
+                categories += [match.group(1)]
+        elif stripped.startswith("</category>"):
+            if categories:
+                categories.pop()
+        elif stripped.startswith("<hotfix"):
+            if not stripped.endswith("/>") and "</hotfix>" not in stripped:
+                hotfixDepth += 1
+        elif stripped.startswith("</hotfix>"):
+            hotfixDepth = max(hotfixDepth - 1, 0)
+
+        if "<code" not in stripped:
+            continue
+        if "</code>" not in stripped:
+            pending = line
+            continue
+
+        match = _CodePattern.search(stripped)
+        if match is None:
+            continue
+        profiles = tuple(x for x in (match.group(1) or "").split(",") if x)
+        # A code block with no profiles is disabled, otherwise it needs to be enabled in the current one
+        if not profiles or (currentProfile is not None and currentProfile not in profiles):
+            continue
+        parts = SplitStatement(unescape(match.group(2), _XMLEntities))
+        if parts is None:
+            continue
+        hotfix = hotfixDepth > 0 or "<hotfix" in stripped
+        yield ParsedStatement(parts[0], parts[1], parts[2], tuple(categories), profiles, hotfix)
+
+
+def _ParsePlainText(lines: Iterator[str]) -> Iterator[ParsedStatement]:
+    pending = ""
+    depth = 0
+    for line in lines:
+        stripped = line.strip()
+        if pending:
+            # Keep joining lines onto a statement until its brackets are balanced
+            if stripped:
+                pending += stripped
+                depth += stripped.count("(") - stripped.count(")")
+            if depth > 0:
+                continue
+        elif stripped.startswith("#") or not stripped.lower().startswith("set "):
+            continue
+        else:
+            pending = stripped
+            depth = stripped.count("(") - stripped.count(")")
+            if depth > 0:
+                continue
+
+        parts = SplitStatement(pending)
+        pending, depth = "", 0
+        if parts is not None:
+            yield ParsedStatement(parts[0], parts[1], parts[2], (), (), False)
+
+    parts = SplitStatement(pending) if pending else None
+    if parts is not None:
+        yield ParsedStatement(parts[0], parts[1], parts[2], (), (), False)
+
+
+def ParseLines(lines: Iterable[str]) -> Iterator[ParsedStatement]:
+    """
+    Lazily parses skin file lines into statements, working out if it's a BLCMM or a plain text file from the first line.
+    Nothing is held onto besides the current statement, so this is fine to use on multi-megabyte mod files.
+    """
+    lineIter = iter(lines)
+    for line in lineIter:
+        if not line.strip():
+            continue
+        # Put the first line back in front of the rest of the file
+        chained = _Prepend(line, lineIter)
+        if line.lstrip().startswith("<BLCMM"):
+            return _ParseBLCMM(chained)
+        return _ParsePlainText(chained)
+    return iter(())
+
+
+def _Prepend(first: str, rest: Iterator[str]) -> Iterator[str]:
+    yield first
+    yield from rest
+
+
+def ParseSkinFile(skinFile: str) -> Iterator[ParsedStatement]:
+    """Streams every enabled `set` statement out of a skin file"""
+    with open(skinFile, "r", encoding="utf-8") as openF:
+        Profiler.AddBytes("ReadSkinFile", os.fstat(openF.fileno()).st_size)
+        yield from ParseLines(openF)
@@ -0,0 +1,59 @@
+import os
+import time
+from glob import glob
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+
+class SkinChanges(NamedTuple):
+    Added: List[str]
+    Removed: List[str]
+    Modified: List[str]
+
+
+class SkinWatcher:
+    """
+    Polls the skin folder for added, removed and modified files.
+    This is purely based off of comparing `stat` snapshots, so it works the same on every OS.
+    Polling only touches the file system, so it's safe to run on a worker thread.
+    """
+
+    def __init__(self, Pattern: str, Interval: float = 2.0) -> None:
+        self.Pattern: str = Pattern
+        # How many seconds to wait between polls
+        self.Interval: float = Interval
+        # {"File Path": (Size, MTime)}
+        self.Snapshot: Dict[str, Tuple[int, int]] = {}
+        self.LastPoll: float = 0.0
+
+    def TakeSnapshot(self) -> Dict[str, Tuple[int, int]]:
+        snapshot: Dict[str, Tuple[int, int]] = {}
+        for skinFile in glob(self.Pattern):
+            try:
+                stat = os.stat(skinFile)
+            except OSError:
+                continue
+            snapshot[os.path.normpath(skinFile)] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def Reset(self, snapshot: Optional[Dict[str, Tuple[int, int]]] = None) -> None:
+        """Sets the baseline that future polls compare against, taking a fresh snapshot if one isn't given"""
+        self.Snapshot = self.TakeSnapshot() if snapshot is None else snapshot
+        self.LastPoll = time.time()
+
+    @property
+    def Due(self) -> bool:
+        """If it's been long enough since the last poll to check again"""
+        return time.time() - self.LastPoll >= self.Interval
+
+    def Poll(self) -> Optional[SkinChanges]:
+        """Returns what has changed since the last poll, or None if nothing has"""
+        self.LastPoll = time.time()
+        snapshot = self.TakeSnapshot()
+        added = [x for x in snapshot if x not in self.Snapshot]
+        removed = [x for x in self.Snapshot if x not in snapshot]
+        modified = [x for x in snapshot if x in self.Snapshot and snapshot[x] != self.Snapshot[x]]
+        self.Snapshot = snapshot
+
+        if not added and not removed and not modified:
+            return None
+        return SkinChanges(added, removed, modified)
@@ -2,15 +2,28 @@ import unrealsdk
 import os
 import json
 import sys
+import traceback
+from concurrent.futures import Future
 from glob import glob
 from Mods import ModMenu
-from typing import Dict, List, Any
+from Mods.CustomSkins.SkinIndex import SkinIndex
+from Mods.CustomSkins.SkinCompiler import SkinCompiler, SkinPlan
+from Mods.CustomSkins.PackageManager import PackageManager
+from Mods.CustomSkins.MaterialResolver import MaterialResolver
+from Mods.CustomSkins.MaterialSnapshot import MaterialSnapshot, TakeSnapshot, RestoreSnapshots
+from Mods.CustomSkins.SkinLayers import SkinLayers
+from Mods.CustomSkins.SkinWatcher import SkinChanges, SkinWatcher
+from Mods.CustomSkins.SkinPack import ReadPack, WritePack
+from Mods.CustomSkins.Scheduler import Scheduler
+from Mods.CustomSkins import Profiler
+from typing import Dict, List, Any, Generator, Iterator, Optional, Tuple
 
 
 class CustomSkins(ModMenu.SDKMod):
     Name: str = "Custom Skins"
     Author: str = "FromDarkHell"
-    Description: str = "A simple mod allowing you to have custom character skins, all selectable!<br>Hit R in this menu to reload your skins<br>Press O to open your skin folder"
+    BaseDescription: str = "A simple mod allowing you to have custom character skins, all selectable!<br>Hit R in this menu to reload your skins<br>Press O to open your skin folder<br>Press C to compile your skins for faster loading<br>Press P to start / stop profiling"
+    Description: str = BaseDescription
     Version: str = "1.0.0"
 
     # Sadly this mod can only really support BL2 as TPS doesn't support on the fly skin editing which is a not cool move
@@ -21,243 +34,534 @@ class CustomSkins(ModMenu.SDKMod):
     # All of the supported characters / folder names
     SupportedCharacters: List[str] = ["Zer0", "Maya", "Salvador", "Krieg", "Gaige", "Axton"]
 
-    # {"Object Name": {"VectorParameterValues": "value", "TextureParameterValues": ""}}
-    DefaultSkins: Dict[str, Dict[str, str]] = {}
-    SettingsInputs: Dict[str, str] = {"Enter": "Enable", "R": "Refresh Skins", "O": "Open Skins"}
+    # {"Object Name": MaterialSnapshot}, the untouched parameters of every material we've skinned
+    DefaultSkins: Dict[str, MaterialSnapshot] = {}
+    SettingsInputs: Dict[str, str] = {
+        "Enter": "Enable",
+        "R": "Refresh Skins",
+        "O": "Open Skins",
+        "C": "Compile Skin Pack",
+        "P": "Toggle Profiling",
+    }
 
     SkinnedCharacters: Dict[str, List[str]] = {}
 
-    def InitializePackages(self) -> None:
-        CharactersToClassName = {
-            "Zer0": "Assassin",
-            "Maya": "Siren",
-            "Salvador": "Mercenary",
-            "Krieg": "Psycho",
-            "Gaige": "Mechro",
-            "Axton": "Soldier",
-            "Runner": "Runner",
-            "Technical": "BanditTech",
-        }
-
-        # Only load packages related to the skinned characters
-        customizationPackages = []
-        for character in self.skinnedCharacters:
-            # Ignore non-
-            if len(self.skinnedCharacters[character]) > 0:
-                className = CharactersToClassName[character]
-                customizationPackages += glob(f"../../WillowGame/CookedPCConsole/CD_{className}_*.upk")
-                customizationPackages += glob(f"../../DLC/*/Compat/Content/CD_{className}_*.upk")
-
-        for package in customizationPackages:
-            packageName = os.path.splitext(os.path.basename(package))[0]
-
-            # unrealsdk.Log(f"    [CustomSkins] -- Loading Package: {packageName}")
-
-            # Get just the file name and then load the respective UPK for it
-            unrealsdk.LoadPackage(packageName)
-
-    def InitializeSkinSettings(self) -> None:
-        # Reset options, as we use a += later on in the code and this'll avoid weird issues
-        self.Options = []
-
+    # The persistent index of skin files, so refreshing doesn't have to re-read every file
+    Index: SkinIndex = SkinIndex("Mods/CustomSkins/SkinIndex.json")
+    # Compiled skin files, so toggling a skin doesn't have to re-read and re-parse it
+    Compiler: SkinCompiler = SkinCompiler()
+    # Tracks loaded customization packages, and which package each material lives in
+    Packages: PackageManager = PackageManager("Mods/CustomSkins/PackageIndex.json")
+    # Remembers every object skins have needed, found or not, so toggling skins doesn't keep searching for them
+    Resolver: MaterialResolver = MaterialResolver(Packages)
+    # Merges all of the enabled skins together, so overlapping skins don't stomp on each other
+    Layers: SkinLayers = SkinLayers(Resolver.FindObject)
+    # Picks up added, removed and edited skin files without needing a full refresh
+    Watcher: SkinWatcher = SkinWatcher("Mods/CustomSkins/Skins/*/*.*")
+    # The watcher's current poll, running on a worker thread so big libraries don't stutter the game
+    Polling: Optional["Future[Tuple[Optional[SkinChanges], Dict[str, Dict[str, Any]]]]"] = None
+
+    # The precompiled copy of the skin library, if the player has made one
+    SkinPackPath: str = "Mods/CustomSkins/SkinPack.bin"
+    # Where the timings get written when profiling's turned off
+    ProfilePath: str = "Mods/CustomSkins/Profile.json"
+
+    # {"File Path": Option}, the option for every loaded skin file
+    SkinOptions: Dict[str, ModMenu.Options.Boolean] = {}
+
+    # Spreads loading the skin library out over multiple frames, so the menu never freezes
+    Tasks: Scheduler = Scheduler()
+    # Whether the skin options are still being rebuilt after enabling
+    Loading: bool = False
+    # [("File Path", "Character", Enabled)], skins toggled while loading, which get carried over onto the new options
+    QueuedToggles: List[Tuple[str, str, bool]] = []
+    LoadBudget: ModMenu.Options.Slider = ModMenu.Options.Slider(
+        "Load Budget",
+        "How many milliseconds per frame can be spent loading skins<br>Higher loads faster, lower keeps the menu smoother",
+        4,
+        1,
+        16,
+        1,
+    )
+
+    @staticmethod
+    def FindSkinFiles() -> List[str]:
         # Read all of the skin files and get the absolute path of their file name
-        skinFiles = [os.path.normpath(x) for x in glob("Mods/CustomSkins/Skins/*/*.*")]
+        return [os.path.normpath(x) for x in glob("Mods/CustomSkins/Skins/*/*.*")]
 
+    # How many skin files get worked through in each step of loading, so big libraries don't hitch the menu
+    FilesPerStep: int = 250
+
+    def InitializeSkinSettings(self, skinFiles: List[str], skinEntries: Dict[str, Dict[str, Any]]) -> Iterator[None]:
+        """A scheduler task which creates the options for every valid skin file, a chunk of files per step"""
         # Add all of the characters into the list, it just makes for cleaner code
         self.skinnedCharacters: Dict[str, List[str]] = {}
         for character in self.SupportedCharacters:
             self.skinnedCharacters.update({character: []})
 
         # Read in valid files and get their respective characters
-        for skinFile in skinFiles:
-            with open(skinFile, "r", encoding="utf-8") as openF:
-                modText = openF.read()
-                character = skinFile.rsplit("\\")[-2]
-                # Ignore invalid files
-                if "\nset " not in modText or character not in self.SupportedCharacters:
-                    unrealsdk.Log(f"    [CustomSkins] {skinFile} does not follow the specified format!")
-                    continue
-                # Add the file for the given character
-                self.skinnedCharacters[character] += [skinFile]
-        unrealsdk.Log(f"[CustomSkins] Skinned Characters: {self.skinnedCharacters}")
-
-        # Add options now
+        for index, skinFile in enumerate(skinFiles):
+            entry = skinEntries.get(skinFile)
+            # Ignore invalid files
+            if entry is None or not entry["Valid"] or entry["Character"] not in self.SupportedCharacters:
+                unrealsdk.Log(f"    [CustomSkins] {skinFile} does not follow the specified format!")
+                continue
+            # Add the file for the given character
+            self.skinnedCharacters[entry["Character"]] += [skinFile]
+            if index % self.FilesPerStep == self.FilesPerStep - 1:
+                yield
+        # Just the counts, logging every single file would hitch the game on its own with a big enough library
+        counts = {x: len(files) for x, files in self.skinnedCharacters.items()}
+        unrealsdk.Log(f"[CustomSkins] Skinned Characters: {counts}")
+
+        # Add options now, only swapping them in once they're all made so the menu never shows half of them
+        options: List[ModMenu.Options.Base] = []
+        self.SkinOptions = {}
         for character in self.skinnedCharacters:
             # Ignore characters w/o any skins
             if len(self.skinnedCharacters[character]) == 0:
                 continue
-            # Get just the file name
-            allFileNames = [os.path.splitext(os.path.basename(x))[0] for x in self.skinnedCharacters[character]]
-            characterOptions = []
-            for x in allFileNames:
-                # Create a new boolean option for the skin file
-                charOption = ModMenu.Options.Boolean(x, f'Enables/Disables the skins stored in "{x}"', False)
-                # Store the character name, this allows us to have duplicate file names but for differing characters
-
-                charOption.Character = character  # type: ignore[attr-defined]
-
-                # Add to the available options for characters
-                characterOptions += [charOption]
-            self.Options += [ModMenu.Options.Nested(character, f"Custom Skins for {character}", characterOptions)]
-
-    def RestoreSkinSettings(self) -> None:
-        # This function is necessary in order to restore settings from nested settings
-        unrealsdk.Log("[CustomSkins] Restoring skin settings from settings.json")
+            characterOptions: List[ModMenu.Options.Base] = []
+            for index, skinFile in enumerate(self.skinnedCharacters[character]):
+                characterOptions += [self.CreateSkinOption(character, skinFile)]
+                if index % self.FilesPerStep == self.FilesPerStep - 1:
+                    yield
+            options += [ModMenu.Options.Nested(character, f"Custom Skins for {character}", characterOptions)]
+        self.Options = options + [self.LoadBudget]
+
+        # Use what we just indexed as the baseline for watching the skin folder
+        self.Watcher.Reset({x: (skinEntries[x]["Size"], skinEntries[x]["MTime"]) for x in skinEntries})
+
+    def CreateSkinOption(self, character: str, skinFile: str) -> ModMenu.Options.Boolean:
+        # Get just the file name
+        fileName = os.path.splitext(os.path.basename(skinFile))[0]
+        # Create a new boolean option for the skin file
+        charOption = ModMenu.Options.Boolean(fileName, f'Enables/Disables the skins stored in "{fileName}"', False)
+        # Store the character name, this allows us to have duplicate file names but for differing characters
+        charOption.Character = character  # type: ignore[attr-defined]
+        charOption.SkinFile = skinFile  # type: ignore[attr-defined]
+        self.SkinOptions[skinFile] = charOption
+        return charOption
+
+    @staticmethod
+    def ReadSkinSettings() -> Dict[str, Any]:
+        """Reads the saved options straight out of settings.json"""
         if not os.path.exists("Mods/CustomSkins/settings.json"):
-            return
+            return {}
 
         with open("Mods/CustomSkins/settings.json") as jsonFile:
             settings = json.load(jsonFile)
-            # Ignore situations where we have no settings
-            if "Options" not in settings:
-                return
-            settings = settings["Options"]
-            for char in self.SupportedCharacters:
-                # Ignore characters w/o any settings or custom skins
-                if char not in settings or char not in [x.Caption for x in self.Options]:
-                    continue
-                # Get the char object in the list of options
-                charOptions = [x for x in self.Options if x.Caption == char][0]
-                for file in settings[char]:
-                    # Ignore files which do not exist anymore
-                    if file not in [x.Caption for x in charOptions.Children]:  # type: ignore[attr-defined]
-                        continue
-                    # Get the object pertaining to the given file
-                    charOption = [x for x in charOptions.Children if file == x.Caption][0]  # type: ignore[attr-defined]
-                    # Call ModOptionChanged so that way we update it
-                    self.ModOptionChanged(charOption, settings[char][file])
-                    # A ternary operator between "Off" and "On"
-                    charOption.CurrentValue = charOption.Choices[int(settings[char][file])]
+        # Ignore situations where we have no settings
+        return settings.get("Options", {})  # type: ignore[no-any-return]
+
+    def RestoreSkinSettings(self, settings: Dict[str, Any]) -> Generator[None, None, List[Tuple[str, str]]]:
+        """
+        A scheduler task which restores the nested skin options from the given saved settings, a chunk per step.
+        Returns all of the enabled skins as (file path, character) tuples.
+        """
+        # This function is necessary in order to restore settings from nested settings
+        unrealsdk.Log("[CustomSkins] Restoring skin settings from settings.json")
 
-    def Enable(self) -> None:
-        # Add the skin files to the settings for easy config
-        self.InitializeSkinSettings()
+        # Index the options by caption once, rather than searching through them for every saved file
+        optionsByCaption = {x.Caption: x for x in self.Options}
+        enabledSkins: List[Tuple[str, str]] = []
+        for char in self.SupportedCharacters:
+            # Ignore characters w/o any settings or custom skins
+            charOptions = optionsByCaption.get(char)
+            if char not in settings or charOptions is None:
+                continue
+            childrenByCaption = {x.Caption: x for x in charOptions.Children}  # type: ignore[attr-defined]
+            yield
+            for index, file in enumerate(settings[char]):
+                if index % self.FilesPerStep == self.FilesPerStep - 1:
+                    yield
+                # Get the object pertaining to the given file, ignoring files which do not exist anymore
+                charOption = childrenByCaption.get(file)
+                if charOption is None:
+                    continue
+                # A ternary operator between "Off" and "On"
+                charOption.CurrentValue = charOption.Choices[int(settings[char][file])]
+                if settings[char][file]:
+                    enabledSkins += [(charOption.SkinFile, char)]
 
-        # Load all skin packages, this'll just be easier personally
-        self.InitializePackages()
+        return enabledSkins
 
-        # We have to do the options restoration ourself due to backwards compatability weirdness
-        self.RestoreSkinSettings()
+    def Enable(self) -> None:
+        # Read the saved settings straight away, before anything gets the chance to save over them
+        settings = self.ReadSkinSettings()
+        if self.LoadBudget.Caption in settings:
+            self.LoadBudget.CurrentValue = settings[self.LoadBudget.Caption]
+        self.Tasks.Budget = self.LoadBudget.CurrentValue / 1000
+
+        # Everything else gets spread out over the next few frames, driven by our tick hook
+        self.Tasks.Clear()
+        self.Polling = None
+        self.Loading = True
+        self.QueuedToggles = []
+        self.Tasks.Add(self.LoadSkins(settings))
 
-        # We wait before calling super().Enable() as we programmatically add to Options which is a bit weird
         super().Enable()
 
-    def Disable(self) -> None:
-        super().Disable()
-
-        for skin in self.DefaultSkins:
-            unrealsdk.Log(f"[CustomSkins] Restoring skin {skin} back to default")
-            self.RestoreSkinToDefault(skin)
-        self.DefaultSkins = {}
-
-    def RestoreSkinToDefault(self, matObj: str) -> None:
+    def SetLoadStatus(self, status: str) -> None:
+        """Shows how far along loading is in the mod's description"""
+        if status:
+            self.Description = f"{self.BaseDescription}<br><br>{status}"
+        else:
+            self.Description = self.BaseDescription
 
-        """Turns a python style array into a UE3 accepted `set` string"""
+    def LoadSkins(self, settings: Dict[str, Any]) -> Iterator[Any]:
+        """Loads the whole skin library, a small step at a time so the scheduler can spread it out over frames"""
+        try:
+            unrealsdk.Log("[CustomSkins] Loading skins...")
+            self.SetLoadStatus("Scanning skin files...")
+            skinFiles = yield from self.Tasks.RunInWorker(self.FindSkinFiles)
+            # Get the index entries of all the files, this'll only re-read files which have changed since last time
+            skinEntries = yield from self.Tasks.RunInWorker(self.Index.Refresh, skinFiles)
 
-        def setCommandizeString(string: str) -> str:
-            result = (
-                string.replace(": ", "=")
-                .replace("{", "(")
-                .replace("}", ")")
-                .replace("[", "(")
-                .replace("]", ")")
-                .replace("'", '"')
-            )
-            # This is a bit of a janky fix but its a bit more safer and annoying than doing more advanced string manipulation
-            if "Texture2D" in result:
-                result = result.replace("Texture2D ", "Texture2D'").replace(", E", "', E")
-            return result
+            # Add the skin files to the settings for easy config
+            yield from self.InitializeSkinSettings(skinFiles, skinEntries)
+            # We have to do the options restoration ourself due to backwards compatability weirdness
+            enabledSkins = yield from self.RestoreSkinSettings(settings)
+            # Anything toggled so far was toggled on the old options, which just got thrown away
+            enabledSkins = self.TakeQueuedToggles(enabledSkins)
+            yield
+
+            # Load the precompiled skin pack if there is one, files changed since it was made still get compiled
+            # Only the plans of skins which actually get enabled are decoded out of it
+            self.Compiler.Pack = yield from self.Tasks.RunInWorker(ReadPack, self.SkinPackPath)
+
+            # Apply every enabled skin in one go, so each material only gets found and set once
+            yield from self.EnableSkins(enabledSkins)
+            # Then apply anything toggled while we were enabling them, in the order they were toggled
+            while self.QueuedToggles:
+                filePath, character, enabled = self.QueuedToggles.pop(0)
+                self.SetSkinEnabled(filePath, character, enabled)
+                yield
+
+            # Now that the options actually exist make sure they're saved, in case they were saved while empty
+            # This has to stay on the game thread, ModMenu writes the same file from here whenever an option changes
+            ModMenu.SettingsManager.SaveModSettings(self)
+            self.SetLoadStatus("")
+            unrealsdk.Log(f"[CustomSkins] Finished loading, {len(enabledSkins)} skins enabled")
+        finally:
+            # Even if loading fails part way, toggles shouldn't be held back forever
+            self.Loading = False
 
-        """Modifies a property via UE3's `set` command"""
+    def Disable(self) -> None:
+        super().Disable()
 
-        def ModifyProperty(self: CustomSkins, obj: str, propName: str) -> None:
-            val = setCommandizeString(self.DefaultSkins[matObj][propName])
-            setCmd = f"set {obj} {propName} {val}"
-            unrealsdk.GetEngine().GamePlayers[0].Actor.ConsoleCommand(setCmd, False)
+        # Stop loading if we haven't finished yet, and ignore any poll that's still running
+        self.Tasks.Clear()
+        self.Polling = None
+        self.Loading = False
+        self.QueuedToggles = []
+        self.SetLoadStatus("")
 
-        ModifyProperty(self, matObj, "VectorParameterValues")
-        ModifyProperty(self, matObj, "TextureParameterValues")
-        ModifyProperty(self, matObj, "ScalarParameterValues")
+        unrealsdk.Log(f"[CustomSkins] Restoring {len(self.DefaultSkins)} skins back to default")
+        RestoreSnapshots(self.DefaultSkins.values())
+        self.DefaultSkins = {}
+        self.Layers.Reset()
 
     def ModOptionChanged(self, option: ModMenu.Options.Base, new_value: Any) -> None:
-        unrealsdk.Log(f"[CustomSkins] Changing {option.Caption} for character: {option.Character}")  # type: ignore[attr-defined]
-
-        # All skin file names etc for the given
-        characterSkins = self.skinnedCharacters[option.Character]  # type: ignore[attr-defined]
-
-        # A bit unwieldy but it seems to work, we check the non-extension vs extension
-        filePath = [x for x in characterSkins if os.path.splitext(os.path.basename(x))[0] == option.Caption][0]
+        if option is self.LoadBudget:
+            self.Tasks.Budget = new_value / 1000
+            return
 
-        if not os.path.exists(filePath):
-            unrealsdk.Log(f"    [CustomSkins] Unable to find file for {option.Caption}")
+        # Skins toggled while the options are being rebuilt get carried over to the new ones, then applied
+        if self.Loading:
+            self.QueuedToggles += [(option.SkinFile, option.Character, new_value)]  # type: ignore[attr-defined]
+            return
+        # Skins toggled while we're still loading get applied once loading's done, in the order they were toggled
+        if self.Tasks.Busy:
+            self.Tasks.Add(self.SetSkinEnabledLater(option.SkinFile, option.Character, new_value))  # type: ignore[attr-defined]
             return
 
-        materialObjects = []
-        with open(filePath, "r", encoding="utf-8") as openF:
-            modText = openF.read()
-            for materialObject in [x.split(" ")[0] for x in modText.split("\nset ")[1:]]:
-                if materialObject.startswith("CD_"):
-                    materialObjects += [materialObject]
+        unrealsdk.Log(f"[CustomSkins] Changing {option.Caption} for character: {option.Character}")  # type: ignore[attr-defined]
 
-        reloadedPackages = False
-        for matObj in materialObjects:
-            # Get UObject from the skin object name
-            obj = unrealsdk.FindObject("MaterialInstanceConstant", matObj)
+        self.SetSkinEnabled(option.SkinFile, option.Character, new_value)  # type: ignore[attr-defined]
+
+    def SetSkinEnabled(self, filePath: str, character: str, enabled: bool, oldPlan: Optional[SkinPlan] = None) -> None:
+        """
+        Enables or disables a skin file.
+        If the skin's previous plan is passed, any materials only it touched get updated as well.
+        """
+        # Get the compiled skin file, this only touches the disk the first time or if the file has changed
+        plan = self.Compiler.GetPlan(filePath, self.Index.Entries.get(filePath))
+        if plan is None:
+            unrealsdk.Log(f"    [CustomSkins] Unable to find file for {filePath}")
+            return
 
-            # Avoid non available objects
+        if enabled:
+            foundObjects = self.PrepareMaterials(character, plan.Materials)
+        else:
+            # We already hold onto every material we've skinned, so there's no need to find them again
+            foundObjects = {x: self.DefaultSkins[x].Object for x in plan.Materials if x in self.DefaultSkins}
+
+        materials = plan.Materials
+        if oldPlan is not None:
+            materials = materials + [x for x in oldPlan.Materials if x not in plan.Materials]
+
+        # Work out what every material this skin touches should now look like, and only set what actually changed
+        self.Layers.SetEnabled(filePath, plan, enabled)
+        for conflict in self.Layers.ApplyMaterials(materials, self.DefaultSkins):
+            unrealsdk.Log(f"    [CustomSkins] Overlapping skins -- {conflict}")
+        self.Layers.ApplyStatements(plan, foundObjects)
+
+    def SetSkinEnabledLater(self, filePath: str, character: str, enabled: bool) -> Iterator[None]:
+        """A scheduler task which toggles a skin once it reaches the front of the queue"""
+        unrealsdk.Log(f"[CustomSkins] Changing {filePath} for character: {character}")
+        self.SetSkinEnabled(filePath, character, enabled)
+        yield
+
+    def TakeQueuedToggles(self, enabledSkins: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """
+        Carries the skins toggled while loading over onto the new options, and clears the queue.
+        Returns the given (file path, character) enabled skins, updated to match.
+        """
+        for filePath, character, enabled in self.QueuedToggles:
+            option = self.SkinOptions.get(filePath)
+            # Ignore files which aren't valid skins anymore
+            if option is None:
+                continue
+            option.CurrentValue = enabled
+            enabledSkins = [x for x in enabledSkins if x[0] != filePath]
+            if enabled:
+                enabledSkins += [(filePath, character)]
+        self.QueuedToggles = []
+        return enabledSkins
+
+    def CompilePlans(self, skins: List[Tuple[str, str]]) -> List[Tuple[str, str, Optional[SkinPlan]]]:
+        """Compiles the given (file path, character) skins, this doesn't touch any UObjects so is safe on a worker"""
+        return [
+            (filePath, character, self.Compiler.GetPlan(filePath, self.Index.Entries.get(filePath)))
+            for filePath, character in skins
+        ]
+
+    def EnableSkins(self, skins: List[Tuple[str, str]]) -> Iterator[Any]:
+        """A scheduler task which enables a batch of (file path, character) skins, finding and setting materials once"""
+        # Compile anything that isn't already cached over on a worker thread
+        compiled = yield from self.Tasks.RunInWorker(self.CompilePlans, skins)
+
+        plans: List[Tuple[str, SkinPlan]] = []
+        # {"Character": ["Material Object"]}, deduplicated across all of the skins
+        characterMaterials: Dict[str, List[str]] = {}
+        for filePath, character, plan in compiled:
+            if plan is None:
+                unrealsdk.Log(f"    [CustomSkins] Unable to find file for {filePath}")
+                continue
+            plans += [(filePath, plan)]
+            materials = characterMaterials.setdefault(character, [])
+            materials += [x for x in plan.Materials if x not in materials]
+
+        foundObjects: Dict[str, unrealsdk.UObject] = {}
+        for character, materials in characterMaterials.items():
+            self.SetLoadStatus(f"Loading skins for {character}...")
+            foundObjects.update(self.PrepareMaterials(character, materials))
+            yield
+
+        for filePath, plan in plans:
+            self.Layers.SetEnabled(filePath, plan, True)
+        for index, matObj in enumerate(foundObjects):
+            self.SetLoadStatus(f"Applying skins... ({index + 1}/{len(foundObjects)})")
+            for conflict in self.Layers.ApplyMaterials([matObj], self.DefaultSkins):
+                unrealsdk.Log(f"    [CustomSkins] Overlapping skins -- {conflict}")
+            yield
+        for filePath, plan in plans:
+            self.Layers.ApplyStatements(plan, foundObjects)
+            yield
+
+    def PrepareMaterials(self, character: str, materials: List[str]) -> Dict[str, unrealsdk.UObject]:
+        """Finds and snapshots the given materials, returning all of the ones we could find"""
+        # Find all of the materials, this only searches for the ones we haven't already, and only loads the packages
+        # that the skins actually need. Anything found gets kept alive.
+        foundObjects = self.Resolver.ResolveMaterials(character, materials)
+
+        for matObj in materials:
+            obj = foundObjects.get(matObj)
+            # Avoid non available objects, must not be an actual MIC object.
             if obj is None:
-                if reloadedPackages:
-                    continue
-                # Initialize the package as a quick attempt
-                reloadedPackages = True
-                # Reload all customization packages
-                self.InitializePackages()
-                unrealsdk.Log("    [CustomSkins] Unable to find object, trying to reload object...")
-                # Retry this time
-                obj = unrealsdk.FindObject("MaterialInstanceConstant", matObj)
-                # We failed again, must not be an actual MIC object.
-                if obj is None:
-                    unrealsdk.Log(f"        [CustomSkins] Still could not find object -- {matObj} // {obj}")
-                    continue
+                unrealsdk.Log(f"        [CustomSkins] Could not find object -- {matObj}")
+                continue
 
-            # Keep our object alive
-            unrealsdk.KeepAlive(obj)
+            # Snapshot the material's parameters before we touch it
+            # You can't leave the default FArray as that'll get updated when the skin is applied (hence crash)
+            # Instead we copy it out into plain python values, which we can set straight back later
+            if matObj not in self.DefaultSkins:
+                self.DefaultSkins[matObj] = TakeSnapshot(matObj, obj)
+        return foundObjects
+
+    def RemoveSkin(self, filePath: str) -> None:
+        """Removes a skin file which no longer exists (or is no longer valid), reverting it if it was enabled"""
+        option = self.SkinOptions.pop(filePath, None)
+        plan = self.Layers.Plans.get(filePath)
+        if plan is not None:
+            self.Layers.SetEnabled(filePath, plan, False)
+            self.Layers.ApplyMaterials(plan.Materials, self.DefaultSkins)
+            self.Layers.ApplyStatements(plan, {})
+        self.Compiler.Forget(filePath)
+        if option is None:
+            return
 
-            # Revert the object back to the defaults
-            if not new_value and matObj in self.DefaultSkins:
-                self.RestoreSkinToDefault(matObj)
+        character = option.Character  # type: ignore[attr-defined]
+        self.skinnedCharacters[character].remove(filePath)
+        charOptions = self.GetCharacterOptions(character)
+        if charOptions is None:
+            return
+        charOptions.Children.remove(option)
+        # Get rid of the character's menu entirely if this was their last skin
+        if len(charOptions.Children) == 0:
+            self.Options.remove(charOptions)
+
+    def AddSkin(self, filePath: str, character: str) -> None:
+        """Adds an option for a newly found skin file"""
+        self.skinnedCharacters[character] += [filePath]
+        charOption = self.CreateSkinOption(character, filePath)
+        charOptions = self.GetCharacterOptions(character)
+        if charOptions is None:
+            # Keep the load budget slider at the bottom
+            newOptions = ModMenu.Options.Nested(character, f"Custom Skins for {character}", [charOption])
+            self.Options.insert(len(self.Options) - 1 if self.LoadBudget in self.Options else len(self.Options), newOptions)
+        else:
+            charOptions.Children += [charOption]
+
+    def GetCharacterOptions(self, character: str) -> Optional[ModMenu.Options.Nested]:
+        for charOptions in self.Options:
+            if charOptions.Caption == character:
+                return charOptions  # type: ignore[return-value]
+        return None
+
+    def PollSkins(self) -> Tuple[Optional[SkinChanges], Dict[str, Dict[str, Any]]]:
+        """
+        Checks the skin folder for changes, and if there are any brings the index up to date with them.
+        This doesn't touch any UObjects, so is run on a worker.
+        """
+        changes = self.Watcher.Poll()
+        if changes is None:
+            return None, {}
+        # Reuse the sizes and mtimes the watcher just read, this only re-reads the files which actually changed
+        skinEntries = self.Index.Refresh(list(self.Watcher.Snapshot), self.Watcher.Snapshot)
+        # Enabled skins which changed get re-applied, so compile them while we're still off the game thread
+        for skinFile in changes.Modified:
+            if skinFile in self.Layers.Plans and skinFile in skinEntries:
+                self.Compiler.GetPlan(skinFile, skinEntries[skinFile])
+        return changes, skinEntries
+
+    def StartPoll(self) -> None:
+        if self.Polling is None:
+            self.Polling = self.Tasks.Submit(self.PollSkins)
+
+    def FinishPoll(self) -> None:
+        """Applies the results of the current poll, if it's finished"""
+        if self.Polling is None or not self.Polling.done():
+            return
+        polling, self.Polling = self.Polling, None
+        try:
+            changes, skinEntries = polling.result()
+        except Exception:
+            unrealsdk.Log(traceback.format_exc())
+            return
+        if changes is not None:
+            self.Tasks.Add(self.ApplySkinChanges(changes, skinEntries))
+
+    def ApplySkinChanges(self, changes: SkinChanges, skinEntries: Dict[str, Dict[str, Any]]) -> Iterator[None]:
+        """
+        A scheduler task which patches just the options (and enabled skins) affected by changes to the skin folder.
+        Each enabled skin which gets re-applied is a step of its own.
+        """
+        added, removed, modified = changes
+        for skinFile in removed:
+            unrealsdk.Log(f"[CustomSkins] Skin file removed: {skinFile}")
+            self.RemoveSkin(skinFile)
+
+        for skinFile in added + modified:
+            entry = skinEntries.get(skinFile)
+            valid = entry is not None and entry["Valid"] and entry["Character"] in self.SupportedCharacters
+            if not valid:
+                unrealsdk.Log(f"    [CustomSkins] {skinFile} does not follow the specified format!")
+                self.RemoveSkin(skinFile)
                 continue
 
-            # Add to the default skins, casted to a string
-            # You can't leave the default FArray as that'll get updated with the exec (hence crash)
-            # Instead we pull from a python like string to a UE3 string and then run `set`
-            self.DefaultSkins.setdefault(
-                matObj,
-                {
-                    "VectorParameterValues": str(obj.VectorParameterValues),
-                    "TextureParameterValues": str(obj.TextureParameterValues),
-                    "ScalarParameterValues": str(obj.ScalarParameterValues),
-                },
-            )
-
-        # Run the file if we are enabling
-        if new_value:
-            execPath = os.path.join("Win32", filePath)
-            unrealsdk.GetEngine().GamePlayers[0].Actor.ConsoleCommand(f'exec "{execPath}"', False)
+            if skinFile not in self.SkinOptions:
+                unrealsdk.Log(f"[CustomSkins] Skin file added: {skinFile}")
+                self.AddSkin(skinFile, entry["Character"])  # type: ignore[index]
+                continue
+
+            unrealsdk.Log(f"[CustomSkins] Skin file modified: {skinFile}")
+            # Re-apply enabled skins live, using the old plan so we can revert anything it no longer sets
+            oldPlan = self.Layers.Plans.get(skinFile)
+            if oldPlan is not None:
+                self.SetSkinEnabled(skinFile, entry["Character"], True, oldPlan)  # type: ignore[index]
+                yield
+
+    def CompileSkinPack(self) -> None:
+        """Compiles every skin file into a single binary pack, which gets loaded in one read on the next enable"""
+        plans: Dict[str, SkinPlan] = {}
+        for skinFile in self.SkinOptions:
+            plan = self.Compiler.GetPlan(skinFile, self.Index.Entries.get(skinFile))
+            if plan is not None:
+                plans[skinFile] = plan
+        try:
+            WritePack(self.SkinPackPath, plans)
+        except OSError as ex:
+            unrealsdk.Log(f"[CustomSkins] Unable to write skin pack {self.SkinPackPath}: {ex}")
+            return
+        unrealsdk.Log(f"[CustomSkins] Compiled {len(plans)} skins into {self.SkinPackPath}")
+
+    def ToggleProfiling(self) -> None:
+        """Starts recording timings, or stops and dumps everything recorded since it was started"""
+        if not Profiler.Enabled:
+            Profiler.Reset()
+            Profiler.Enabled = True
+            unrealsdk.Log("[CustomSkins] Profiling started, press P again to stop")
+            return
+
+        Profiler.Enabled = False
+        for line in Profiler.FormatSummary():
+            unrealsdk.Log(f"[CustomSkins] {line}")
+        unrealsdk.Log(f"[CustomSkins] Object cache: {self.Resolver.Summary()}")
+        try:
+            extra = {"Skins": len(self.SkinOptions), "Enabled": len(self.Layers.Enabled)}
+            Profiler.Export(self.ProfilePath, dict(extra, Resolver=self.Resolver.Summary()))
+        except OSError:
+            return
+        unrealsdk.Log(f"[CustomSkins] Profile written to {self.ProfilePath}")
+
+    @ModMenu.Hook("WillowGame.WillowGameViewportClient.Tick")
+    def OnTick(self, caller: unrealsdk.UObject, function: unrealsdk.UFunction, params: unrealsdk.FStruct) -> bool:
+        # Keep loading if we haven't finished yet, there's no point watching files until then
+        if self.Tasks.Busy:
+            with Profiler.Time("SchedulerRun"):
+                self.Tasks.Run()
+            return True
+
+        if self.Polling is not None:
+            self.FinishPoll()
+        # Skins can only be changed from the main menu, so there's no point watching the folder anywhere else
+        elif self.Watcher.Due and self.IsInMenu():
+            self.StartPoll()
+        return True
+
+    @staticmethod
+    def IsInMenu() -> bool:
+        return unrealsdk.GetEngine().GetCurrentWorldInfo().GetMapName(True) == "menumap"  # type: ignore[no-any-return]
 
     def SettingsInputPressed(self, action: str) -> None:
         # Some versions of the SDK call `SettingsInputPressed` on pause
-        if unrealsdk.GetEngine().GetCurrentWorldInfo().GetMapName(True) != "menumap":
+        if not self.IsInMenu():
             return
 
-        # Refreshing the skins is practically just disabling and then enabling
-        if action == "Refresh Skins":
-            # Add the skin files to the settings for easy config
-            self.InitializeSkinSettings()
-            # Load all skin packages, this'll just be easier personally
-            self.InitializePackages()
-            # We have to do the options restoration ourself due to backwards compatability weirdness
-            self.RestoreSkinSettings()
+        if action in ("Refresh Skins", "Compile Skin Pack") and self.Tasks.Busy:
+            unrealsdk.Log("[CustomSkins] Still loading skins, please wait")
+        # Refreshing the skins just forces the watcher to check right now, only changed files get touched
+        # The changes get applied by our tick hook, once the poll's finished
+        elif action == "Refresh Skins":
+            # Give any objects we couldn't find another chance too
+            self.Resolver.ClearMisses()
+            self.StartPoll()
+        elif action == "Compile Skin Pack":
+            self.CompileSkinPack()
+        elif action == "Toggle Profiling":
+            self.ToggleProfiling()
         elif action == "Open Skins":
             # Open to "Win32/Mods/CustomSkins/Skins"
             os.startfile(os.path.join(os.path.dirname(sys.executable), "Mods", "CustomSkins", "Skins"))
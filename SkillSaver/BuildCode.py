@@ -0,0 +1,149 @@
+"""
+A compact, versioned encoding for builds, stored as a short base64 "build code" which can be shared between players.
+
+Layout (little endian):
+    Header:     u8 version, u8 class, u8 flags, u8 skill count
+    Grades:     one per skill in `PlayerSkillTree.Skills` (hidden skills included), 4 bits each, or 8 if any is above 15
+    Checksum:   u16, the low bits of the crc32 of everything before it
+
+Every skill in the tree is stored, so a build doesn't depend on which skills happen to be hidden.
+"""
+
+import base64
+import struct
+import zlib
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from Mods.SkillSaver.RestorePlanner import GetTargetGrades
+
+Version: int = 1
+
+# Index in here is the class's id, only ever append to this
+Classes: Tuple[str, ...] = (
+    "Mercenary",
+    "Soldier",
+    "Assassin",
+    "Siren",
+    "Mechromancer",
+    "Psycho",
+    "Prototype",
+    "Enforcer",
+    "Gladiator",
+    "Lawbringer",
+    "Baroness",
+    "Doppelganger",
+)
+
+# The skills old digit string builds were saved without, they were always saved against exactly this list
+# Only used to read those old builds back, so this must never change
+LegacyHiddenSkills: Dict[str, Tuple[int, ...]] = {"Mechromancer": (24,), "Psycho": (13, 37, 38)}
+
+_FlagWide = 1
+
+_Header = struct.Struct("<BBBB")
+_Checksum = struct.Struct("<H")
+
+
+class Build(NamedTuple):
+    CharacterClass: str
+    Grades: List[int]
+
+
+def _PackNibbles(grades: Sequence[int]) -> bytes:
+    # Shifting one big int by 4 bits moves every byte's value into its high nibble at once, no per grade loop needed
+    high, low = bytes(grades[0::2]), bytes(grades[1::2]).ljust((len(grades) + 1) // 2, b"\0")
+    return ((int.from_bytes(high, "big") << 4) | int.from_bytes(low, "big")).to_bytes(len(high), "big")
+
+
+def _UnpackNibbles(data: bytes, count: int) -> List[int]:
+    value = int.from_bytes(data, "big")
+    mask = int.from_bytes(b"\x0f" * len(data), "big")
+    high = ((value >> 4) & mask).to_bytes(len(data), "big")
+    low = (value & mask).to_bytes(len(data), "big")
+    grades = [0] * (len(data) * 2)
+    grades[0::2] = high
+    grades[1::2] = low
+    return grades[:count]
+
+
+def Pack(build: Build) -> bytes:
+    """Packs a build into its binary form, raises ValueError if it can't be"""
+    if build.CharacterClass not in Classes:
+        raise ValueError(f"Unknown character class {build.CharacterClass}")
+    if len(build.Grades) > 0xFF:
+        raise ValueError("Too many skills")
+    if any(x < 0 or x > 0xFF for x in build.Grades):
+        raise ValueError("Skill grade out of range")
+
+    wide = max(build.Grades, default=0) > 0xF
+    header = _Header.pack(Version, Classes.index(build.CharacterClass), _FlagWide if wide else 0, len(build.Grades))
+    data = header + (bytes(build.Grades) if wide else _PackNibbles(build.Grades))
+    return data + _Checksum.pack(zlib.crc32(data) & 0xFFFF)
+
+
+def Unpack(data: bytes) -> Build:
+    """Unpacks a build from its binary form, raises ValueError if it's corrupt or from a newer version"""
+    if len(data) < _Header.size + _Checksum.size:
+        raise ValueError("Build code is too short")
+    (checksum,) = _Checksum.unpack_from(data, len(data) - _Checksum.size)
+    data = data[: -_Checksum.size]
+    if zlib.crc32(data) & 0xFFFF != checksum:
+        raise ValueError("Build code is corrupt")
+
+    version, classIndex, flags, count = _Header.unpack_from(data, 0)
+    if version != Version:
+        raise ValueError(f"Unsupported build code version {version}")
+    if classIndex >= len(Classes):
+        raise ValueError("Unknown character class")
+
+    packed = data[_Header.size :]
+    wide = bool(flags & _FlagWide)
+    if len(packed) != (count if wide else (count + 1) // 2):
+        raise ValueError("Build code is the wrong length")
+    return Build(Classes[classIndex], list(packed) if wide else _UnpackNibbles(packed, count))
+
+
+def Encode(build: Build) -> str:
+    """Encodes a build as a build code"""
+    return base64.urlsafe_b64encode(Pack(build)).decode("ascii").rstrip("=")
+
+
+def Decode(code: str) -> Build:
+    """Decodes a build code, raises ValueError if it's not a valid one"""
+    code = code.strip()
+    try:
+        data = base64.urlsafe_b64decode(code + "=" * (-len(code) % 4))
+    except (ValueError, TypeError):
+        raise ValueError("Build code isn't valid base64")
+    return Unpack(data)
+
+
+def IsLegacy(build: str) -> bool:
+    """Checks if a stored build is in the old one digit per skill format, codes always start with an 'A'"""
+    return build.isdigit()
+
+
+def FromLegacy(characterClass: str, build: str) -> Build:
+    """Converts an old digit string build into a `Build`, hidden skills just come out as 0"""
+    hidden = LegacyHiddenSkills.get(characterClass, ())
+    grades = GetTargetGrades(build, len(build) + len(hidden), hidden)
+    return Build(characterClass, [x or 0 for x in grades])
+
+
+def GetStoredGrades(characterClass: str, build: str, hidden: Sequence[bool]) -> List[Optional[int]]:
+    """
+    Turns a stored build, in either format, into the grade every skill in the tree should be at.
+    `hidden` flags the hidden skills in the tree, they're left as None so they never get touched.
+    Raises ValueError if the build isn't for this class, or this tree.
+    """
+    skillCount = len(hidden)
+    if IsLegacy(build):
+        grades = GetTargetGrades(build, skillCount, LegacyHiddenSkills.get(characterClass, ()))
+    else:
+        decoded = Decode(build)
+        if decoded.CharacterClass != characterClass:
+            raise ValueError(f"Build is for the {decoded.CharacterClass}, not the {characterClass}")
+        if len(decoded.Grades) != skillCount:
+            raise ValueError(f"Build has {len(decoded.Grades)} skills, but the skill tree has {skillCount}")
+        grades = list(decoded.Grades)
+    return [None if isHidden else x for x, isHidden in zip(grades, hidden)]
@@ -0,0 +1,132 @@
+import bisect
+import json
+import os
+from collections import OrderedDict
+from itertools import islice
+from typing import Callable, Collection, Dict, List, Tuple
+
+from Mods.SkillSaver.AtomicFile import WriteAtomic
+
+SkillMap = Dict[str, Dict[str, str]]
+
+
+class BuildIndex:
+    """
+    A sorted index over the names of every saved build, plus which were used most recently, split by class.
+    Built the first time a class's builds get looked at, then kept up to date as they change, so searching and paging
+    through the builds only costs as much as the page being looked at.
+    The recently used builds are saved to disk, so they're still there next time the game starts.
+    """
+
+    Version: int = 1
+    # How many recently used builds to remember for each class
+    MaxRecent: int = 50
+
+    def __init__(self, RecentPath: str, GetBuilds: Callable[[], SkillMap]) -> None:
+        self.RecentPath: str = RecentPath
+        self.GetBuilds: Callable[[], SkillMap] = GetBuilds
+        # {Class: [(Search Key, Name)]}, kept sorted
+        self.Names: Dict[str, List[Tuple[str, str]]] = {}
+        # {Class: {Name: None}}, most recent last
+        self.Recent: Dict[str, "OrderedDict[str, None]"] = {}
+
+    def Load(self) -> None:
+        """Loads the recently used builds from disk, a missing or corrupt file is treated as empty"""
+        if not os.path.exists(self.RecentPath):
+            return
+        try:
+            with open(self.RecentPath, "r", encoding="utf-8") as recentFile:
+                data = json.load(recentFile)
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get("Version") != self.Version:
+            return
+        for characterClass, names in data.get("Recent", {}).items():
+            if isinstance(names, list):
+                self.Recent[characterClass] = OrderedDict((str(x), None) for x in names[-self.MaxRecent :])
+
+    def Save(self) -> None:
+        data = {"Version": self.Version, "Recent": {x: list(recent) for x, recent in self.Recent.items()}}
+        try:
+            with WriteAtomic(self.RecentPath) as recentFile:
+                json.dump(data, recentFile, separators=(",", ":"))
+        except OSError:
+            pass
+
+    @staticmethod
+    def _Key(name: str) -> Tuple[str, str]:
+        return (name.casefold(), name)
+
+    @classmethod
+    def _Find(cls, names: List[Tuple[str, str]], name: str) -> int:
+        """Returns where the name is in the sorted names, or -1 if it isn't"""
+        key = cls._Key(name)
+        index = bisect.bisect_left(names, key)
+        return index if index < len(names) and names[index] == key else -1
+
+    def _GetNames(self, characterClass: str) -> List[Tuple[str, str]]:
+        names = self.Names.get(characterClass)
+        if names is None:
+            names = sorted(self._Key(x) for x in self.GetBuilds().get(characterClass, {}))
+            self.Names[characterClass] = names
+        return names
+
+    def Add(self, characterClass: str, name: str) -> None:
+        """Adds a build to the index, does nothing if it's already in it. This doesn't count as using it."""
+        # If we haven't built the class's index yet, it'll pick this up when we do
+        names = self.Names.get(characterClass)
+        if names is None:
+            return
+        if self._Find(names, name) == -1:
+            bisect.insort(names, self._Key(name))
+
+    def Remove(self, characterClass: str, name: str) -> None:
+        recent = self.Recent.get(characterClass)
+        if recent is not None and name in recent:
+            del recent[name]
+            self.Save()
+        names = self.Names.get(characterClass)
+        if names is None:
+            return
+        index = self._Find(names, name)
+        if index != -1:
+            del names[index]
+
+    def Touch(self, characterClass: str, name: str) -> None:
+        """Marks a build as the most recently used one, should only be called when the player actually picks it"""
+        recent = self.Recent.setdefault(characterClass, OrderedDict())
+        recent.pop(name, None)
+        recent[name] = None
+        if len(recent) > self.MaxRecent:
+            recent.popitem(last=False)
+        self.Save()
+
+    def Search(
+        self, characterClass: str, prefix: str, start: int, count: int, exclude: Collection[str] = ()
+    ) -> Tuple[List[str], int]:
+        """
+        Returns `count` names, starting from the `start`th, of the builds whose names start with `prefix` (ignoring
+        case), in alphabetical order. Also returns how many builds match in total.
+        """
+        names = self._GetNames(characterClass)
+        key = prefix.casefold()
+        low = bisect.bisect_left(names, (key, ""))
+        # Every name starting with the prefix sorts before the prefix followed by the highest possible character
+        high = bisect.bisect_left(names, (key + "\U0010ffff", ""), low)
+
+        matches = (names[x][1] for x in range(low, high) if names[x][1] not in exclude)
+        total = high - low - sum(1 for x in exclude if x.casefold().startswith(key) and self._Find(names, x) != -1)
+        return list(islice(matches, start, start + count)), total
+
+    def SearchRecent(
+        self, characterClass: str, prefix: str, start: int, count: int, exclude: Collection[str] = ()
+    ) -> Tuple[List[str], int]:
+        """Same as `Search`, but only over the recently used builds, most recent first"""
+        key = prefix.casefold()
+        builds = self.GetBuilds().get(characterClass, {})
+        matches = [
+            x
+            for x in reversed(self.Recent.get(characterClass, OrderedDict()))
+            if x.casefold().startswith(key) and x not in exclude and x in builds
+        ]
+        return matches[start : start + count], len(matches)
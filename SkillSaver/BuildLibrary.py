@@ -0,0 +1,195 @@
+"""
+Bulk export and import of saved builds, as JSON lines files with one `{"Class", "Name", "Build"}` object per line.
+
+Imports get read a line at a time and saved in small batches, so even huge libraries only ever have a few lines in
+memory at once, and the import can be spread over as many frames as it needs.
+"""
+
+import hashlib
+import json
+from typing import Callable, Collection, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from Mods.SkillSaver import BuildCode
+from Mods.SkillSaver.AtomicFile import WriteAtomic
+
+SkillMap = Dict[str, Dict[str, str]]
+
+# How many imported builds get saved at once
+BatchSize: int = 64
+# How many saved builds get hashed between each yield
+HashesPerYield: int = 64
+
+
+def ToBuild(characterClass: str, build: str) -> BuildCode.Build:
+    """Decodes a stored build, in either format, raises ValueError if it's not a valid one"""
+    return BuildCode.FromLegacy(characterClass, build) if BuildCode.IsLegacy(build) else BuildCode.Decode(build)
+
+
+def ContentHash(build: BuildCode.Build, hidden: Optional[Sequence[bool]] = None) -> bytes:
+    """
+    A hash of the grades of a build, the same for any two builds which would restore to exactly the same tree.
+    Hidden skills never get restored, so their grades are left out. `hidden` flags them in the class's tree, if it's
+    not known (or doesn't match the build) the skills old builds were saved without are used instead.
+    """
+    if hidden is None or len(hidden) != len(build.Grades):
+        legacyHidden = BuildCode.LegacyHiddenSkills.get(build.CharacterClass, ())
+        hidden = [x in legacyHidden for x in range(len(build.Grades))]
+    grades = bytes(0 if isHidden else x for x, isHidden in zip(build.Grades, hidden))
+    return hashlib.blake2b(grades, digest_size=8).digest()
+
+
+def ExportBuilds(path: str, skillMap: SkillMap, classes: Optional[Collection[str]] = None) -> int:
+    """
+    Writes every saved build of the given classes, or of every class if None, to a JSON lines file.
+    Returns how many builds were written.
+    """
+    count = 0
+    # Written atomically, so a failed export never leaves a half written file behind
+    with WriteAtomic(path) as exportFile:
+        for characterClass, builds in skillMap.items():
+            if classes is not None and characterClass not in classes:
+                continue
+            for name, build in builds.items():
+                # The default empty build is in every library, no point sharing it
+                if name == "None":
+                    continue
+                # Old digit string builds only make sense alongside the list of hidden skills, so convert them
+                if BuildCode.IsLegacy(build):
+                    try:
+                        build = BuildCode.Encode(BuildCode.FromLegacy(characterClass, build))
+                    except ValueError:
+                        continue
+                exportFile.write(json.dumps({"Class": characterClass, "Name": name, "Build": build}) + "\n")
+                count += 1
+    return count
+
+
+class ImportResult:
+    """Running totals for an import, updated as it goes"""
+
+    def __init__(self) -> None:
+        self.Imported: int = 0
+        # Builds which were skipped as an identical build was already saved
+        self.Duplicates: int = 0
+        # Builds which were saved under a different name, as their name was already taken
+        self.Renamed: int = 0
+        self.Rejected: int = 0
+        # The line number and reason for the first few lines which couldn't be imported
+        self.Reasons: List[Tuple[int, str]] = []
+        self.Finished: bool = False
+
+    # Only keep this many reasons, so a file full of junk can't use up a load of memory
+    MaxReasons: int = 10
+
+    def Reject(self, lineNumber: int, reason: str) -> None:
+        self.Rejected += 1
+        if len(self.Reasons) < self.MaxReasons:
+            self.Reasons += [(lineNumber, reason)]
+
+
+def ImportBuilds(
+    path: str,
+    skillMap: SkillMap,
+    getHidden: Callable[[str], Optional[Sequence[bool]]],
+    save: Callable[[List[Tuple[str, str, str]]], None],
+    result: ImportResult,
+) -> Iterator[None]:
+    """
+    Imports every build in a JSON lines file, yielding after each line so it can be spread over multiple ticks.
+    Builds have to be for a class in `skillMap`, and have as many skills as the class's tree, if `getHidden` knows it.
+    Builds which restore to the same tree as one which is already saved get skipped, and names which are taken get a
+    number added.
+    Accepted builds get passed to `save` in batches of (class, name, build).
+    Raises OSError if the file can't be opened, or ValueError if it isn't UTF-8.
+    """
+    # {Class: {Content Hash}}, only built for a class once it shows up in the file
+    hashes: Dict[str, Set[bytes]] = {}
+    # {Class: [Hidden]}, which skills in each class's tree are hidden, if we know
+    hiddenSkills: Dict[str, Optional[Sequence[bool]]] = {}
+    batch: List[Tuple[str, str, str]] = []
+    # Names in the current batch, which aren't in the skill map yet
+    batchNames: Set[Tuple[str, str]] = set()
+
+    def _HashSaved(characterClass: str, classHashes: Set[bytes]) -> Iterator[None]:
+        # Hashing every saved build takes a while with big libraries, so spread it out too
+        for index, build in enumerate(list(skillMap[characterClass].values())):
+            try:
+                classHashes.add(ContentHash(ToBuild(characterClass, build), hiddenSkills[characterClass]))
+            except ValueError:
+                pass
+            if index % HashesPerYield == HashesPerYield - 1:
+                yield
+
+    def _IsTaken(characterClass: str, name: str) -> bool:
+        return name in skillMap[characterClass] or (characterClass, name) in batchNames
+
+    try:
+        with open(path, "r", encoding="utf-8") as importFile:
+            for lineNumber, line in enumerate(importFile, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                    if not isinstance(record, dict):
+                        raise ValueError("Line isn't an object")
+                    name = str(record["Name"]).strip()
+                    build = BuildCode.Decode(str(record["Build"]))
+                except (ValueError, KeyError) as ex:
+                    result.Reject(lineNumber, str(ex) if isinstance(ex, ValueError) else f"Missing {ex}")
+                    yield
+                    continue
+
+                characterClass = build.CharacterClass
+                if characterClass in skillMap and characterClass not in hiddenSkills:
+                    hiddenSkills[characterClass] = getHidden(characterClass)
+                hidden = hiddenSkills.get(characterClass)
+                if characterClass not in skillMap:
+                    reason = f"{characterClass} isn't in this game"
+                elif record.get("Class", characterClass) != characterClass:
+                    reason = f"Build is for the {characterClass}, but is labeled as the {record['Class']}"
+                elif hidden is not None and len(build.Grades) != len(hidden):
+                    reason = f"Build has {len(build.Grades)} skills, but the skill tree has {len(hidden)}"
+                elif name == "":
+                    reason = "Build has no name"
+                else:
+                    reason = ""
+                if reason:
+                    result.Reject(lineNumber, reason)
+                    yield
+                    continue
+
+                classHashes = hashes.get(characterClass)
+                if classHashes is None:
+                    classHashes = hashes[characterClass] = set()
+                    yield from _HashSaved(characterClass, classHashes)
+                contentHash = ContentHash(build, hidden)
+                if contentHash in classHashes:
+                    result.Duplicates += 1
+                    yield
+                    continue
+                classHashes.add(contentHash)
+
+                # Never overwrite anything, find the first free name instead
+                if _IsTaken(characterClass, name):
+                    suffix = 2
+                    while _IsTaken(characterClass, f"{name} ({suffix})"):
+                        suffix += 1
+                    name = f"{name} ({suffix})"
+                    result.Renamed += 1
+
+                batch += [(characterClass, name, BuildCode.Encode(build))]
+                batchNames.add((characterClass, name))
+                result.Imported += 1
+                if len(batch) >= BatchSize:
+                    save(batch)
+                    batch, batchNames = [], set()
+                yield
+    except UnicodeDecodeError as ex:
+        # There's no telling where the next line starts in text we can't decode, but keep everything before it
+        if batch:
+            save(batch)
+        raise ValueError(f"File isn't UTF-8 text, {ex.reason}") from ex
+
+    if batch:
+        save(batch)
+    result.Finished = True
@@ -0,0 +1,183 @@
+"""
+Write-behind persistence for the SkillMap.
+
+Rewriting the settings file on every save gets slower the more builds there are, and a crash part way through the
+write loses all of them. Instead each change gets appended to a small journal straight away, and the full map only
+gets written out (compacted) once changes stop coming in for a while, or when the mod gets disabled.
+
+Compaction writes a snapshot of the full map atomically before touching the settings file, and only clears the
+journal after both are written, so on startup the snapshot plus the journal always gets back the latest builds, even
+if the settings file was left half written. Once the settings file is written the snapshot gets deleted again, so it
+only ever exists if a compaction got interrupted, and never overrides a settings file that's been restored or edited.
+"""
+
+import unrealsdk
+import json
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from Mods.SkillSaver.AtomicFile import WriteAtomic
+
+SkillMap = Dict[str, Dict[str, str]]
+
+
+class BuildStore:
+    """Records changes to the SkillMap in a journal, compacting it into the settings file after a quiet period"""
+
+    Version: int = 1
+    # How long to wait after the last change before compacting, in seconds
+    Delay: float = 5.0
+    # Compact anyway once this many changes have built up, so the journal never gets long enough to slow down loading
+    MaxPending: int = 100
+    # How long to wait before trying again if compacting fails, whatever went wrong probably hasn't fixed itself yet
+    RetryDelay: float = 30.0
+
+    def __init__(
+        self,
+        JournalPath: str,
+        SnapshotPath: str,
+        GetBuilds: Callable[[], SkillMap],
+        SaveSettings: Callable[[], None],
+        OnChange: Optional[Callable[[str, str, Optional[str]], None]] = None,
+    ) -> None:
+        self.JournalPath: str = JournalPath
+        self.SnapshotPath: str = SnapshotPath
+        self.GetBuilds: Callable[[], SkillMap] = GetBuilds
+        # Writes out the main settings file, only called on compaction
+        self.SaveSettings: Callable[[], None] = SaveSettings
+        # Called with the class, name and new build (None if deleted) whenever a build gets changed
+        self.OnChange: Optional[Callable[[str, str, Optional[str]], None]] = OnChange
+        # How many changes are in the journal, and when the latest one was made
+        self.Pending: int = 0
+        self.LastChange: float = 0.0
+        # If compacting failed, don't try again on a tick until this time
+        self.RetryAt: float = 0.0
+
+    def Load(self) -> None:
+        """
+        Brings the SkillMap up to date with the snapshot and journal, should be called after the settings are loaded.
+        Anything that was in the journal gets compacted on the next tick.
+        """
+        builds = self.GetBuilds()
+        snapshot = self._ReadSnapshot()
+        if snapshot is not None:
+            # The snapshot only survives if the settings file didn't get fully written, so it's never older than it,
+            # and can replace whole classes outright
+            for characterClass, classBuilds in snapshot.items():
+                builds[characterClass] = dict(classBuilds)
+
+        if not os.path.exists(self.JournalPath):
+            return
+        try:
+            with open(self.JournalPath, "r", encoding="utf-8") as journalFile:
+                lines = journalFile.readlines()
+        except OSError:
+            return
+        for line in lines:
+            try:
+                record = json.loads(line)
+                characterClass, name, build = record["Class"], record["Name"], record["Build"]
+            except (ValueError, KeyError, TypeError):
+                # Only the last line can be broken, if the game closed while it was being written
+                break
+            if build is None:
+                builds.get(characterClass, {}).pop(name, None)
+            else:
+                builds.setdefault(characterClass, {})[name] = build
+            self.Pending += 1
+        # Anything replayed is already overdue
+        self.LastChange = 0.0
+
+    def _ReadSnapshot(self) -> Optional[SkillMap]:
+        if not os.path.exists(self.SnapshotPath):
+            return None
+        try:
+            with open(self.SnapshotPath, "r", encoding="utf-8") as snapshotFile:
+                data = json.load(snapshotFile)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get("Version") != self.Version:
+            return None
+        if not isinstance(data.get("Builds"), dict):
+            return None
+        return data["Builds"]  # type: ignore[no-any-return]
+
+    def Set(self, characterClass: str, name: str, build: str) -> None:
+        """Saves a build under the given name, replacing any existing one"""
+        self.SetMany([(characterClass, name, build)])
+
+    def SetMany(self, builds: List[Tuple[str, str, str]]) -> None:
+        """Saves a batch of (class, name, build)s at once, with a single write to the journal"""
+        skillMap = self.GetBuilds()
+        for characterClass, name, build in builds:
+            skillMap.setdefault(characterClass, {})[name] = build
+        self._Append([{"Class": x, "Name": name, "Build": build} for x, name, build in builds])
+        if self.OnChange is not None:
+            for characterClass, name, build in builds:
+                self.OnChange(characterClass, name, build)
+
+    def Delete(self, characterClass: str, name: str) -> str:
+        """Deletes a build, returning it"""
+        build = self.GetBuilds()[characterClass].pop(name)
+        self._Append([{"Class": characterClass, "Name": name, "Build": None}])
+        if self.OnChange is not None:
+            self.OnChange(characterClass, name, None)
+        return build
+
+    def _Append(self, records: List[Dict[str, Any]]) -> None:
+        self.Pending += len(records)
+        try:
+            # One short line per change, so a crash can at worst cut off the change being written
+            with open(self.JournalPath, "a", encoding="utf-8") as journalFile:
+                journalFile.write("".join(json.dumps(x) + "\n" for x in records))
+                journalFile.flush()
+                os.fsync(journalFile.fileno())
+        except OSError:
+            # If we can't journal it, fall back on writing out everything straight away
+            self.Flush()
+            return
+        self.LastChange = time.time()
+
+    def Tick(self) -> None:
+        """Compacts the journal if it's been quiet for long enough, cheap enough to call every frame"""
+        if self.Pending == 0 or time.time() < self.RetryAt:
+            return
+        if self.Pending >= self.MaxPending or time.time() - self.LastChange >= self.Delay:
+            self.Flush()
+
+    def _WriteSnapshot(self) -> bool:
+        data = {"Version": self.Version, "Builds": self.GetBuilds()}
+        try:
+            with WriteAtomic(self.SnapshotPath) as snapshotFile:
+                json.dump(data, snapshotFile)
+        except OSError:
+            return False
+        return True
+
+    def Flush(self) -> None:
+        """Compacts any pending changes into the snapshot and settings file, then clears the journal and snapshot"""
+        if self.Pending == 0:
+            return
+        snapshotSaved = self._WriteSnapshot()
+        try:
+            self.SaveSettings()
+        except Exception as ex:
+            # The journal still has everything, so just log it and try again later
+            unrealsdk.Log(f"[SkillSaver] Unable to save settings, will try again later: {ex}")
+            self.RetryAt = time.time() + self.RetryDelay
+            return
+        # Without a snapshot the settings file would be the only copy, and it isn't written atomically
+        if not snapshotSaved:
+            unrealsdk.Log(f"[SkillSaver] Unable to write {self.SnapshotPath}, keeping the journal until it can be")
+            self.RetryAt = time.time() + self.RetryDelay
+            return
+        self.RetryAt = 0.0
+        # The settings file is complete now, so neither is needed any more
+        # The journal goes first, replaying it over the settings file again is harmless if we only get that far
+        for path in (self.JournalPath, self.SnapshotPath):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.Pending = 0
@@ -0,0 +1,83 @@
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from Mods.SkillSaver.RestorePlanner import RestorePlan
+from Mods.SkillSaver.SkillLayout import SkillLayout
+
+
+class BuildRules(NamedTuple):
+    """The rules a class's builds have to follow, flattened out of its layout so checking a build is just lookups"""
+
+    # The short name of each skill, for error messages
+    Names: List[str]
+    MaxGrades: List[int]
+    Hidden: List[bool]
+    # For each branch, the indexes of the skills in each of its tiers
+    BranchTiers: List[List[List[int]]]
+    # For each branch, how many points have to be spent in the tiers before each tier to unlock it
+    TierUnlocks: List[List[int]]
+
+
+# {Class: (Layout, Rules)}, rebuilt whenever the class's layout changes
+_RuleCache: Dict[str, Tuple[SkillLayout, BuildRules]] = {}
+
+
+def GetRules(layout: SkillLayout) -> BuildRules:
+    """Returns the rules for a layout, only building them the first time they're needed"""
+    cached = _RuleCache.get(layout.CharacterClass)
+    if cached is not None and cached[0] is layout:
+        return cached[1]
+
+    branchTiers: List[List[List[int]]] = [[[] for _ in unlocks] for unlocks in layout.TierUnlocks]
+    for index, skill in enumerate(layout.Skills):
+        if skill.Hidden or not 0 <= skill.Branch < len(branchTiers):
+            continue
+        if 0 <= skill.Tier < len(branchTiers[skill.Branch]):
+            branchTiers[skill.Branch][skill.Tier] += [index]
+    rules = BuildRules(
+        [x.Name.split(".")[-1] for x in layout.Skills],
+        [x.MaxGrade for x in layout.Skills],
+        [x.Hidden for x in layout.Skills],
+        branchTiers,
+        [list(x) for x in layout.TierUnlocks],
+    )
+    _RuleCache[layout.CharacterClass] = (layout, rules)
+    return rules
+
+
+def ValidateBuild(
+    rules: BuildRules, current: Sequence[int], target: Sequence[Optional[int]], plan: RestorePlan, points: int
+) -> None:
+    """
+    Checks that a restore plan can actually be applied, before anything gets sent to the server.
+    `points` is how many skill points the player will have to spend, including any a reset would refund.
+    Raises ValueError with the reason if it can't be.
+    """
+    if len(target) != len(rules.MaxGrades):
+        raise ValueError(f"Build has {len(target)} skills, but the skill tree has {len(rules.MaxGrades)}")
+
+    for index, grade in enumerate(target):
+        if grade is None:
+            continue
+        if rules.Hidden[index]:
+            raise ValueError(f"{rules.Names[index]} is a hidden skill, so can't be upgraded")
+        if grade > rules.MaxGrades[index]:
+            raise ValueError(f"{rules.Names[index]} only goes up to grade {rules.MaxGrades[index]}, build has {grade}")
+
+    # The grades the tree will end up with, hidden skills stay where they are (or get reset)
+    final = [
+        (0 if plan.Reset else grade) if targetGrade is None else targetGrade
+        for grade, targetGrade in zip(current, target)
+    ]
+    for branchIndex, (tiers, unlocks) in enumerate(zip(rules.BranchTiers, rules.TierUnlocks)):
+        spent = 0
+        for tierIndex, (skills, required) in enumerate(zip(tiers, unlocks)):
+            used = [x for x in skills if final[x] > 0]
+            if used and spent < required:
+                raise ValueError(
+                    f"{rules.Names[used[0]]} is in tier {tierIndex + 1} of branch {branchIndex}, which needs"
+                    f" {required} points in the tiers before it, build only has {spent}"
+                )
+            spent += sum(final[x] for x in skills)
+
+    if len(plan.Upgrades) > points:
+        raise ValueError(f"Build needs {len(plan.Upgrades)} skill points, only {points} are available")
@@ -0,0 +1,82 @@
+import unrealsdk
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+# Certain classes have some different names from their CharacterClass
+_ClassNames: Dict[str, str] = {
+    "CharClass_LilacPlayerClass": "Psycho",
+    "charclass_doppelganger": "Doppelganger",
+}
+
+
+def GetClassName(name: str) -> str:
+    """Turns the name of a class definition into the name SkillSaver stores builds under"""
+    return _ClassNames.get(name, name.replace("CharClass_", ""))
+
+
+class PlayerState(NamedTuple):
+    """Everything the menus need to know about the player, read from the engine all in one go"""
+
+    Controller: unrealsdk.UObject
+    CharacterClass: str
+    # The live skill tree, None if we only have the cached save game to go off of (such as in the main menu)
+    SkillTree: Optional[unrealsdk.UObject]
+    SaveGame: Optional[unrealsdk.UObject]
+    # The unspent skill points, and the unscaled cost of resetting the skill tree, both 0 without a live tree
+    SkillPoints: int
+    ResetCost: int
+
+    @property
+    def Skills(self) -> Any:
+        """The skills in the tree, read fresh each time as their grades change"""
+        if self.SkillTree is not None:
+            return self.SkillTree.Skills
+        return self.SaveGame.SkillData  # type: ignore[union-attr]
+
+
+def _GetController() -> unrealsdk.UObject:
+    return unrealsdk.GetEngine().GamePlayers[0].Actor
+
+
+def ReadPlayerState(controller: unrealsdk.UObject) -> Optional[PlayerState]:
+    """Reads the player's state off of their controller, returns None if there's no character loaded at all"""
+    if controller is None:
+        return None
+    # Check if the player is loaded
+    if controller.CharacterClass is not None and controller.PlayerSkillTree is not None:
+        return PlayerState(
+            controller,
+            GetClassName(controller.CharacterClass.GetName()),
+            controller.PlayerSkillTree,
+            None,
+            controller.PlayerReplicationInfo.GeneralSkillPoints,
+            controller.GetSkillTreeResetCost(),
+        )
+    # Get the cached save game for the player
+    saveGame = controller.GetCachedSaveGame()
+    if saveGame is None or saveGame.PlayerClassDefinition is None or saveGame.SkillData is None:
+        return None
+    return PlayerState(controller, GetClassName(saveGame.PlayerClassDefinition.GetName()), None, saveGame, 0, 0)
+
+
+class PlayerStateCache:
+    """
+    Holds on to the player's state between menu actions, so they don't all have to walk the engine to get it.
+    Invalidated by hooks whenever the character, save game, or skill points change, then re-read the next time it's
+    needed. The controller getter can be swapped out, for testing against a fake one.
+    """
+
+    def __init__(self, GetController: Callable[[], unrealsdk.UObject] = _GetController) -> None:
+        self.GetController: Callable[[], unrealsdk.UObject] = GetController
+        self.State: Optional[PlayerState] = None
+        # How many times the state has actually been read from the engine
+        self.Reads: int = 0
+
+    def Get(self) -> Optional[PlayerState]:
+        """Returns the player's state, or None if there's no character loaded at all"""
+        if self.State is None:
+            self.Reads += 1
+            self.State = ReadPlayerState(self.GetController())
+        return self.State
+
+    def Invalidate(self) -> None:
+        self.State = None
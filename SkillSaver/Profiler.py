@@ -0,0 +1,135 @@
+"""
+Opt-in timing for every engine call and file read the mod makes.
+While `Enabled` is False, `Time` hands back a shared do-nothing context so the instrumented call sites cost next to nothing.
+"""
+
+import json
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+Enabled: bool = False
+
+# How many samples we keep per call site for working out percentiles, past this we reservoir sample
+MaxSamples: int = 4096
+
+
+class _Stat:
+    def __init__(self) -> None:
+        self.Calls: int = 0
+        self.Total: float = 0.0
+        self.Bytes: int = 0
+        self.Samples: List[float] = []
+
+    def Add(self, duration: float) -> None:
+        self.Calls += 1
+        self.Total += duration
+        if len(self.Samples) < MaxSamples:
+            self.Samples.append(duration)
+        else:
+            index = random.randrange(self.Calls)
+            if index < MaxSamples:
+                self.Samples[index] = duration
+
+    def Percentile(self, percent: float) -> float:
+        if not self.Samples:
+            return 0.0
+        ordered = sorted(self.Samples)
+        return ordered[int(round((len(ordered) - 1) * percent / 100))]
+
+
+Stats: Dict[str, _Stat] = {}
+
+
+class _Timer:
+    def __init__(self, name: str) -> None:
+        self.Name = name
+        self.Start = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self.Start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        Record(self.Name, time.perf_counter() - self.Start)
+
+
+class _NullTimer:
+    def __enter__(self) -> "_NullTimer":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        pass
+
+
+_Null = _NullTimer()
+
+
+def Time(name: str) -> Any:
+    """Returns a context manager which times its block under the given name, if profiling is enabled"""
+    return _Timer(name) if Enabled else _Null
+
+
+def Call(name: str, function: Callable[..., T], *args: Any) -> T:
+    """Calls a function, timing it under the given name if profiling is enabled"""
+    if not Enabled:
+        return function(*args)
+    with _Timer(name):
+        return function(*args)
+
+
+def Record(name: str, duration: float) -> None:
+    stat = Stats.get(name)
+    if stat is None:
+        stat = Stats[name] = _Stat()
+    stat.Add(duration)
+
+
+def AddBytes(name: str, count: int) -> None:
+    """Adds to the number of bytes read under the given name"""
+    if not Enabled:
+        return
+    stat = Stats.get(name)
+    if stat is None:
+        stat = Stats[name] = _Stat()
+    stat.Bytes += count
+
+
+def Reset() -> None:
+    Stats.clear()
+
+
+def Summary() -> Dict[str, Dict[str, float]]:
+    """Returns {"Name": {"Calls", "TotalMs", "P50Ms", "P99Ms", "Bytes"}} for every call site we've seen"""
+    return {
+        name: {
+            "Calls": stat.Calls,
+            "TotalMs": stat.Total * 1000,
+            "P50Ms": stat.Percentile(50) * 1000,
+            "P99Ms": stat.Percentile(99) * 1000,
+            "Bytes": stat.Bytes,
+        }
+        for name, stat in sorted(Stats.items(), key=lambda x: x[1].Total, reverse=True)
+    }
+
+
+def FormatSummary() -> List[str]:
+    """Formats the summary as the lines of a table, slowest call sites first"""
+    lines = [f"{'Name':<32}{'Calls':>10}{'Total ms':>12}{'p50 ms':>10}{'p99 ms':>10}{'Bytes':>12}"]
+    for name, stat in Summary().items():
+        lines += [
+            f"{name:<32}{stat['Calls']:>10}{stat['TotalMs']:>12.3f}{stat['P50Ms']:>10.3f}"
+            f"{stat['P99Ms']:>10.3f}{stat['Bytes']:>12}"
+        ]
+    return lines
+
+
+def Export(path: str, extra: Optional[Dict[str, Any]] = None) -> None:
+    """Writes the summary out to a JSON file"""
+    data: Dict[str, Any] = {"Time": time.time(), "Stats": Summary()}
+    if extra is not None:
+        data.update(extra)
+    with open(path, "w", encoding="utf-8") as profileFile:
+        json.dump(data, profileFile, indent=4)
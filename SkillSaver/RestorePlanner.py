@@ -0,0 +1,43 @@
+from typing import List, NamedTuple, Optional, Sequence
+
+
+class RestorePlan(NamedTuple):
+    """What it takes to get from the current skill tree to a saved build"""
+
+    # If the tree has to be reset first, only needed if a point has to be taken out of a skill
+    Reset: bool
+    # Indexes into `PlayerSkillTree.Skills`, one for each point to add, in the order they have to be added
+    Upgrades: List[int]
+
+
+def GetTargetGrades(build: str, skillCount: int, skillIndexBlacklist: Sequence[int]) -> List[Optional[int]]:
+    """
+    Expands a build string into the grade every skill in the tree should end up at.
+    Blacklisted (hidden) skills aren't stored in builds, so they're left as None.
+    """
+    blacklist = set(skillIndexBlacklist)
+    # Skills past the end of the build are at 0
+    digits = iter(build)
+    return [None if x in blacklist else int(next(digits, "0")) for x in range(skillCount)]
+
+
+def PlanRestore(
+    current: Sequence[int], target: Sequence[Optional[int]], tiers: Optional[Sequence[int]] = None
+) -> RestorePlan:
+    """
+    Works out the fewest upgrades needed to turn the current grades into the target ones.
+    Points can only be added one at a time, so if any skill is above its target the whole tree has to be reset and
+    rebuilt from scratch. Otherwise only the missing points get added.
+    Upgrades are sorted by the tier of their skill if given, otherwise by skill order, so earlier tiers get their points
+    before later ones need them.
+    """
+    reset = any(x is not None and grade > x for grade, x in zip(current, target))
+    upgrades: List[int] = []
+    for index, (grade, targetGrade) in enumerate(zip(current, target)):
+        if targetGrade is None:
+            continue
+        missing = targetGrade if reset else targetGrade - grade
+        upgrades += [index] * missing
+    if tiers is not None:
+        upgrades.sort(key=lambda x: tiers[x])  # type: ignore[index]
+    return RestorePlan(reset, upgrades)
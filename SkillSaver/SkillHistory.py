@@ -0,0 +1,118 @@
+import os
+import json
+from typing import Dict, List, Optional, Tuple
+
+from Mods.SkillSaver.AtomicFile import WriteAtomic
+
+# A change from one entry to the next, as (skill index, new grade) for each skill which changed
+Delta = List[Tuple[int, int]]
+
+
+class _ClassHistory:
+    """The history of one class, the oldest entry in full, then each one after as a delta against the one before it"""
+
+    def __init__(self, Base: List[int], Deltas: List[Delta]) -> None:
+        self.Base: List[int] = Base
+        self.Deltas: List[Delta] = Deltas
+        # The newest entry in full, so pushing doesn't have to replay every delta to diff against it
+        self.Latest: List[int] = list(Base)
+        for delta in Deltas:
+            _Apply(self.Latest, delta)
+
+    def __len__(self) -> int:
+        return len(self.Deltas) + 1
+
+
+def _Apply(grades: List[int], delta: Delta) -> None:
+    for index, grade in delta:
+        grades[index] = grade
+
+
+def _Diff(old: List[int], new: List[int]) -> Delta:
+    return [(index, grade) for index, (oldGrade, grade) in enumerate(zip(old, new)) if oldGrade != grade]
+
+
+class SkillHistory:
+    """
+    A bounded history of each class's skill allocations, from before each restore, so a respec can be undone.
+    Only the oldest entry is stored in full, so a long history still takes up about as much space as a single tree.
+    """
+
+    Version: int = 1
+
+    def __init__(self, HistoryPath: str, MaxEntries: int = 20) -> None:
+        self.HistoryPath: str = HistoryPath
+        self.MaxEntries: int = MaxEntries
+        self.Classes: Dict[str, _ClassHistory] = {}
+
+    def Load(self) -> None:
+        if not os.path.exists(self.HistoryPath):
+            return
+        try:
+            with open(self.HistoryPath, "r", encoding="utf-8") as historyFile:
+                data = json.load(historyFile)
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get("Version") != self.Version:
+            return
+        for characterClass, history in data.get("Classes", {}).items():
+            try:
+                deltas = [[(int(x), int(y)) for x, y in delta] for delta in history["Deltas"]]
+                self.Classes[characterClass] = _ClassHistory([int(x) for x in history["Base"]], deltas)
+            except (KeyError, TypeError, ValueError, IndexError):
+                continue
+
+    def Save(self) -> None:
+        data = {
+            "Version": self.Version,
+            "Classes": {x: {"Base": history.Base, "Deltas": history.Deltas} for x, history in self.Classes.items()},
+        }
+        try:
+            with WriteAtomic(self.HistoryPath) as historyFile:
+                json.dump(data, historyFile, separators=(",", ":"))
+        except OSError:
+            pass
+
+    def Count(self, characterClass: str) -> int:
+        history = self.Classes.get(characterClass)
+        return 0 if history is None else len(history)
+
+    def Push(self, characterClass: str, grades: List[int]) -> None:
+        """Adds an allocation to the class's history, dropping the oldest one if it's full"""
+        history = self.Classes.get(characterClass)
+        if history is None or len(history.Latest) != len(grades):
+            # A tree with a different number of skills can't be diffed against, so just start again
+            self.Classes[characterClass] = _ClassHistory(list(grades), [])
+            self.Save()
+            return
+        delta = _Diff(history.Latest, grades)
+        if not delta:
+            return
+
+        history.Deltas += [delta]
+        history.Latest = list(grades)
+        # Fold the oldest delta into the base to drop the oldest entry
+        while len(history) > self.MaxEntries:
+            _Apply(history.Base, history.Deltas.pop(0))
+        self.Save()
+
+    def Peek(self, characterClass: str) -> Optional[List[int]]:
+        """Returns the newest allocation in the class's history, or None if there isn't one"""
+        history = self.Classes.get(characterClass)
+        return None if history is None else list(history.Latest)
+
+    def Pop(self, characterClass: str) -> Optional[List[int]]:
+        """Removes the newest allocation from the class's history and returns it, or None if there isn't one"""
+        history = self.Classes.get(characterClass)
+        if history is None:
+            return None
+        grades = history.Latest
+        if history.Deltas:
+            history.Deltas.pop()
+            history.Latest = list(history.Base)
+            for delta in history.Deltas:
+                _Apply(history.Latest, delta)
+        else:
+            del self.Classes[characterClass]
+        self.Save()
+        return grades
@@ -0,0 +1,127 @@
+import unrealsdk
+import os
+import json
+from typing import Any, Dict, List, NamedTuple, Optional, Set
+
+from Mods.SkillSaver.AtomicFile import WriteAtomic
+
+
+class SkillInfo(NamedTuple):
+    """Where a single entry of `PlayerSkillTree.Skills` sits in the tree"""
+
+    Name: str
+    # The index of the branch and tier the skill is in, both -1 for hidden skills
+    Branch: int
+    Tier: int
+    MaxGrade: int
+    # Hidden skills are in the skill array, but not in any branch, so can't be upgraded normally
+    Hidden: bool
+
+
+class SkillLayout(NamedTuple):
+    """The layout of a class's skill tree, built from the tree's own definitions"""
+
+    CharacterClass: str
+    # One entry for every entry of `PlayerSkillTree.Skills`, in the same order
+    Skills: List[SkillInfo]
+    # The indexes of every non-hidden skill, in order
+    Visible: List[int]
+    # For each branch, how many points have to be spent in it to unlock each of its tiers
+    TierUnlocks: List[List[int]]
+
+    @property
+    def Hidden(self) -> List[bool]:
+        return [x.Hidden for x in self.Skills]
+
+
+def _MakeLayout(characterClass: str, skills: List[SkillInfo], tierUnlocks: List[List[int]]) -> SkillLayout:
+    return SkillLayout(characterClass, skills, [i for i, x in enumerate(skills) if not x.Hidden], tierUnlocks)
+
+
+def ReadLayout(characterClass: str, skillTree: unrealsdk.UObject) -> SkillLayout:
+    """Reads the layout off of a live `PlayerSkillTree`, by walking each branch's tiers"""
+    # {"Skill Path Name": (Branch, Tier)}
+    positions: Dict[str, Any] = {}
+    tierUnlocks: List[List[int]] = []
+    for branchIndex, branch in enumerate(getattr(skillTree, "Branches", None) or []):
+        unlocks: List[int] = []
+        required = 0
+        definition = branch.Definition
+        for tierIndex, tier in enumerate(definition.Tiers if definition is not None else []):
+            unlocks += [required]
+            required += tier.PointsToUnlockNextTier
+            for skillDef in tier.Skills:
+                if skillDef is not None:
+                    positions[skillDef.PathName(skillDef)] = (branchIndex, tierIndex)
+        tierUnlocks += [unlocks]
+
+    skills: List[SkillInfo] = []
+    for skill in skillTree.Skills:
+        definition = skill.Definition
+        name = definition.PathName(definition)
+        position = positions.get(name)
+        # If we couldn't read any branches at all, treat everything as visible rather than hiding the whole tree
+        hidden = position is None and len(positions) > 0
+        branch, tier = position if position is not None else (-1, -1)
+        skills += [SkillInfo(name, branch, tier, definition.MaxGrade, hidden)]
+    return _MakeLayout(characterClass, skills, tierUnlocks)
+
+
+class LayoutCache:
+    """
+    Keeps the layout of every class we've seen, in memory and on disk.
+    A class's layout gets re-read from its live tree the first time it's seen each session, so DLC or patches which
+    change the tree get picked up automatically, the disk copy is only for when there's no live tree to read from.
+    """
+
+    Version: int = 1
+
+    def __init__(self, CachePath: str) -> None:
+        self.CachePath: str = CachePath
+        self.Layouts: Dict[str, SkillLayout] = {}
+        # The classes which we've read off of a live tree this session
+        self.Verified: Set[str] = set()
+
+    def Load(self) -> None:
+        if not os.path.exists(self.CachePath):
+            return
+        try:
+            with open(self.CachePath, "r", encoding="utf-8") as cacheFile:
+                data = json.load(cacheFile)
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get("Version") != self.Version:
+            return
+        for characterClass, layout in data.get("Layouts", {}).items():
+            try:
+                skills = [SkillInfo(*x) for x in layout["Skills"]]
+            except (KeyError, TypeError):
+                continue
+            self.Layouts[characterClass] = _MakeLayout(characterClass, skills, layout["TierUnlocks"])
+
+    def Save(self) -> None:
+        data = {
+            "Version": self.Version,
+            "Layouts": {
+                x: {"Skills": [list(y) for y in layout.Skills], "TierUnlocks": layout.TierUnlocks}
+                for x, layout in self.Layouts.items()
+            },
+        }
+        try:
+            with WriteAtomic(self.CachePath) as cacheFile:
+                json.dump(data, cacheFile)
+        except OSError:
+            pass
+
+    def Get(self, characterClass: str, skillTree: Optional[unrealsdk.UObject] = None) -> Optional[SkillLayout]:
+        """
+        Returns the layout for the given class, reading it from the live tree if it's passed and we haven't yet.
+        Returns None if we've never seen a live tree for the class.
+        """
+        if skillTree is not None and characterClass not in self.Verified:
+            layout = ReadLayout(characterClass, skillTree)
+            self.Verified.add(characterClass)
+            if self.Layouts.get(characterClass) != layout:
+                self.Layouts[characterClass] = layout
+                self.Save()
+        return self.Layouts.get(characterClass)
@@ -1,72 +1,78 @@
 import unrealsdk
 import math
+import time
 from Mods import ModMenu
-from typing import Dict, Tuple, List
-
-# Requirement checking for those who have not installed UserFeedback
-try:
+from typing import TYPE_CHECKING, Callable, Collection, Dict, Iterator, List, Optional, Tuple
+from Mods.SkillSaver import Profiler
+from Mods.SkillSaver.RestorePlanner import PlanRestore
+from Mods.SkillSaver import BuildCode
+from Mods.SkillSaver.SkillLayout import LayoutCache
+from Mods.SkillSaver.BuildStore import BuildStore
+from Mods.SkillSaver.BuildIndex import BuildIndex
+from Mods.SkillSaver.SkillHistory import SkillHistory
+from Mods.SkillSaver.BuildValidator import GetRules, ValidateBuild
+from Mods.SkillSaver.PlayerState import PlayerStateCache
+
+# UserFeedback and the file import/export code only get imported the first time they're needed, so the game starting
+# up only has to pay for registering the mod
+if TYPE_CHECKING:
     from Mods import UserFeedback
-
-    if UserFeedback.VersionMajor < 1:
-        raise RuntimeError("UserFeedback version is too old, need at least v1.5!")
-    if UserFeedback.VersionMajor == 1 and UserFeedback.VersionMinor < 5:
-        raise RuntimeError("UserFeedback version is too old, need at least v1.5!")
-except (ImportError, RuntimeError, NameError) as ex:
-    import webbrowser
-
-    url = "https://apple1417.github.io/bl2/didntread/?m=Skill%20Saver&uf=v1.5"
-    if isinstance(ex, (RuntimeError, NameError)):
-        url += "&update"
-    webbrowser.open(url)
-    raise ex
+    from Mods.SkillSaver import BuildLibrary
+else:
+    UserFeedback = None
 
 """
-Returns the blacklisted skills for the given character
-Pretty much only Gaige & Krieg have blacklisted skills as they both use hidden skills which are still stored in the skill tree objects themselves.
+Imports UserFeedback if it hasn't been already, checking it's new enough.
+Returns False if it's missing or too old, after sending the player to where to get it.
 """
 
 
-def GetSkillIndexBlackList(CharacterClass: str) -> List[int]:
-    skillIndexBlacklist = []
+def RequireUserFeedback() -> bool:
+    global UserFeedback
+    if UserFeedback is not None:
+        return True
+
+    # Requirement checking for those who have not installed UserFeedback
+    try:
+        from Mods import UserFeedback as userFeedback
+
+        if userFeedback.VersionMajor < 1:
+            raise RuntimeError("UserFeedback version is too old, need at least v1.5!")
+        if userFeedback.VersionMajor == 1 and userFeedback.VersionMinor < 5:
+            raise RuntimeError("UserFeedback version is too old, need at least v1.5!")
+    except (ImportError, RuntimeError, NameError) as ex:
+        import webbrowser
 
-    # Ignore ""hidden"" skills
-    if CharacterClass == "Mechromancer":
-        skillIndexBlacklist = [24]
-    elif CharacterClass == "Psycho":
-        skillIndexBlacklist = [13, 37, 38]
-    return skillIndexBlacklist
+        unrealsdk.Log(f"[SkillSaver] Unable to load UserFeedback, which SkillSaver requires: {ex}")
+        url = "https://apple1417.github.io/bl2/didntread/?m=Skill%20Saver&uf=v1.5"
+        if isinstance(ex, (RuntimeError, NameError)):
+            url += "&update"
+        webbrowser.open(url)
+        return False
+    UserFeedback = userFeedback
+    return True
 
 
 """Returns a tuple of the character class and the current build object"""
 
 
 def GetCharClassAndSkillTree() -> Tuple[str, unrealsdk.UObject]:
-    PC = unrealsdk.GetEngine().GamePlayers[0].Actor
-    currentBuild, characterClass = None, None
-    # Check if the player is loaded
-    if PC.CharacterClass is not None and PC.PlayerSkillTree is not None:
-        currentBuild = PC.PlayerSkillTree.Skills
-        characterClass = PC.CharacterClass.GetName()
-    # Get the cached save game for the player
-    elif PC.GetCachedSaveGame() is not None:
-        characterClass = PC.GetCachedSaveGame().PlayerClassDefinition.GetName()
-        currentBuild = PC.GetCachedSaveGame().SkillData
-    # Return nothing otherwise
-    if currentBuild is None or characterClass is None:
+    global instance
+    # The state's cached between actions, the hooks on the mod clear it whenever it changes
+    state = instance.Player.Get()
+    if state is None:
         return ("", None)
-    # Certain classes have some different names from their CharacterClass
-    if characterClass == "CharClass_LilacPlayerClass":
-        characterClass = "Psycho"
-    elif characterClass == "charclass_doppelganger":
-        characterClass = "Doppelganger"
-    characterClass = characterClass.replace("CharClass_", "")
-    return (characterClass, currentBuild)
+    return (state.CharacterClass, state.Skills)
 
 
 """Saves the skill tree to the global instance's skill options"""
 
 
 def SaveSkillTree() -> None:
+    global instance
+    if not instance.EnsureLoaded():
+        return
+
     unrealsdk.Log("[SkillSaver] Saving skill tree...")
 
     def _GetResult(Message: str) -> None:
@@ -80,23 +86,18 @@ def SaveSkillTree() -> None:
         if CharacterClass == "" or SkillTreeData is None:
             return
 
-        skillIndexBlacklist = GetSkillIndexBlackList(CharacterClass)
-
-        # The build stored as a string (really just an array of skill points)
+        # The build stored as a build code, which packs the grade of every skill (hidden ones too)
         # Note that this does include the action skill as well (in case you want a build without an action skill I guess)
-        build = ""
-        skillIndex = 0
-        for skill in SkillTreeData:
-            if skillIndex not in skillIndexBlacklist:
-                build += str(skill.Grade)
-            skillIndex += 1
+        try:
+            build = BuildCode.Encode(BuildCode.Build(CharacterClass, [skill.Grade for skill in SkillTreeData]))
+        except ValueError as ex:
+            unrealsdk.Log(f"[SkillSaver] Unable to save tree for {CharacterClass}: {ex}")
+            return
         unrealsdk.Log(f'[SkillSaver] Saving tree ({build}) for {CharacterClass} with build name "{Message}"')
 
         # Update the skill map, **will overwrite duplicates**
-        instance.SkillMap.CurrentValue[CharacterClass].update({Message: build})
-
-        # Save the settings as manually updating it like this does not save it
-        ModMenu.SettingsManager.SaveModSettings(instance)
+        with Profiler.Time("SaveBuild"):
+            instance.Builds.Set(CharacterClass, Message, build)
 
     # Create a text box for the player to enter their name
     inputBox = UserFeedback.TextInputBox("Enter Skill Tree Name:", PausesGame=True)
@@ -104,73 +105,214 @@ def SaveSkillTree() -> None:
     inputBox.Show()
 
 
+"""
+Shows a page of the saved skill trees for the given character, calling `OnPick` with the name of the one picked.
+The box also has buttons to change page, search by name, and switch between alphabetical and most recently used order,
+only the buttons for the page being shown get created, so it opens just as fast no matter how many trees there are.
+"""
+
+BuildsPerPage: int = 5
+
+
+def PickSkillTree(
+    CharacterClass: str, Title: str, Caption: str, OnPick: Callable[[str], None], Exclude: Collection[str] = ()
+) -> None:
+    global instance
+    query = ""
+    recent = False
+    page = 0
+
+    previousButton = UserFeedback.OptionBoxButton("< Previous Page")
+    nextButton = UserFeedback.OptionBoxButton("Next Page >")
+    searchButton = UserFeedback.OptionBoxButton("Search...", "Only show skill trees starting with some text")
+    clearButton = UserFeedback.OptionBoxButton("Clear Search")
+    recentButton = UserFeedback.OptionBoxButton("Show Recently Used")
+    allButton = UserFeedback.OptionBoxButton("Show All (A-Z)")
+
+    def _OnSearch(Message: str) -> None:
+        nonlocal query, page
+        query, page = Message.strip(), 0
+        _Show()
+
+    def _OnPress(button: UserFeedback.OptionBoxButton) -> None:
+        nonlocal query, recent, page
+        if button is previousButton or button is nextButton:
+            page += -1 if button is previousButton else 1
+        elif button is clearButton:
+            query, page = "", 0
+        elif button is recentButton or button is allButton:
+            recent, page = button is recentButton, 0
+        elif button is searchButton:
+            inputBox = UserFeedback.TextInputBox("Search Skill Trees:", query, PausesGame=True)
+            inputBox.OnSubmit = _OnSearch  # type: ignore[assignment]
+            inputBox.Show()
+            return
+        else:
+            instance.Index.Touch(CharacterClass, button.Name)
+            OnPick(button.Name)
+            return
+        _Show()
+
+    def _Show() -> None:
+        search = instance.Index.SearchRecent if recent else instance.Index.Search
+        with Profiler.Time("SearchSkillTrees"):
+            names, total = search(CharacterClass, query, page * BuildsPerPage, BuildsPerPage, Exclude)
+        if total == 0 and query == "" and not recent:
+            unrealsdk.Log(f"[SkillSaver] No saved skill trees for the {CharacterClass}")
+            return
+
+        # Only the trees on this page get buttons, the rest are just counted
+        buttons = [UserFeedback.OptionBoxButton(Name=x) for x in names]
+        if page > 0:
+            buttons += [previousButton]
+        if (page + 1) * BuildsPerPage < total:
+            buttons += [nextButton]
+        buttons += [searchButton] + ([clearButton] if query else [])
+        buttons += [allButton if recent else recentButton]
+
+        pageCount = max(1, -(-total // BuildsPerPage))
+        status = f"Page {page + 1}/{pageCount}, {total} {'recently used ' if recent else ''}skill trees"
+        if query:
+            status += f' starting with "{query}"'
+        optionBox = UserFeedback.OptionBox(Title=Title, Caption=f"{Caption}<br>{status}", Buttons=buttons)
+        optionBox.OnPress = _OnPress  # type: ignore[assignment]
+        optionBox.Update()
+        optionBox.Show()
+
+    _Show()
+
+
 """Restores the selected skill tree from the chosen option (currently selected character)"""
 
 
 def RestoreSkillTree() -> None:
     global instance
+    if not instance.EnsureLoaded():
+        return
 
-    # Get player controller
-    PC = unrealsdk.GetEngine().GamePlayers[0].Actor
-    # Get the current character class and skill tree
     CharacterClass, SkillTree = GetCharClassAndSkillTree()
-
     # Error Check
     if CharacterClass == "" or SkillTree is None:
         return
 
+    """ Restores the selected skill tree"""
+
+    def _OnSelectSkillTree(name: str) -> None:
+        ApplyBuild(name, instance.SkillMap.CurrentValue[CharacterClass][name])
+
+    PickSkillTree(
+        CharacterClass,
+        "Skill Tree Selection",
+        f"Select a skill tree for the {CharacterClass} to restore to",
+        _OnSelectSkillTree,
+    )
+
+
+"""
+Restores the current character's skill tree to a stored build, only sending the upgrades it actually needs.
+Unless `Record` is False, the current tree gets added to the history first so it can be undone.
+Returns True if the build was applied.
+"""
+
+
+def ApplyBuild(Name: str, Build: str, Record: bool = True) -> bool:
+    global instance
+    if not instance.EnsureLoaded():
+        return False
+
+    # Get the player controller, current character class and skill tree
+    state = instance.Player.Get()
+
+    # Error Check
+    if state is None:
+        return False
+    PC, CharacterClass = state.Controller, state.CharacterClass
+
     # Get the respec cost (includes percentage of option) and then floor it (we'll be forgiving :P)
-    respecCost = math.floor(PC.GetSkillTreeResetCost() * (instance.RespecCost.CurrentValue / 100))
+    respecCost = math.floor(state.ResetCost * (instance.RespecCost.CurrentValue / 100))
 
     # Don't charge the player just to spec, especially if they're already not specced
-    if PC.PlayerReplicationInfo.GeneralSkillPoints == 0:
+    if state.SkillPoints == 0:
         respecCost = 0
 
-    """ Saves the selected skill tree from the passed option box button"""
+    # The layout tells us which skills are hidden, and what tier each one is in
+    skills = list(state.Skills)
+    layout = instance.Layouts.Get(CharacterClass, state.SkillTree)
+    if layout is None or len(layout.Skills) != len(skills):
+        unrealsdk.Log(f"[SkillSaver] Unable to restore {Name}: the skill tree hasn't loaded yet")
+        return False
+
+    # Work out what's actually different, so we only send the upgrades we need to rather than one per point
+    try:
+        target = BuildCode.GetStoredGrades(CharacterClass, Build, layout.Hidden)
+    except ValueError as ex:
+        unrealsdk.Log(f"[SkillSaver] Unable to restore {Name}: {ex}")
+        return False
+    current = [skill.Grade for skill in skills]
+    plan = PlanRestore(current, target, [x.Tier for x in layout.Skills])
+
+    # Make sure the whole build can actually be applied before sending anything, rather than failing part way through
+    points = state.SkillPoints
+    if plan.Reset:
+        points += sum(grade for grade, hidden in zip(current, layout.Hidden) if not hidden)
+    try:
+        ValidateBuild(GetRules(layout), current, target, plan, points)
+    except ValueError as ex:
+        unrealsdk.Log(f"[SkillSaver] Unable to restore {Name}: {ex}")
+        return False
+    cost = respecCost if plan.Reset else 0
+    unrealsdk.Log(
+        f"[SkillSaver] Restoring skills to {Name} (Build = {Build}) (Cost: {cost})"
+        f" ({len(plan.Upgrades)} upgrades{', after a reset' if plan.Reset else ''})"
+    )
 
-    def _OnSelectSkillTree(button: UserFeedback.OptionBoxButton) -> None:
-        selectedBuild = instance.SkillMap.CurrentValue[CharacterClass][button.Name]
-        unrealsdk.Log(f"[SkillSaver] Restoring skills to {button.Name} (Build = {selectedBuild}) (Cost: {respecCost})")
+    # Remember what the tree was before we change it
+    if Record and (plan.Reset or plan.Upgrades):
+        instance.History.Push(CharacterClass, current)
+    # The hooks should catch these changes too, but make sure nothing reads the old points
+    instance.Player.Invalidate()
 
-        skillIndexBlacklist = GetSkillIndexBlackList(CharacterClass)
+    # Only respec if a point has to be taken out of a skill, adding the points we removed back
+    if plan.Reset:
+        with Profiler.Time("ResetSkillTree"):
+            PC.PlayerReplicationInfo.GeneralSkillPoints += PC.ResetSkillTree(True, False)
 
-        # Add the skill points back that we have removed
-        PC.PlayerReplicationInfo.GeneralSkillPoints += PC.ResetSkillTree(True, False)
+    for skillIndex in plan.Upgrades:
+        Profiler.Call("ServerUpgradeSkill", PC.ServerUpgradeSkill, skills[skillIndex].Definition)
 
-        # Get the individual skill point values, stored as a list
-        specList = list(selectedBuild)
-        removedIndexes = 0
+    # Set the skill points equal to the remaining amount of skill points
+    # There's surely a better, less janky way of doing this, but it works :/
+    # actionSkillUnlock = (2, 4)[ModMenu.Game.GetCurrent() == ModMenu.Game.BL2]
 
-        for skill in SkillTree:
-            if skill.Index not in skillIndexBlacklist:
-                skillGrade = int(specList[skill.Index - removedIndexes])
-                for x in range(skillGrade):
-                    PC.ServerUpgradeSkill(skill.Definition)
-            else:
-                removedIndexes += 1
+    # Charge the player the amount for the respec cost (only if they can afford it)
+    # Just adding points on top of the current tree isn't a respec, so that stays free
+    if cost <= PC.PlayerReplicationInfo.GetCurrencyOnHand(0) and cost > 0:
+        PC.PlayerReplicationInfo.AddCurrencyOnHand(0, -1 * cost)
+    return True
 
-        # Set the skill points equal to the remaining amount of skill points
-        # There's surely a better, less janky way of doing this, but it works :/
-        # actionSkillUnlock = (2, 4)[ModMenu.Game.GetCurrent() == ModMenu.Game.BL2]
 
-        # Charge the player the amount for the respec cost (only if they can afford it)
-        if respecCost <= PC.PlayerReplicationInfo.GetCurrencyOnHand(0) and respecCost > 0:
-            PC.PlayerReplicationInfo.AddCurrencyOnHand(0, -1 * respecCost)
+"""Puts the skill tree back to how it was before the last restore"""
 
-    buttons = []
-    # Add a box button for every skill tree saved for the given character
-    for skillTree in instance.SkillMap.CurrentValue[CharacterClass]:
-        buttons += [UserFeedback.OptionBoxButton(Name=skillTree)]
 
-    optionBox = UserFeedback.OptionBox(
-        Title="Skill Tree Selection",
-        Caption=f"Select a skill tree for the {CharacterClass} to restore to",
-        Buttons=buttons,
-    )
-    # Set the callback
-    optionBox.OnPress = _OnSelectSkillTree  # type: ignore[assignment]
-    optionBox.Update()
-    optionBox.Show()
+def UndoRespec() -> None:
+    global instance
+    if not instance.EnsureLoaded():
+        return
+
+    CharacterClass, SkillTree = GetCharClassAndSkillTree()
+    # Error Check
+    if CharacterClass == "" or SkillTree is None:
+        return
+
+    grades = instance.History.Peek(CharacterClass)
+    if grades is None:
+        unrealsdk.Log(f"[SkillSaver] No respecs to undo for the {CharacterClass}")
+        return
+    # Goes through the same path as restoring a saved tree, so it only sends what's changed since
+    build = BuildCode.Encode(BuildCode.Build(CharacterClass, grades))
+    if ApplyBuild("the previous skill tree", build, Record=False):
+        instance.History.Pop(CharacterClass)
+        unrealsdk.Log(f"[SkillSaver] {instance.History.Count(CharacterClass)} more respecs can be undone")
 
 
 """Prompts the player to delete a given skill tree"""
@@ -178,6 +320,9 @@ def RestoreSkillTree() -> None:
 
 def DeleteSkillTrees() -> None:
     global instance
+    if not instance.EnsureLoaded():
+        return
+
     CharacterClass, SkillTree = GetCharClassAndSkillTree()
     # Error Check
     if CharacterClass == "" or SkillTree is None:
@@ -185,34 +330,167 @@ def DeleteSkillTrees() -> None:
 
     """ A callback for the option box for deleting skill trees, will delete the selected option"""
 
-    def _DeleteSavedTree(button: UserFeedback.OptionBoxButton) -> None:
+    def _DeleteSavedTree(name: str) -> None:
         # Pop the build value (remove it)
-        buildValue = instance.SkillMap.CurrentValue[CharacterClass].pop(button.Name)
-        unrealsdk.Log(f"[SkillSaver] Deleting {button.Name} (Build = {buildValue}) for {CharacterClass}")
-        # Save settings as manually updating that dict does not save it
-        ModMenu.SettingsManager.SaveModSettings(instance)
-
-    buttons = []
-    for skillTree in instance.SkillMap.CurrentValue[CharacterClass]:
-        # Block the user from deleting "None"
-        if skillTree == "None":
-            continue
-        # Add a button for each skill tree
-        buttons += [UserFeedback.OptionBoxButton(Name=skillTree)]
-    # Create an option box for the user
+        with Profiler.Time("SaveBuild"):
+            buildValue = instance.Builds.Delete(CharacterClass, name)
+        unrealsdk.Log(f"[SkillSaver] Deleting {name} (Build = {buildValue}) for {CharacterClass}")
+
+    # Block the user from deleting "None"
+    PickSkillTree(CharacterClass, "Skill Tree Deletion", "Select a skill tree to delete", _DeleteSavedTree, {"None"})
+
+
+"""Shows the build code for a saved skill tree, so it can be copied out and shared"""
+
+
+def ShareSkillTree() -> None:
+    global instance
+    if not instance.EnsureLoaded():
+        return
+
+    CharacterClass, SkillTree = GetCharClassAndSkillTree()
+    # Error Check
+    if CharacterClass == "" or SkillTree is None:
+        return
+
+    def _OnSelectSkillTree(name: str) -> None:
+        build = instance.SkillMap.CurrentValue[CharacterClass][name]
+        # Builds saved before build codes existed have to be converted first, hidden skills just come out as 0
+        if BuildCode.IsLegacy(build):
+            build = BuildCode.Encode(BuildCode.FromLegacy(CharacterClass, build))
+        unrealsdk.Log(f"[SkillSaver] Build code for {name}: {build}")
+
+        # Put it in a text box so it can be selected and copied
+        inputBox = UserFeedback.TextInputBox(f"Build Code for {name}:", build, PausesGame=True)
+        inputBox.Show()
+
+    PickSkillTree(
+        CharacterClass, "Share Skill Tree", "Select a skill tree to get the build code of", _OnSelectSkillTree
+    )
+
+
+"""Saves a skill tree from a build code someone else shared"""
+
+
+def ImportSkillTree() -> None:
+    global instance
+    if not instance.EnsureLoaded():
+        return
+
+    def _GetName(build: BuildCode.Build, code: str) -> None:
+        def _GetResult(Message: str) -> None:
+            # Don't even bother trying to add all white space names
+            if Message.isspace() or Message == "None":
+                return
+            unrealsdk.Log(f'[SkillSaver] Importing tree ({code}) for {build.CharacterClass} as "{Message}"')
+            with Profiler.Time("SaveBuild"):
+                instance.Builds.Set(build.CharacterClass, Message, code)
+
+        inputBox = UserFeedback.TextInputBox(f"Enter {build.CharacterClass} Skill Tree Name:", PausesGame=True)
+        inputBox.OnSubmit = _GetResult  # type: ignore[assignment]
+        inputBox.Show()
+
+    def _GetCode(Message: str) -> None:
+        try:
+            build = BuildCode.Decode(Message)
+        except ValueError as ex:
+            unrealsdk.Log(f"[SkillSaver] Unable to import build code: {ex}")
+            return
+        # The code may be for a class from the other game
+        if build.CharacterClass not in instance.SkillMap.CurrentValue:
+            unrealsdk.Log(f"[SkillSaver] Unable to import build code: {build.CharacterClass} isn't in this game")
+            return
+        # Store it re-encoded, so any stray whitespace or padding from copying it doesn't get saved
+        _GetName(build, BuildCode.Encode(build))
+
+    inputBox = UserFeedback.TextInputBox("Enter Build Code:", PausesGame=True)
+    inputBox.OnSubmit = _GetCode  # type: ignore[assignment]
+    inputBox.Show()
+
+
+"""Writes saved skill trees out to a file, for moving them to another machine or sharing a whole library"""
+
+LibraryPath: str = "Mods/SkillSaver/Library.jsonl"
+
+
+def ExportSkillTrees() -> None:
+    global instance
+    if not instance.EnsureLoaded():
+        return
+    from Mods.SkillSaver import BuildLibrary
+
+    CharacterClass, _ = GetCharClassAndSkillTree()
+    allButton = UserFeedback.OptionBoxButton("All Characters")
+    buttons = [allButton]
+    if CharacterClass in instance.SkillMap.CurrentValue:
+        buttons += [UserFeedback.OptionBoxButton(f"Only the {CharacterClass}")]
+
+    def _Export(classes: Optional[Collection[str]], Message: str) -> None:
+        path = Message.strip()
+        try:
+            count = BuildLibrary.ExportBuilds(path, instance.SkillMap.CurrentValue, classes)
+        except OSError as ex:
+            unrealsdk.Log(f"[SkillSaver] Unable to export skill trees: {ex}")
+            return
+        unrealsdk.Log(f"[SkillSaver] Exported {count} skill trees to {path}")
+
+    def _OnSelectClasses(button: UserFeedback.OptionBoxButton) -> None:
+        classes = None if button is allButton else [CharacterClass]
+        inputBox = UserFeedback.TextInputBox("Export To:", LibraryPath, PausesGame=True)
+        inputBox.OnSubmit = lambda Message: _Export(classes, Message)  # type: ignore[assignment]
+        inputBox.Show()
+
     optionBox = UserFeedback.OptionBox(
-        Title="Skill Tree Deletion", Caption="Select a skill tree to delete", Buttons=buttons
+        Title="Export Skill Trees", Caption="Select which skill trees to export", Buttons=buttons
     )
-    # Set the callback
-    optionBox.OnPress = _DeleteSavedTree  # type: ignore[assignment]
+    optionBox.OnPress = _OnSelectClasses  # type: ignore[assignment]
     optionBox.Update()
     optionBox.Show()
 
 
-"""Allow the user to manage their skill tree setup (Save / Restore / Delete)"""
+"""
+Imports every skill tree from a file written by `ExportSkillTrees`, or put together by hand.
+The import runs a little each tick, so even huge libraries don't freeze the game.
+"""
+
+
+def ImportSkillTreeFile() -> None:
+    global instance
+    if not instance.EnsureLoaded():
+        return
+    from Mods.SkillSaver import BuildLibrary
+
+    if instance.Import is not None:
+        unrealsdk.Log("[SkillSaver] Already importing skill trees, wait for it to finish first")
+        return
+
+    def _GetHidden(characterClass: str) -> Optional[List[bool]]:
+        layout = instance.Layouts.Get(characterClass)
+        return None if layout is None else layout.Hidden
+
+    def _GetResult(Message: str) -> None:
+        path = Message.strip()
+        result = BuildLibrary.ImportResult()
+        importer = BuildLibrary.ImportBuilds(
+            path, instance.SkillMap.CurrentValue, _GetHidden, instance.Builds.SetMany, result
+        )
+        instance.Import = (path, importer, result)
+        unrealsdk.Log(f"[SkillSaver] Importing skill trees from {path}")
+
+    inputBox = UserFeedback.TextInputBox("Import From:", LibraryPath, PausesGame=True)
+    inputBox.OnSubmit = _GetResult  # type: ignore[assignment]
+    inputBox.Show()
+
+
+"""Allow the user to manage their skill tree setup (Save / Restore / Delete / Share / Import / Undo / Export)"""
 
 
 def ManageSkillTrees() -> None:
+    global instance
+    # Load everything in on first use, rather than when the game starts
+    if not instance.EnsureLoaded():
+        return
+
     unrealsdk.Log("[SkillSaver] Managing Skill Trees")
 
     # Simple dictionary to map option to function
@@ -220,6 +498,11 @@ def ManageSkillTrees() -> None:
         "Restore Skill Tree": RestoreSkillTree,
         "Save Skill Tree": SaveSkillTree,
         "Delete Skill Tree": DeleteSkillTrees,
+        "Share Skill Tree": ShareSkillTree,
+        "Import Skill Tree": ImportSkillTree,
+        "Undo Last Respec": UndoRespec,
+        "Export Skill Trees": ExportSkillTrees,
+        "Import Skill Tree File": ImportSkillTreeFile,
     }
 
     """ Calls the given function for the selected option box button """
@@ -240,6 +523,26 @@ def ManageSkillTrees() -> None:
     optionBox.Show()
 
 
+"""Starts recording timings, or stops and dumps everything recorded since it was started"""
+
+
+def ToggleProfiling() -> None:
+    if not Profiler.Enabled:
+        Profiler.Reset()
+        Profiler.Enabled = True
+        unrealsdk.Log("[SkillSaver] Profiling started, press the bind again to stop")
+        return
+
+    Profiler.Enabled = False
+    for line in Profiler.FormatSummary():
+        unrealsdk.Log(f"[SkillSaver] {line}")
+    try:
+        Profiler.Export("Mods/SkillSaver/Profile.json")
+    except OSError:
+        return
+    unrealsdk.Log("[SkillSaver] Profile written to Mods/SkillSaver/Profile.json")
+
+
 class SkillSaver(ModMenu.SDKMod):
     Name: str = "Skill Saver"
     Author: str = "FromDarkHell"
@@ -249,7 +552,11 @@ class SkillSaver(ModMenu.SDKMod):
     Types: ModMenu.ModTypes = ModMenu.ModTypes.Utility | ModMenu.ModTypes.Gameplay
     SaveEnabledState: ModMenu.EnabledSaveType = ModMenu.EnabledSaveType.LoadWithSettings
 
-    Keybinds = [ModMenu.Keybind("Manage Skill Layouts", "F3", OnPress=ManageSkillTrees)]
+    Keybinds = [
+        ModMenu.Keybind("Manage Skill Layouts", "F3", OnPress=ManageSkillTrees),
+        # Unbound by default, only really useful when chasing down slow respecs
+        ModMenu.Keybind("Toggle Profiling", "None", OnPress=ToggleProfiling),
+    ]
 
     def __init__(self) -> None:
         # Creates the option for the respec cost
@@ -262,28 +569,145 @@ class SkillSaver(ModMenu.SDKMod):
             5,
         )
 
-        # Value for the start of the Skill Map
-        # Store it in a separate variable for clarity
-        StartingValue = {}
-
-        # Pick from the list of valid characters based off of the game
-        Characters = (
-            ["Prototype", "Enforcer", "Gladiator", "Lawbringer", "Baroness", "Doppelganger"],
-            ["Mercenary", "Soldier", "Assassin", "Siren", "Mechromancer", "Psycho"],
-        )[int(ModMenu.Game.GetCurrent() == ModMenu.Game.BL2)]
-
-        for Character in Characters:
-            # Add the default no skill specs
-            StartingValue.update({Character: {"None": "0" * 40}})
-
         # The Skill Map is where we store the build strings for every character
+        # The default builds for each character only get added on first use, see `EnsureLoaded()`
         self.SkillMap: ModMenu.Options.Hidden[Dict[str, Dict[str, str]]] = ModMenu.Options.Hidden(
-            "SkillMap", StartingValue=StartingValue
+            "SkillMap", StartingValue={}
         )
 
         # Set the options back up
         self.Options = [self.RespecCost, self.SkillMap]
 
+        # The layout of each class's skill tree, which skills are hidden and what tier they're in
+        self.Layouts = LayoutCache("Mods/SkillSaver/SkillLayouts.json")
+
+        # The player's class, skill tree and points, kept between actions and cleared by the hooks below
+        self.Player = PlayerStateCache()
+
+        # What each class's skill tree was before the last few restores, so they can be undone
+        self.History = SkillHistory("Mods/SkillSaver/History.json")
+
+        # Sorted and recently used build names, for the skill tree picker, the recently used ones are kept between games
+        self.Index = BuildIndex("Mods/SkillSaver/RecentBuilds.json", lambda: self.SkillMap.CurrentValue)
+
+        # Changes to the Skill Map get journaled, and only written to the settings file once they stop coming in
+        self.Builds = BuildStore(
+            "Mods/SkillSaver/SkillMap.journal",
+            "Mods/SkillSaver/SkillMap.json",
+            lambda: self.SkillMap.CurrentValue,
+            self.SaveSettings,
+            self.OnBuildChanged,
+        )
+
+        # The path, progress and running totals of the file import currently in progress, if there is one
+        self.Import: Optional[Tuple[str, Iterator[None], "BuildLibrary.ImportResult"]] = None
+
+        # Whether everything's been loaded in yet, nothing touches the disk until it has
+        self.Loaded: bool = False
+
+    def EnsureLoaded(self) -> bool:
+        """
+        Loads everything that isn't needed until the player actually uses the mod, the first time it's called.
+        Returns False if UserFeedback is missing, in which case nothing can be used.
+        """
+        if not RequireUserFeedback():
+            return False
+        if self.Loaded:
+            return True
+        self.Loaded = True
+
+        with Profiler.Time("EnsureLoaded"):
+            # Pick from the list of valid characters based off of the game
+            Characters = (
+                ["Prototype", "Enforcer", "Gladiator", "Lawbringer", "Baroness", "Doppelganger"],
+                ["Mercenary", "Soldier", "Assassin", "Siren", "Mechromancer", "Psycho"],
+            )[int(ModMenu.Game.GetCurrent() == ModMenu.Game.BL2)]
+
+            skillMap = self.SkillMap.CurrentValue
+            for Character in Characters:
+                # Add the default no skill specs, for any character we don't already have builds for
+                if Character not in skillMap:
+                    skillMap[Character] = {"None": "0" * 40}
+
+            # Anything newer than the settings file is in the journal
+            self.Builds.Load()
+            self.Layouts.Load()
+            self.History.Load()
+            self.Index.Load()
+        return True
+
+    def OnBuildChanged(self, characterClass: str, name: str, build: Optional[str]) -> None:
+        if build is None:
+            self.Index.Remove(characterClass, name)
+        else:
+            self.Index.Add(characterClass, name)
+
+    def SaveSettings(self) -> None:
+        with Profiler.Time("SaveModSettings"):
+            ModMenu.SettingsManager.SaveModSettings(self)
+
+    def Disable(self) -> None:
+        if self.Import is not None:
+            unrealsdk.Log(f"[SkillSaver] Stopped importing skill trees from {self.Import[0]}")
+            self.Import = None
+        # Don't leave anything sitting in the journal
+        self.Builds.Flush()
+        super().Disable()
+
+    @ModMenu.Hook("WillowGame.WillowGameViewportClient.Tick")
+    def OnTick(self, caller: unrealsdk.UObject, function: unrealsdk.UFunction, params: unrealsdk.FStruct) -> bool:
+        # Hold off on compacting until any import is done, so it only has to happen once
+        if self.Import is not None:
+            self.RunImport()
+        else:
+            self.Builds.Tick()
+        return True
+
+    @ModMenu.Hook("WillowGame.WillowPlayerController.SpawningProcessComplete")
+    @ModMenu.Hook("WillowGame.WillowSaveGameManager.EndLoadGame")
+    @ModMenu.Hook("Engine.GameInfo.PreCommitMapChange")
+    @ModMenu.Hook("WillowGame.WillowPlayerController.ServerUpgradeSkill")
+    @ModMenu.Hook("WillowGame.WillowPlayerController.ResetSkillTree")
+    @ModMenu.Hook("WillowGame.WillowPlayerController.ExpLevelUp")
+    def OnPlayerChanged(
+        self, caller: unrealsdk.UObject, function: unrealsdk.UFunction, params: unrealsdk.FStruct
+    ) -> bool:
+        # A character or save game got loaded, or the skill points changed, re-read it all next time it's needed
+        self.Player.Invalidate()
+        return True
+
+    # How long an import can run for each tick, in seconds
+    ImportBudget: float = 0.004
+
+    def RunImport(self) -> None:
+        if self.Import is None:
+            return
+        path, importer, result = self.Import
+        deadline = time.perf_counter() + self.ImportBudget
+        try:
+            with Profiler.Time("ImportSkillTrees"):
+                while time.perf_counter() < deadline:
+                    next(importer)
+            return
+        except StopIteration:
+            pass
+        except Exception as ex:
+            # Once the importer's raised it's done for, so always clear it, or no other import could ever start
+            unrealsdk.Log(
+                f"[SkillSaver] Unable to import skill trees from {path}: {ex} ({result.Imported} imported before it"
+                " stopped)"
+            )
+            self.Import = None
+            return
+
+        self.Import = None
+        unrealsdk.Log(
+            f"[SkillSaver] Imported {result.Imported} skill trees from {path} ({result.Renamed} renamed,"
+            f" {result.Duplicates} duplicates skipped, {result.Rejected} rejected)"
+        )
+        for lineNumber, reason in result.Reasons:
+            unrealsdk.Log(f"[SkillSaver] Line {lineNumber}: {reason}")
+
 
 instance = SkillSaver()
 